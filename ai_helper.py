@@ -36,6 +36,14 @@ class AIHelper:
         "Trend Analizi": "Aşağıdaki tarihli metinleri analiz ederek Türkçe trend analizi yap:\n\n{texts}\n\nTürkçe trend analizi:"
     }
     
+    # İşlem başına prompt'a giren en fazla metin sayısı
+    TEXT_LIMITS = {
+        "Özetleme": 10,
+        "Sınıflandırma": 20,
+        "Kümelendirme": 15,
+        "Trend Analizi": 10
+    }
+    
     # Varsayılan sistem prompt'ları
     DEFAULT_SYSTEM_PROMPTS = {
         "Özetleme": "Sen bir metin analiz uzmanısın. Verilen metinleri kısa ve öz bir şekilde Türkçe olarak özetle.",
@@ -110,7 +118,8 @@ class AIHelper:
         
         try:
             # Metinleri birleştir
-            combined_text = "\n\n".join(texts[:10])  # İlk 10 metni al
+            texts = texts[:self.TEXT_LIMITS["Özetleme"]]
+            combined_text = "\n\n".join(texts)
             
             if custom_prompt:
                 # Özel prompt kullan
@@ -139,7 +148,7 @@ Lütfen Türkçe olarak özetle:
                 'summary': response,
                 'model_used': model,
                 'processing_time': time.time() - start_time,
-                'texts_analyzed': len(texts[:10]),
+                'texts_analyzed': len(texts),
                 'analysis_type': 'Özetleme'
             }
             
@@ -164,7 +173,7 @@ Lütfen Türkçe olarak özetle:
         try:
             classifications = []
             
-            for i, text in enumerate(texts[:20]):  # İlk 20 metni sınıflandır
+            for i, text in enumerate(texts[:self.TEXT_LIMITS["Sınıflandırma"]]):
                 if custom_prompt:
                     # Özel prompt kullan
                     prompt = custom_prompt.replace("{text}", text)
@@ -222,7 +231,8 @@ Kategori (sadece Türkçe kategori adını yaz):
         
         try:
             # Metinleri birleştir
-            combined_text = "\n".join([f"{i+1}. {text}" for i, text in enumerate(texts[:15])])
+            texts = texts[:self.TEXT_LIMITS["Kümelendirme"]]
+            combined_text = "\n".join([f"{i+1}. {text}" for i, text in enumerate(texts)])
             
             if custom_prompt:
                 # Özel prompt kullan
@@ -252,7 +262,7 @@ Grup 2: Öneri Konuları - Metinler: 2, 4, 6
             response = self._call_ollama(model, prompt, system_prompt)
             
             # Yanıtı parse et
-            clusters = self._parse_clustering_response(response, texts[:15])
+            clusters = self._parse_clustering_response(response, texts)
             
             # Metrikleri kaydet
             self._record_metrics("clustering", model, time.time() - start_time)
@@ -262,7 +272,7 @@ Grup 2: Öneri Konuları - Metinler: 2, 4, 6
                 'raw_response': response,
                 'model_used': model,
                 'processing_time': time.time() - start_time,
-                'texts_analyzed': len(texts[:15]),
+                'texts_analyzed': len(texts),
                 'analysis_type': 'Kümelendirme'
             }
             
@@ -287,7 +297,8 @@ Grup 2: Öneri Konuları - Metinler: 2, 4, 6
         
         try:
             # Metin ve tarihleri birleştir
-            combined_data = "\n".join([f"{date}: {text}" for date, text in zip(dates[:10], texts[:10])])
+            limit = self.TEXT_LIMITS["Trend Analizi"]
+            combined_data = "\n".join([f"{date}: {text}" for date, text in zip(dates[:limit], texts[:limit])])
             
             if custom_prompt:
                 # Özel prompt kullan
@@ -316,7 +327,7 @@ Türkçe trend analizi:
                 'trends': response,
                 'model_used': model,
                 'processing_time': time.time() - start_time,
-                'texts_analyzed': len(texts[:10]),
+                'texts_analyzed': min(len(texts), len(dates), limit),
                 'analysis_type': 'Trend Analizi'
             }
             
@@ -397,6 +408,11 @@ Türkçe trend analizi:
         """Mevcut modelleri döndür"""
         return self.available_models
     
+    def refresh_available_models(self) -> List[str]:
+        """Model listesini Ollama'dan yeniden al"""
+        self.available_models = self._get_available_models()
+        return self.available_models
+    
     def get_default_prompt(self, action: str) -> str:
         """Varsayılan prompt'u al"""
         return self.DEFAULT_PROMPTS.get(action, "")
@@ -5,24 +5,38 @@ Bu modül kullanıcı doğrulama ve yetkilendirme işlemlerini yönetir.
 Desteklenen roller: admin, analyst, viewer
 """
 
+import atexit
+import os
 import sqlite3
 import bcrypt
 import argparse
 import json
+import logging
+import threading
+from collections import deque
 from typing import Optional, Dict, Any
 from enum import Enum
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 import jwt
 from pydantic import BaseModel, Field
 from fastapi import FastAPI, HTTPException, Depends, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 import uvicorn
+from sqlite_config import SQLITE_SYNCHRONOUS
 
 # JWT Secret Key (production'da environment variable'dan alınmalı)
 JWT_SECRET = "your-secret-key-change-in-production"
 JWT_ALGORITHM = "HS256"
 JWT_EXPIRE_MINUTES = 30
 
+# bcrypt maliyet faktörü (testlerde ortam değişkeniyle düşürülür)
+BCRYPT_ROUNDS = int(os.getenv('AUTH_BCRYPT_ROUNDS', '12'))
+
+# last_login güncellemelerinin toplu yazılma aralığı
+LAST_LOGIN_FLUSH_INTERVAL = 1.0  # saniye
+
+logger = logging.getLogger(__name__)
+
 # Security scheme for FastAPI
 security = HTTPBearer()
 
@@ -63,11 +77,30 @@ class AuthSystem:
     
     def __init__(self, db_path: str = "users.db"):
         self.db_path = db_path
+        # Bekleyen (zaman, kullanıcı id) çiftleri; zamanlayıcı tetiklenince toplu yazılır
+        self._pending_logins = deque()
+        self._pending_lock = threading.Lock()
+        self._flush_timer = None
         self.init_database()
     
+    def _connect(self, must_exist: bool = False) -> sqlite3.Connection:
+        """Veritabanına bağlan ("file:" ile başlayan yollar URI olarak açılır)"""
+        if self.db_path.startswith('file:'):
+            conn = sqlite3.connect(self.db_path, uri=True)
+        elif must_exist:
+            # mode=rw: veritabanı silinmişse boş bir dosya yeniden oluşturulmaz
+            conn = sqlite3.connect(f"file:{self.db_path}?mode=rw", uri=True)
+        else:
+            conn = sqlite3.connect(self.db_path)
+        conn.execute(f"PRAGMA synchronous={SQLITE_SYNCHRONOUS}")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        return conn
+    
     def init_database(self):
         """Veritabanını başlat ve tabloları oluştur"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connect() as conn:
+            # WAL kalıcıdır; dosyaya bir kez yazılması yeterli (bellekteki veritabanında etkisizdir)
+            conn.execute("PRAGMA journal_mode=WAL")
             cursor = conn.cursor()
             cursor.execute("""
                 CREATE TABLE IF NOT EXISTS users (
@@ -83,7 +116,7 @@ class AuthSystem:
     
     def hash_password(self, password: str) -> str:
         """Parolayı bcrypt ile hashle"""
-        salt = bcrypt.gensalt()
+        salt = bcrypt.gensalt(rounds=BCRYPT_ROUNDS)
         return bcrypt.hashpw(password.encode('utf-8'), salt).decode('utf-8')
     
     def verify_password(self, password: str, password_hash: str) -> bool:
@@ -94,7 +127,7 @@ class AuthSystem:
         """Yeni kullanıcı oluştur"""
         try:
             password_hash = self.hash_password(password)
-            with sqlite3.connect(self.db_path) as conn:
+            with self._connect() as conn:
                 cursor = conn.cursor()
                 cursor.execute("""
                     INSERT INTO users (username, password_hash, role)
@@ -115,7 +148,7 @@ class AuthSystem:
     
     def get_user_by_username(self, username: str) -> Optional[User]:
         """Kullanıcı adına göre kullanıcı getir"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connect() as conn:
             cursor = conn.cursor()
             cursor.execute("""
                 SELECT id, username, password_hash, role, created_at, last_login
@@ -144,18 +177,35 @@ class AuthSystem:
         return None
     
     def update_last_login(self, user_id: int):
-        """Kullanıcının son giriş zamanını güncelle"""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute("""
-                UPDATE users SET last_login = CURRENT_TIMESTAMP
-                WHERE id = ?
-            """, (user_id,))
-            conn.commit()
+        """Kullanıcının son giriş zamanını toplu yazılmak üzere kuyruğa ekle"""
+        # CURRENT_TIMESTAMP ile aynı biçim (UTC)
+        login_time = datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+        with self._pending_lock:
+            self._pending_logins.append((login_time, user_id))
+            if self._flush_timer is None:
+                self._flush_timer = threading.Timer(LAST_LOGIN_FLUSH_INTERVAL, self.flush_last_logins)
+                self._flush_timer.daemon = True
+                self._flush_timer.start()
+    
+    def flush_last_logins(self):
+        """Bekleyen son giriş zamanlarını tek executemany ile yaz"""
+        with self._pending_lock:
+            batch = list(self._pending_logins)
+            self._pending_logins.clear()
+            self._flush_timer = None
+        if not batch:
+            return
+        
+        try:
+            with self._connect(must_exist=True) as conn:
+                conn.executemany("UPDATE users SET last_login = ? WHERE id = ?", batch)
+                conn.commit()
+        except sqlite3.Error as e:
+            logger.error(f"Son giriş zamanı yazma hatası: {e}")
     
     def list_users(self) -> list[User]:
         """Tüm kullanıcıları listele"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connect() as conn:
             cursor = conn.cursor()
             cursor.execute("""
                 SELECT id, username, password_hash, role, created_at, last_login
@@ -177,7 +227,7 @@ class AuthSystem:
     
     def delete_user(self, username: str) -> bool:
         """Kullanıcı sil"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connect() as conn:
             cursor = conn.cursor()
             cursor.execute("DELETE FROM users WHERE username = ?", (username,))
             conn.commit()
@@ -192,7 +242,7 @@ class JWTManager:
         payload = {
             "sub": user.username,
             "role": user.role.value,
-            "exp": datetime.utcnow() + timedelta(minutes=JWT_EXPIRE_MINUTES)
+            "exp": datetime.now(timezone.utc) + timedelta(minutes=JWT_EXPIRE_MINUTES)
         }
         return jwt.encode(payload, JWT_SECRET, algorithm=JWT_ALGORITHM)
     
@@ -209,6 +259,9 @@ class JWTManager:
 
 # Global auth system instance
 auth_system = AuthSystem()
+# Süreç zamanlayıcıdan önce biterse (ör. CLI'da giriş ve hemen çıkış) bekleyen yazımlar kaybolmasın;
+# örnek başına kaydedilseydi her AuthSystem çıkışa kadar bellekte kalırdı
+atexit.register(auth_system.flush_last_logins)
 
 # FastAPI app
 app = FastAPI(title="Auth System API", version="1.0.0")
@@ -0,0 +1,17 @@
+"""
+Pytest ortak ayarları
+
+Test modülleri import edilmeden önce yüklenir.
+"""
+
+import os
+
+# bcrypt'in izin verdiği en düşük maliyet; parola testleri üretim maliyetini beklemez
+os.environ.setdefault('AUTH_BCRYPT_ROUNDS', '4')
+
+
+def pytest_configure(config):
+    """Özel işaretleri kaydet"""
+    config.addinivalue_line("markers", "slow: gerçek model/ağ gerektiren veya birim testleri tekrarlayan yavaş testler")
+    config.addinivalue_line("markers", "vcr: HTTP yanıtlarını kasetten oynat (pytest-recording)")
+    config.addinivalue_line("markers", "xdist_group(name): aynı gruptaki testleri tek xdist işçisinde çalıştır")
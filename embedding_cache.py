@@ -10,42 +10,81 @@ import sqlite3
 import numpy as np
 import json
 import hashlib
+import struct
 import time
-from typing import Optional, List, Dict, Any
-from datetime import datetime, timedelta
+from typing import Optional, List, Dict, Any, Callable
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
 import logging
 from sentence_transformers import SentenceTransformer
 import argparse
+from sqlite_config import SQLITE_SYNCHRONOUS
+
+try:
+    import xxhash
+    XXHASH_AVAILABLE = True
+except ImportError:
+    XXHASH_AVAILABLE = False
 
 # Logging konfigürasyonu
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Nicemlenmiş embedding başlığı: vektör başına float32 ölçek (ardından int8 değerler gelir)
+EMBEDDING_SCALE_FORMAT = struct.Struct('<f')
+
+# Toplu cache sorgusundaki IN (...) listesinin en fazla eleman sayısı (SQLite bind sınırının altında)
+BATCH_QUERY_SIZE = 500
+
 class EmbeddingCache:
     """
     Metin embedding'leri için önbellekleme sistemi.
     SQLite veritabanı kullanarak embedding'leri saklar.
     """
     
-    def __init__(self, db_path: str = "embedding_cache.db", model_name: str = "all-MiniLM-L6-v2"):
+    def __init__(self, db_path: str = "embedding_cache.db", model_name: str = "all-MiniLM-L6-v2",
+                 model: Optional[SentenceTransformer] = None, hash_algorithm: str = "xxh3_128",
+                 time_fn: Optional[Callable[[], float]] = None):
         """
         EmbeddingCache başlatıcı
         
         Args:
             db_path: SQLite veritabanı dosya yolu
             model_name: Sentence transformer model adı
+            model: Önceden yüklenmiş model (verilirse yeniden yüklenmez)
+            hash_algorithm: Cache anahtarı için "xxh3_128" (varsayılan) veya eski kayıtlarla uyumlu "sha256".
+                Veritabanında kayıtlı algoritma varsa o kullanılır; clear_cache() sonrası bu tercihe geçilir.
+            time_fn: Zaman damgaları için saat fonksiyonu (varsayılan time.time)
         """
+        if hash_algorithm not in ("xxh3_128", "sha256"):
+            raise ValueError(f"Desteklenmeyen hash algoritması: {hash_algorithm}")
+        if hash_algorithm == "xxh3_128" and not XXHASH_AVAILABLE:
+            # Aynı ad altında başka bir algoritma kullanılırsa paylaşılan cache sessizce hep ıskalar
+            logger.warning("xxhash kurulu değil; cache anahtarları için sha256 kullanılacak (pip install xxhash)")
+            hash_algorithm = "sha256"
         self.db_path = db_path
         self.model_name = model_name
-        self.model = None
+        self.model = model
+        self.hash_algorithm = hash_algorithm
+        self._preferred_hash_algorithm = hash_algorithm
+        self._now = time_fn or time.time
         self._init_database()
-        self._load_model()
+        if self.model is None:
+            self._load_model()
+    
+    def _connect(self) -> sqlite3.Connection:
+        """Bağlantı başına PRAGMA ayarlarıyla veritabanına bağlan"""
+        conn = sqlite3.connect(self.db_path)
+        conn.execute(f"PRAGMA synchronous={SQLITE_SYNCHRONOUS}")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        return conn
     
     def _init_database(self):
         """Veritabanını başlat ve tabloları oluştur"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._connect() as conn:
+                # WAL kalıcıdır; dosyaya bir kez yazılması yeterli
+                conn.execute("PRAGMA journal_mode=WAL")
                 cursor = conn.cursor()
                 
                 # Embedding cache tablosu
@@ -54,7 +93,7 @@ class EmbeddingCache:
                         id INTEGER PRIMARY KEY AUTOINCREMENT,
                         text_hash TEXT UNIQUE NOT NULL,
                         text_content TEXT NOT NULL,
-                        embedding_vector TEXT NOT NULL,
+                        embedding_vector BLOB NOT NULL,
                         model_name TEXT NOT NULL,
                         created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                         last_accessed TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
@@ -62,6 +101,11 @@ class EmbeddingCache:
                     )
                 """)
                 
+                # Eski kayıt temizliği ve en eskileri listeleme created_at üzerinden çalışır
+                cursor.execute("""
+                    CREATE INDEX IF NOT EXISTS idx_embeddings_created_at ON embeddings(created_at)
+                """)
+                
                 # Cache istatistikleri tablosu
                 cursor.execute("""
                     CREATE TABLE IF NOT EXISTS cache_stats (
@@ -80,6 +124,15 @@ class EmbeddingCache:
                     VALUES (1, 0, 0, 0, 0)
                 """)
                 
+                # Anahtarların hangi hash algoritmasıyla üretildiğini saklar
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS cache_meta (
+                        key TEXT PRIMARY KEY,
+                        value TEXT NOT NULL
+                    )
+                """)
+                self.hash_algorithm = self._resolve_hash_algorithm(cursor)
+                
                 conn.commit()
                 logger.info(f"Veritabanı başlatıldı: {self.db_path}")
                 
@@ -87,6 +140,33 @@ class EmbeddingCache:
             logger.error(f"Veritabanı başlatma hatası: {e}")
             raise
     
+    def _resolve_hash_algorithm(self, cursor: sqlite3.Cursor) -> str:
+        """Mevcut kayıtlarla uyumlu hash algoritmasını belirle ve cache_meta'ya yaz"""
+        row = cursor.execute("SELECT value FROM cache_meta WHERE key = 'hash_algorithm'").fetchone()
+        if row:
+            stored = row[0]
+        elif cursor.execute("SELECT 1 FROM embeddings LIMIT 1").fetchone():
+            # cache_meta'dan önce oluşturulan kayıtların anahtarları sha256'dır
+            stored = "sha256"
+        else:
+            stored = None
+        
+        algorithm = self.hash_algorithm
+        if stored is not None and stored != algorithm:
+            if stored == "xxh3_128" and not XXHASH_AVAILABLE:
+                # Eski anahtarlar hesaplanamaz; bırakılırsa aynı metin ikinci kez kaydedilir
+                logger.warning("Cache xxh3_128 anahtarlı ama xxhash kurulu değil; kayıtlar temizleniyor")
+                cursor.execute("DELETE FROM embeddings")
+            else:
+                logger.info(f"Mevcut cache kayıtlarıyla uyum için {stored} hash algoritması kullanılıyor")
+                algorithm = stored
+        
+        cursor.execute(
+            "INSERT OR REPLACE INTO cache_meta (key, value) VALUES ('hash_algorithm', ?)",
+            (algorithm,)
+        )
+        return algorithm
+    
     def _load_model(self):
         """Sentence transformer modelini yükle"""
         try:
@@ -98,16 +178,28 @@ class EmbeddingCache:
             raise
     
     def _hash_text(self, text: str) -> str:
-        """Metni hash'le"""
-        return hashlib.sha256(text.encode('utf-8')).hexdigest()
+        """Metni hash'le (kriptografik olmayan cache anahtarı)"""
+        data = text.encode('utf-8')
+        if self.hash_algorithm == "sha256":
+            return hashlib.sha256(data).hexdigest()
+        return xxhash.xxh3_128_hexdigest(data)
     
-    def _serialize_embedding(self, embedding: np.ndarray) -> str:
-        """NumPy array'i JSON string'e çevir"""
-        return json.dumps(embedding.tolist())
+    def _serialize_embedding(self, embedding: np.ndarray) -> bytes:
+        """NumPy array'i int8'e nicemle: float32 ölçek + int8 değerler (BLOB olarak saklanır)"""
+        embedding = np.asarray(embedding, dtype=np.float32)
+        max_abs = float(np.max(np.abs(embedding))) if embedding.size else 0.0
+        scale = max_abs / 127 if max_abs > 0 else 1.0
+        quantized = np.round(embedding / scale).astype(np.int8)
+        return EMBEDDING_SCALE_FORMAT.pack(scale) + quantized.tobytes()
     
-    def _deserialize_embedding(self, embedding_str: str) -> np.ndarray:
-        """JSON string'i NumPy array'e çevir"""
-        return np.array(json.loads(embedding_str))
+    def _deserialize_embedding(self, embedding_data) -> np.ndarray:
+        """Saklanan baytları NumPy array'e çevir"""
+        if isinstance(embedding_data, str):
+            # Eski sürümlerin JSON olarak yazdığı kayıtlar
+            return np.array(json.loads(embedding_data))
+        (scale,) = EMBEDDING_SCALE_FORMAT.unpack_from(embedding_data)
+        quantized = np.frombuffer(embedding_data, dtype=np.int8, offset=EMBEDDING_SCALE_FORMAT.size)
+        return quantized.astype(np.float32) * np.float32(scale)
     
     def get_embedding(self, text: str) -> np.ndarray:
         """
@@ -140,10 +232,91 @@ class EmbeddingCache:
         
         return embedding
     
+    def get_embeddings_batch(self, texts: List[str], batch_size: int = 32) -> List[np.ndarray]:
+        """
+        Birden çok metin için embedding al. Cache'de olmayanlar tek encode çağrısıyla oluşturulur.
+        
+        Args:
+            texts: Embed edilecek metinler
+            batch_size: Model için batch boyutu
+            
+        Returns:
+            Metinlerle aynı sırada embedding listesi
+        """
+        if any(not text or not text.strip() for text in texts):
+            raise ValueError("Boş metin embed edilemez")
+        
+        texts = [text.strip() for text in texts]
+        hashes = [self._hash_text(text) for text in texts]
+        embeddings = {}
+        
+        # Cache'de olanları tek sorguyla al
+        unique_hashes = list(dict.fromkeys(hashes))
+        try:
+            with self._connect() as conn:
+                cursor = conn.cursor()
+                for start in range(0, len(unique_hashes), BATCH_QUERY_SIZE):
+                    chunk = unique_hashes[start:start + BATCH_QUERY_SIZE]
+                    placeholders = ", ".join("?" * len(chunk))
+                    cursor.execute(f"""
+                        SELECT text_hash, embedding_vector FROM embeddings
+                        WHERE text_hash IN ({placeholders})
+                    """, chunk)
+                    for text_hash, embedding_data in cursor.fetchall():
+                        embeddings[text_hash] = self._deserialize_embedding(embedding_data)
+                
+                if embeddings:
+                    now = self._timestamp()
+                    cursor.executemany("""
+                        UPDATE embeddings
+                        SET last_accessed = ?, access_count = access_count + 1
+                        WHERE text_hash = ?
+                    """, [(now, text_hash) for text_hash in embeddings])
+                conn.commit()
+        except Exception as e:
+            logger.error(f"Cache okuma hatası: {e}")
+        
+        # Eksikleri tek encode çağrısıyla oluştur ve tek executemany ile kaydet
+        missing = {}
+        for text_hash, text in zip(hashes, texts):
+            if text_hash not in embeddings:
+                missing.setdefault(text_hash, text)
+        if missing:
+            new_embeddings = self.model.encode(list(missing.values()), batch_size=batch_size,
+                                               convert_to_numpy=True)
+            rows = []
+            now = self._timestamp()
+            for (text_hash, text), embedding in zip(missing.items(), new_embeddings):
+                embeddings[text_hash] = embedding
+                rows.append((text_hash, text, self._serialize_embedding(embedding), self.model_name,
+                             now, now))
+            try:
+                with self._connect() as conn:
+                    conn.executemany("""
+                        INSERT OR IGNORE INTO embeddings
+                            (text_hash, text_content, embedding_vector, model_name, created_at, last_accessed)
+                        VALUES (?, ?, ?, ?, ?, ?)
+                    """, rows)
+                    conn.commit()
+            except Exception as e:
+                logger.error(f"Cache kaydetme hatası: {e}")
+        
+        hits = len(texts) - len(missing)
+        self._update_cache_stats_batch(hits=hits, misses=len(missing))
+        
+        return [embeddings[text_hash] for text_hash in hashes]
+    
+    def _timestamp(self, offset: timedelta = timedelta(0)) -> str:
+        """Enjekte edilen saatten created_at/last_accessed için UTC zaman damgası üret"""
+        # CURRENT_TIMESTAMP ile aynı UTC 'YYYY-MM-DD HH:MM:SS' düzeni (eski satırlarla metin olarak karşılaştırılır);
+        # saniye kesri aynı saniyedeki kayıtları sıralı tutar ve tam saniye değerinin ardından sıralanır
+        moment = datetime.fromtimestamp(self._now(), tz=timezone.utc) - offset
+        return moment.strftime('%Y-%m-%d %H:%M:%S.%f')
+    
     def _get_from_cache(self, text_hash: str) -> Optional[np.ndarray]:
         """Cache'den embedding al"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._connect() as conn:
                 cursor = conn.cursor()
                 cursor.execute("""
                     SELECT embedding_vector, last_accessed, access_count 
@@ -153,17 +326,17 @@ class EmbeddingCache:
                 
                 result = cursor.fetchone()
                 if result:
-                    embedding_str, last_accessed, access_count = result
+                    embedding_data, last_accessed, access_count = result
                     
                     # Erişim sayısını ve zamanını güncelle
                     cursor.execute("""
                         UPDATE embeddings 
-                        SET last_accessed = CURRENT_TIMESTAMP, access_count = access_count + 1
+                        SET last_accessed = ?, access_count = access_count + 1
                         WHERE text_hash = ?
-                    """, (text_hash,))
+                    """, (self._timestamp(), text_hash))
                     
                     conn.commit()
-                    return self._deserialize_embedding(embedding_str)
+                    return self._deserialize_embedding(embedding_data)
                 
                 return None
                 
@@ -183,14 +356,16 @@ class EmbeddingCache:
     def _save_to_cache(self, text_hash: str, text: str, embedding: np.ndarray):
         """Embedding'i cache'e kaydet"""
         try:
-            embedding_str = self._serialize_embedding(embedding)
+            embedding_data = self._serialize_embedding(embedding)
+            now = self._timestamp()
             
-            with sqlite3.connect(self.db_path) as conn:
+            with self._connect() as conn:
                 cursor = conn.cursor()
                 cursor.execute("""
-                    INSERT INTO embeddings (text_hash, text_content, embedding_vector, model_name)
-                    VALUES (?, ?, ?, ?)
-                """, (text_hash, text, embedding_str, self.model_name))
+                    INSERT INTO embeddings
+                        (text_hash, text_content, embedding_vector, model_name, created_at, last_accessed)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                """, (text_hash, text, embedding_data, self.model_name, now, now))
                 
                 conn.commit()
                 logger.debug(f"Embedding cache'e kaydedildi: {text[:50]}...")
@@ -204,7 +379,7 @@ class EmbeddingCache:
     def _update_cache_stats(self, hit: bool):
         """Cache istatistiklerini güncelle"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._connect() as conn:
                 cursor = conn.cursor()
                 
                 if hit:
@@ -229,10 +404,27 @@ class EmbeddingCache:
         except Exception as e:
             logger.error(f"İstatistik güncelleme hatası: {e}")
     
+    def _update_cache_stats_batch(self, hits: int, misses: int):
+        """Toplu istek için cache istatistiklerini tek UPDATE ile güncelle"""
+        try:
+            with self._connect() as conn:
+                conn.execute("""
+                    UPDATE cache_stats 
+                    SET cache_hits = cache_hits + ?, 
+                        cache_misses = cache_misses + ?,
+                        total_requests = total_requests + ?,
+                        last_updated = CURRENT_TIMESTAMP
+                    WHERE id = 1
+                """, (hits, misses, hits + misses))
+                conn.commit()
+                
+        except Exception as e:
+            logger.error(f"İstatistik güncelleme hatası: {e}")
+    
     def get_cache_size(self) -> int:
         """Cache'deki toplam kayıt sayısını döndür"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._connect() as conn:
                 cursor = conn.cursor()
                 cursor.execute("SELECT COUNT(*) FROM embeddings")
                 return cursor.fetchone()[0]
@@ -243,7 +435,7 @@ class EmbeddingCache:
     def get_cache_stats(self) -> Dict[str, Any]:
         """Cache istatistiklerini döndür"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._connect() as conn:
                 cursor = conn.cursor()
                 cursor.execute("""
                     SELECT total_embeddings, cache_hits, cache_misses, total_requests, last_updated
@@ -274,7 +466,7 @@ class EmbeddingCache:
     def clear_cache(self):
         """Tüm cache'i temizle"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._connect() as conn:
                 cursor = conn.cursor()
                 cursor.execute("DELETE FROM embeddings")
                 cursor.execute("""
@@ -282,7 +474,13 @@ class EmbeddingCache:
                     SET total_embeddings = 0, cache_hits = 0, cache_misses = 0, total_requests = 0
                     WHERE id = 1
                 """)
+                # Boş cache'te tercih edilen algoritmaya geçmek güvenli
+                cursor.execute(
+                    "INSERT OR REPLACE INTO cache_meta (key, value) VALUES ('hash_algorithm', ?)",
+                    (self._preferred_hash_algorithm,)
+                )
                 conn.commit()
+                self.hash_algorithm = self._preferred_hash_algorithm
                 logger.info("Cache temizlendi")
                 
         except Exception as e:
@@ -291,7 +489,7 @@ class EmbeddingCache:
     def get_oldest_embeddings(self, limit: int = 10) -> List[Dict[str, Any]]:
         """En eski embedding'leri listele"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._connect() as conn:
                 cursor = conn.cursor()
                 cursor.execute("""
                     SELECT text_content, created_at, last_accessed, access_count
@@ -319,14 +517,14 @@ class EmbeddingCache:
     def cleanup_old_embeddings(self, days: int = 30):
         """Belirtilen günden eski embedding'leri sil"""
         try:
-            cutoff_date = datetime.now() - timedelta(days=days)
+            cutoff_date = self._timestamp(timedelta(days=days))
             
-            with sqlite3.connect(self.db_path) as conn:
+            with self._connect() as conn:
                 cursor = conn.cursor()
                 cursor.execute("""
                     DELETE FROM embeddings 
                     WHERE created_at < ?
-                """, (cutoff_date.isoformat(),))
+                """, (cutoff_date,))
                 
                 deleted_count = cursor.rowcount
                 conn.commit()
@@ -22,13 +22,32 @@ from typing import Dict, List, Any, Optional, Tuple
 from datetime import datetime
 import json
 
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
 # Logging konfigürasyonu
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Kelime sayımında Türkçe karakterler korunur, diğer özel karakterler boşluğa çevrilir
+TEXT_CLEAN_PATTERN = re.compile(r'[^\w\sçğıöşüÇĞIİÖŞÜ]')
+
 class DataExplorer:
     """MySQL tablolarını analiz eden veri keşif sınıfı"""
     
+    # Tablo istatistiklerinden yaklaşık satır sayısı sorguları (dialect başına)
+    ROW_ESTIMATE_QUERIES = {
+        'mysql': """
+            SELECT TABLE_ROWS FROM information_schema.TABLES
+            WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = :table_name
+        """,
+        'postgresql': "SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(:table_name)",
+        'sqlite': "SELECT stat FROM sqlite_stat1 WHERE tbl = :table_name LIMIT 1",
+    }
+    
     def __init__(self, engine=None, host: str = None, user: str = None, password: str = None, database: str = None, port: int = 3306):
         """
         DataExplorer sınıfını başlat
@@ -119,16 +138,20 @@ class DataExplorer:
             Detaylı analiz sonuçları
         """
         try:
-            # Tablo şemasını al
+            # Tablo şemasını al; yansıtma tablo yoksa NoSuchTableError ile adı doğrular
             schema = self.get_table_schema(table_name)
             
-            # Veriyi yükle (performans için örnek)
-            query = f"SELECT * FROM {table_name} LIMIT {sample_size}"
+            # Veriyi yükle (performans için örnek); ad dialect'e göre tırnaklanır
+            query = sa.select(sa.literal_column('*')).select_from(sa.table(table_name)).limit(sample_size)
             df = pd.read_sql(query, self.engine)
             
+            # Büyük tablolarda COUNT(*) tam tarama yapar; önce istatistiklere bak
+            estimated_rows = self._estimate_table_row_count(table_name)
+            
             analysis = {
                 'table_name': table_name,
-                'total_rows': self._get_table_row_count(table_name),
+                'total_rows': estimated_rows if estimated_rows is not None else self._get_table_row_count(table_name),
+                'total_rows_estimated': estimated_rows is not None,
                 'sample_size': len(df),
                 'columns_analysis': {},
                 'text_columns': [],
@@ -151,10 +174,42 @@ class DataExplorer:
             logger.error(f"Tablo analizi başarısız: {e}")
             raise
     
+    def _estimate_table_row_count(self, table_name: str) -> Optional[int]:
+        """
+        Tabloyu taramadan, veritabanı istatistiklerinden yaklaşık satır sayısını al
+        
+        Args:
+            table_name: Tablo adı
+            
+        Returns:
+            Yaklaşık satır sayısı; istatistik yoksa veya güvenilir değilse None
+        """
+        dialect = getattr(self.engine, 'dialect', None)
+        query = self.ROW_ESTIMATE_QUERIES.get(getattr(dialect, 'name', None))
+        if query is None:
+            return None
+        
+        try:
+            with self.engine.connect() as conn:
+                value = conn.execute(sa.text(query), {'table_name': table_name}).scalar()
+        except Exception as e:
+            # sqlite_stat1 ANALYZE çalıştırılmadan oluşmaz
+            logger.debug(f"Satır sayısı istatistiği okunamadı: {e}")
+            return None
+        
+        if value is None:
+            return None
+        if isinstance(value, str):
+            # sqlite_stat1.stat: "satır_sayısı [indeks istatistikleri...]"
+            value = value.split()[0]
+        count = int(value)
+        # 0/-1: istatistik henüz toplanmamış olabilir, kesin sayıma bırak
+        return count if count > 0 else None
+    
     def _get_table_row_count(self, table_name: str) -> int:
         """Tablo satır sayısını al"""
         try:
-            query = f"SELECT COUNT(*) as count FROM {table_name}"
+            query = sa.select(sa.func.count().label('count')).select_from(sa.table(table_name))
             result = pd.read_sql(query, self.engine)
             return result['count'].iloc[0]
         except Exception as e:
@@ -210,6 +265,9 @@ class DataExplorer:
     
     def _is_text_column(self, column_data: pd.Series) -> bool:
         """Kolonun metin tipinde olup olmadığını kontrol et"""
+        # string dtype (ör. string[pyarrow]) her zaman metindir
+        if isinstance(column_data.dtype, pd.StringDtype):
+            return bool(column_data.notna().any())
         # Object tipi ve string içerik kontrolü
         if column_data.dtype == 'object':
             # Null olmayan değerlerin %60'ı string ise metin kolonu
@@ -252,22 +310,25 @@ class DataExplorer:
         if len(non_null) == 0:
             return {}
         
-        # Sadece string değerleri al
-        text_values = [str(x) for x in non_null if isinstance(x, str)]
+        # Sadece string değerleri al (string dtype'ta hepsi zaten string)
+        if isinstance(non_null.dtype, pd.StringDtype):
+            text_values = non_null
+        else:
+            text_values = non_null[[isinstance(x, str) for x in non_null]].astype(object)
         
-        if not text_values:
+        if text_values.empty:
             return {}
         
-        # Uzunluk analizi
-        lengths = [len(text) for text in text_values]
+        # Uzunluk analizi (string[pyarrow] kolonlarda Arrow çekirdeğiyle)
+        lengths = text_values.str.len()
+        shortest_text = text_values.iloc[int(lengths.argmin())]
+        longest_text = text_values.iloc[int(lengths.argmax())]
         
         # Kelime analizi
         all_words = []
         for text in text_values:
             # Türkçe karakterleri koru, özel karakterleri temizle
-            cleaned_text = re.sub(r'[^\w\sçğıöşüÇĞIİÖŞÜ]', ' ', text.lower())
-            words = cleaned_text.split()
-            all_words.extend(words)
+            all_words.extend(TEXT_CLEAN_PATTERN.sub(' ', text.lower()).split())
         
         # En sık geçen kelimeler
         word_counts = Counter(all_words)
@@ -275,14 +336,14 @@ class DataExplorer:
         
         return {
             'total_texts': len(text_values),
-            'min_length': min(lengths),
-            'max_length': max(lengths),
-            'avg_length': np.mean(lengths),
-            'median_length': np.median(lengths),
-            'shortest_text': min(text_values, key=len)[:100] + "..." if len(min(text_values, key=len)) > 100 else min(text_values, key=len),
-            'longest_text': max(text_values, key=len)[:100] + "..." if len(max(text_values, key=len)) > 100 else max(text_values, key=len),
+            'min_length': int(lengths.min()),
+            'max_length': int(lengths.max()),
+            'avg_length': float(lengths.mean()),
+            'median_length': float(lengths.median()),
+            'shortest_text': shortest_text[:100] + "..." if len(shortest_text) > 100 else shortest_text,
+            'longest_text': longest_text[:100] + "..." if len(longest_text) > 100 else longest_text,
             'total_words': len(all_words),
-            'unique_words': len(set(all_words)),
+            'unique_words': len(word_counts),
             'avg_words_per_text': len(all_words) / len(text_values),
             'most_common_words': most_common_words
         }
@@ -377,9 +438,14 @@ class DataExplorer:
                 timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
                 output_file = f"analysis_{table_name}_{timestamp}.json"
             
-            # JSON dosyasına kaydet
-            with open(output_file, 'w', encoding='utf-8') as f:
-                json.dump(result, f, ensure_ascii=False, indent=2, default=str)
+            # JSON dosyasına kaydet (orjson varsa doğrudan UTF-8 bayt yazar)
+            if ORJSON_AVAILABLE:
+                with open(output_file, 'wb') as f:
+                    f.write(orjson.dumps(result, default=str, option=orjson.OPT_INDENT_2
+                                         | orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY))
+            else:
+                with open(output_file, 'w', encoding='utf-8') as f:
+                    json.dump(result, f, ensure_ascii=False, indent=2, default=str)
             
             logger.info(f"Analiz sonuçları kaydedildi: {output_file}")
             return output_file
@@ -399,7 +465,10 @@ class DataExplorer:
             print(f"{'='*60}")
             
             print(f"📈 Genel Bilgiler:")
-            print(f"   • Toplam Satır: {analysis['total_rows']:,}")
+            if analysis.get('total_rows_estimated'):
+                print(f"   • Toplam Satır (tahmini): ~{analysis['total_rows']:,}")
+            else:
+                print(f"   • Toplam Satır: {analysis['total_rows']:,}")
             print(f"   • Örnek Boyut: {analysis['sample_size']:,}")
             print(f"   • Toplam Kolon: {len(analysis['columns_analysis'])}")
             print(f"   • Metin Kolonları: {len(text_columns)}")
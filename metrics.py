@@ -14,6 +14,7 @@ Prometheus uyumlu metrikler sağlar.
 """
 
 import time
+from time import monotonic
 import logging
 import threading
 from typing import Optional, Dict, Any
@@ -51,6 +52,9 @@ class MetricsCollector:
         self.ai_active_requests = None
         self.ai_error_counter = None
         
+        # İstatistik güncellemeleri thread'ler arasında kaybolmasın
+        self._lock = threading.Lock()
+        
         # İstatistikler
         self.stats = {
             'total_calls': 0,
@@ -127,26 +131,29 @@ class MetricsCollector:
         """
         try:
             # İstatistikleri güncelle
-            self.stats['total_calls'] += 1
-            self.stats['total_tokens'] += tokens_used
-            self.stats['last_call_time'] = datetime.now().isoformat()
-            
-            # Model bazlı istatistikler
-            if model_name not in self.stats['model_stats']:
-                self.stats['model_stats'][model_name] = {
-                    'calls': 0,
-                    'tokens': 0,
-                    'errors': 0,
-                    'total_latency': 0.0
-                }
-            
-            self.stats['model_stats'][model_name]['calls'] += 1
-            self.stats['model_stats'][model_name]['tokens'] += tokens_used
-            self.stats['model_stats'][model_name]['total_latency'] += latency
-            
-            if error_type:
-                self.stats['total_errors'] += 1
-                self.stats['model_stats'][model_name]['errors'] += 1
+            with self._lock:
+                stats = self.stats
+                stats['total_calls'] += 1
+                stats['total_tokens'] += tokens_used
+                stats['last_call_time'] = datetime.now().isoformat()
+                
+                # Model bazlı istatistikler (iç içe sözlük bir kez çözülür)
+                model_stats = stats['model_stats'].get(model_name)
+                if model_stats is None:
+                    model_stats = stats['model_stats'][model_name] = {
+                        'calls': 0,
+                        'tokens': 0,
+                        'errors': 0,
+                        'total_latency': 0.0
+                    }
+                
+                model_stats['calls'] += 1
+                model_stats['tokens'] += tokens_used
+                model_stats['total_latency'] += latency
+                
+                if error_type:
+                    stats['total_errors'] += 1
+                    model_stats['errors'] += 1
             
             # Prometheus metriklerini güncelle
             if self.metrics_initialized:
@@ -185,7 +192,8 @@ class MetricsCollector:
                 # AI çağrısı burada yapılır
                 result = ai_helper.summarize_texts(texts)
         """
-        start_time = time.time()
+        # Duvar saati ayarlarından etkilenmeyen monoton saat
+        start_time = monotonic()
         error_type = None
         
         try:
@@ -205,7 +213,7 @@ class MetricsCollector:
                 self.ai_active_requests.labels(model=model_name, action=action).dec()
             
             # Metrikleri logla
-            latency = time.time() - start_time
+            latency = monotonic() - start_time
             self.log_ai_call(model_name, action, latency=latency, error_type=error_type)
     
     def start_metrics_server(self, port: int = 9000, host: str = '0.0.0.0'):
@@ -306,13 +314,14 @@ class MetricsCollector:
     
     def reset_metrics(self):
         """Tüm metrikleri sıfırla"""
-        self.stats = {
-            'total_calls': 0,
-            'total_tokens': 0,
-            'total_errors': 0,
-            'model_stats': {},
-            'last_call_time': None
-        }
+        with self._lock:
+            self.stats = {
+                'total_calls': 0,
+                'total_tokens': 0,
+                'total_errors': 0,
+                'model_stats': {},
+                'last_call_time': None
+            }
         logger.info("Metrikler sıfırlandı")
 
 # Global metrics instance
@@ -0,0 +1,23 @@
+"""
+🗄️ SQLite Ayarları
+
+auth.py ve embedding_cache.py'nin SQLite bağlantılarında ortak kullandığı ayarlar.
+"""
+
+import os
+
+# PRAGMA synchronous için geçerli değerler
+SQLITE_SYNCHRONOUS_MODES = ('OFF', 'NORMAL', 'FULL', 'EXTRA')
+
+
+def synchronous_mode() -> str:
+    """SQLITE_SYNCHRONOUS ortam değişkenini doğrula (PRAGMA'ya yalnızca bilinen değerler girer)"""
+    mode = os.getenv('SQLITE_SYNCHRONOUS', 'NORMAL').strip().upper()
+    if mode not in SQLITE_SYNCHRONOUS_MODES:
+        raise ValueError(f"Geçersiz SQLITE_SYNCHRONOUS değeri: {mode!r} "
+                         f"(beklenen: {', '.join(SQLITE_SYNCHRONOUS_MODES)})")
+    return mode
+
+
+# WAL ile NORMAL her commit'te fsync beklemez; elektrik kesintisine karşı en güçlü dayanıklılık için FULL verin
+SQLITE_SYNCHRONOUS = synchronous_mode()
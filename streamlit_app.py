@@ -17,6 +17,8 @@ import streamlit as st
 import pandas as pd
 import sqlalchemy as sa
 from sqlalchemy import create_engine, text
+from sqlalchemy.pool import NullPool
+import atexit
 import os
 import sys
 from pathlib import Path
@@ -24,14 +26,26 @@ from dotenv import load_dotenv
 import time
 import json
 import logging
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta, timezone
 import sqlite3
-import bcrypt
-import jwt
+import importlib
+import importlib.util
 from typing import List, Dict, Any, Optional
 import io
 import tempfile
 import re
+import hashlib
+import secrets
+import threading
+import queue
+import shutil
+import codecs
+import csv
+import html
+import string
+from collections import OrderedDict
+from contextlib import contextmanager
+from sqlite_config import SQLITE_SYNCHRONOUS
 
 # .env dosyasını yükle
 load_dotenv('.env')
@@ -44,22 +58,261 @@ logger = logging.getLogger(__name__)
 JWT_SECRET = "your-secret-key-change-in-production"
 JWT_ALGORITHM = "HS256"
 
+# admin/admin123 için önceden üretilmiş hash (rounds=10); açılışta bcrypt çalıştırılmaz
+_DEFAULT_ADMIN_HASH = "$2b$10$/JbUwYTNlcZ5AFKMG7ktC.dj1G6H1dfP4PLYZN5BNrpP9LKv3kgrS"
+
+# Parola doğrulama önbelleği ayarları
+PASSWORD_CACHE_SIZE = 1024
+PASSWORD_CACHE_TTL = 300  # saniye
+
+# last_login güncellemelerinin toplu yazılma aralığı
+LAST_LOGIN_FLUSH_INTERVAL = 1.0  # saniye
+
+# Bu boyutun üzerindeki yüklemeler diske yazılıp memory-map ile okunur
+UPLOAD_SPOOL_THRESHOLD = 8 << 20  # 8 MiB
+
+# AI analizine her kolondan gönderilen en fazla metin sayısı
+AI_TEXTS_PER_COLUMN = 50
+# Trend analizinde metinlere verilen simüle tarihlerin başlangıcı
+TREND_START_DATE = date(2024, 1, 1)
+# Oturum başına saklanan en fazla AI analizi sonucu
+AI_RESULT_CACHE_SIZE = 16
+
+# Yüklemeden sonra session state'te tutulan önizleme satır sayısı
+UPLOAD_PREVIEW_ROWS = 20
+
+# Bu boyutun üzerindeki CSV'ler parça parça okunup veritabanına yazılır
+CSV_STREAM_THRESHOLD = 50 << 20  # 50 MiB
+CSV_STREAM_CHUNKSIZE = 100_000  # satır
+CSV_STREAM_QUEUE_SIZE = 4  # bellekte bekleyebilecek en fazla parça
+
+# xlsx sıkıştırılmış olduğundan bellekteki karşılığı dosya boyutunun katlarıdır
+EXCEL_STREAM_THRESHOLD = 20 << 20  # 20 MiB
+EXCEL_STREAM_CHUNKSIZE = 50_000  # satır
+
+# Tek multi-row INSERT'teki satır ve bind parametresi sınırları
+TO_SQL_MAX_ROWS = 10_000
+SQL_MAX_BIND_PARAMS = 30_000 if sqlite3.sqlite_version_info >= (3, 32, 0) else 999
+ARROW_CSV_BLOCK_SIZE = 8 << 20  # pyarrow CSV okuyucusunun blok boyutu
+
+# MySQL'de CSV'yi LOAD DATA LOCAL INFILE ile yükle (sunucuda local_infile açık olmalı)
+MYSQL_LOCAL_INFILE = os.getenv('MYSQL_LOCAL_INFILE', 'false').lower() in ('1', 'true', 'yes')
+# Sunucu/istemci LOCAL INFILE'ı reddettiğinde dönen hata kodları; bu durumda dosya parça parça yüklenir
+MYSQL_LOCAL_INFILE_REFUSED = {1148, 2068, 3948}
+BULK_LOAD_SAMPLE_ROWS = 10_000  # tablo şemasının çıkarıldığı satır sayısı
+# Python encoding -> MySQL karakter seti (MySQL'in latin1'i aslında cp1252'dir)
+MYSQL_CHARSETS = {
+    'utf-8': 'utf8mb4',
+    'utf-8-sig': 'utf8mb4',
+    'latin-1': 'latin1',
+    'iso-8859-1': 'latin1',
+    'cp1252': 'latin1',
+}
+
+# Ayırıcı tespiti için okunan örnek boyutu ve aday ayırıcılar
+CSV_SNIFF_SAMPLE_SIZE = 65536
+CSV_SEPARATORS = [',', ';', '\t', '|']
+
+# Dosya başındaki BOM encoding'i kesin olarak belirler (UTF-32 BOM'u UTF-16'nınkini içerir, önce kontrol edilir)
+_BOM_ENCODINGS = [
+    (codecs.BOM_UTF32_LE, 'utf-32'),
+    (codecs.BOM_UTF32_BE, 'utf-32'),
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF16_LE, 'utf-16'),
+    (codecs.BOM_UTF16_BE, 'utf-16'),
+]
+
+# Veritabanı/tablo listelerinin önbellekte kalma süresi
+METADATA_CACHE_TTL = 300  # saniye
+# Bağlantı havuzu ayarları (ortam değişkenleriyle değiştirilebilir)
+DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', '10'))
+DB_MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW', '20'))
+DB_POOL_TIMEOUT = 30  # saniye
+DB_POOL_RECYCLE = 1800  # saniye
+
+# Uygulama genelindeki CSS; boşlukları modül yüklenirken bir kez sıkıştırılır
+APP_CSS = re.sub(r"\s+", " ", """
+<style>
+    .main-header {
+        font-size: 2.5rem;
+        font-weight: bold;
+        color: #1f77b4;
+        text-align: center;
+        margin-bottom: 0.5rem !important;
+    }
+    
+    .metric-card {
+        background-color: #f0f2f6;
+        padding: 1rem;
+        border-radius: 0.5rem;
+        border-left: 4px solid #1f77b4;
+    }
+    
+    .success-box {
+        background-color: #d4edda;
+        border: 1px solid #c3e6cb;
+        border-radius: 0.5rem;
+        padding: 1rem;
+        margin: 1rem 0;
+    }
+    
+    .error-box {
+        background-color: #f8d7da;
+        border: 1px solid #f5c6cb;
+        border-radius: 0.5rem;
+        padding: 1rem;
+        margin: 1rem 0;
+    }
+</style>
+""").strip()
+
+# Kolon kartlarının renkleri ve HTML şablonları (modül yüklenirken bir kez hazırlanır)
+COLUMN_CARD_COLORS = ['#FF6B6B', '#4ECDC4', '#45B7D1', '#96CEB4', '#FFEAA7']
+
+def _single_line_html(markup: str) -> str:
+    """Girintili/boş satırlar Markdown'da kod bloğu sayılmasın diye HTML'i tek satıra indir"""
+    return "".join(line.strip() for line in markup.splitlines())
+
+GROUP_HEADER_TEMPLATE = string.Template(_single_line_html("""
+    <div style="
+        background: linear-gradient(135deg, ${color}20, ${next_color}20);
+        border-left: 4px solid $color;
+        padding: 10px;
+        border-radius: 5px;
+        margin: 10px 0;
+    ">
+        <h4 style="color: $color; margin: 0;">$title</h4>
+    </div>
+    <div style="display: flex; gap: 8px;">
+"""))
+
+COLUMN_TEXT_INFO_TEMPLATE = string.Template(_single_line_html("""
+    <div style="
+        background: ${color}15;
+        padding: 8px;
+        border-radius: 5px;
+        margin-top: 5px;
+        font-size: 9px;
+    ">
+        <p style="margin: 2px 0;">📏 En kısa: $shortest...</p>
+        <p style="margin: 2px 0;">📏 En uzun: $longest...</p>
+    </div>
+"""))
+
+COLUMN_CARD_TEMPLATE = string.Template(_single_line_html("""
+    <div style="
+        flex: 1 1 0;
+        min-width: 0;
+        background: linear-gradient(135deg, ${color}20, ${color}10);
+        padding: 15px;
+        border-radius: 10px;
+        margin: 5px 0;
+        border: 2px solid $color;
+        box-shadow: 0 4px 8px rgba(0,0,0,0.1);
+    ">
+        <h6 style="margin: 0; color: $color; font-size: 14px; font-weight: bold;">
+            🔍 $name
+        </h6>
+        <p style="margin: 5px 0; font-size: 11px; color: #666;">
+            📊 $dtype
+        </p>
+        <p style="margin: 3px 0; font-size: 10px;">
+            ❌ Null: $null_percentage%
+        </p>
+        <p style="margin: 3px 0; font-size: 10px;">
+            🔢 Benzersiz: $unique_count
+        </p>
+        $text_html
+    </div>
+"""))
+
+# AI kümeleme sonuç kartları
+CLUSTER_CARD_TEMPLATE = string.Template(_single_line_html("""
+    <div style="
+        background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
+        padding: 12px;
+        border-radius: 8px;
+        margin: 5px 0;
+        color: white;
+        box-shadow: 0 2px 4px rgba(0,0,0,0.1);
+        min-height: 120px;
+    ">
+        <h5 style="margin: 0; color: white; font-size: 14px;">🔍 $name</h5>
+        <p style="margin: 3px 0; font-size: 12px;">📊 $count metin</p>
+        <p style="margin: 3px 0; font-size: 11px; opacity: 0.9;">$indices</p>
+    </div>
+"""))
+
+CLUSTER_TEXT_TEMPLATE = string.Template(_single_line_html("""
+    <div style="
+        background: #f8f9fa;
+        padding: 8px;
+        border-radius: 6px;
+        border-left: 3px solid #667eea;
+        margin: 3px 0;
+        font-size: 11px;
+        max-height: 60px;
+        overflow: hidden;
+    ">
+        <strong>#$number</strong><br>
+        $text
+    </div>
+"""))
+
+# Dialect başına tek sorguluk tablo listesi (görünümler ve sistem tabloları hariç)
+TABLE_LIST_QUERIES = {
+    'mysql': """
+        SELECT TABLE_NAME FROM information_schema.tables
+        WHERE TABLE_SCHEMA = COALESCE(:database_name, DATABASE()) AND TABLE_TYPE = 'BASE TABLE'
+        ORDER BY TABLE_NAME
+    """,
+    'postgresql': """
+        SELECT table_name FROM information_schema.tables
+        WHERE table_schema = COALESCE(:database_name, current_schema()) AND table_type = 'BASE TABLE'
+        ORDER BY table_name
+    """,
+    'sqlite': """
+        SELECT name FROM sqlite_master
+        WHERE type = 'table' AND name NOT LIKE 'sqlite~_%' ESCAPE '~'
+        ORDER BY name
+    """,
+}
+MYSQL_SYSTEM_DATABASES = ['information_schema', 'mysql', 'performance_schema', 'sys']
+
+# Tablo adı temizleme: ASCII adlar için translate tablosu, diğerleri için derlenmiş regex
+_SAFE_NAME_TABLE = {c: '_' for c in range(128) if not (chr(c).isalnum() or chr(c) == '_')}
+_UNSAFE_NAME_RE = re.compile(r'[^a-zA-Z0-9_]')
+# CREATE DATABASE parametre alamaz; ad sorguya girmeden önce bu kalıpla doğrulanır
+_VALID_DATABASE_NAME_RE = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*$')
+
+# Ağır modüller ilk kullanımda yüklenir; burada sadece varlıkları kontrol edilir
+_LAZY_MODULES: Dict[str, Any] = {}
+
+
+def lazy_import(module_name: str):
+    """Modülü ilk kullanımda içe aktar ve önbellekte tut"""
+    module = _LAZY_MODULES.get(module_name)
+    if module is None:
+        module = importlib.import_module(module_name)
+        _LAZY_MODULES[module_name] = module
+    return module
+
+
+def _module_available(module_name: str) -> bool:
+    """Modülü içe aktarmadan bulunabilir olup olmadığını kontrol et"""
+    return importlib.util.find_spec(module_name) is not None
+
+
 # Module availability check
-try:
-    from explorer import DataExplorer
-    from ai_helper import AIHelper
-    from embedding_cache import EmbeddingCache
-    from metrics import get_metrics_summary, MetricsCollector
-    EXPLORER_AVAILABLE = True
-    AI_HELPER_AVAILABLE = True
-    CACHE_AVAILABLE = True
-    METRICS_AVAILABLE = True
-except ImportError as e:
-    st.error(f"Modül import hatası: {e}")
-    EXPLORER_AVAILABLE = False
-    AI_HELPER_AVAILABLE = False
-    CACHE_AVAILABLE = False
-    METRICS_AVAILABLE = False
+EXPLORER_AVAILABLE = _module_available('explorer')
+AI_HELPER_AVAILABLE = _module_available('ai_helper')
+CACHE_AVAILABLE = _module_available('embedding_cache')
+METRICS_AVAILABLE = _module_available('metrics')
+ARROW_AVAILABLE = _module_available('pyarrow')
+CALAMINE_AVAILABLE = _module_available('python_calamine')
+
+# Kısmi yeniden çalıştırma (Streamlit >= 1.33); eski sürümlerde sıradan fonksiyon olarak çalışır
+st_fragment = getattr(st, 'fragment', None) or getattr(st, 'experimental_fragment', None) or (lambda func: func)
 
 # Sayfa konfigürasyonu
 st.set_page_config(
@@ -69,18 +322,136 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+class PasswordCache:
+    """bcrypt doğrulama sonuçları için sınırlı boyutlu, süreli önbellek"""
+    
+    def __init__(self, maxsize: int = PASSWORD_CACHE_SIZE, ttl: float = PASSWORD_CACHE_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        # Anahtarlar süreç başına rastgele bir pepper ile hashlenir
+        self._pepper = secrets.token_bytes(16)
+    
+    def make_key(self, password: str, password_hash: str) -> bytes:
+        """Parola ve hash'ten önbellek anahtarı üret"""
+        # Hash bcrypt salt'ını içerdiği için parola değişince anahtar da değişir
+        return hashlib.blake2b(
+            password.encode('utf-8') + b'|' + password_hash.encode('utf-8'),
+            key=self._pepper,
+            digest_size=16
+        ).digest()
+    
+    def get(self, key: bytes) -> Optional[bool]:
+        """Önbellekteki doğrulama sonucunu döndür (yoksa None)"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            result, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return result
+    
+    def set(self, key: bytes, result: bool):
+        """Doğrulama sonucunu önbelleğe yaz"""
+        with self._lock:
+            self._entries[key] = (result, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+@st.cache_resource(show_spinner=False)
+def get_password_cache() -> PasswordCache:
+    """Rerun'lar arasında paylaşılan parola önbelleğini döndür"""
+    return PasswordCache()
+
+class LastLoginWriter:
+    """last_login güncellemelerini tek bir arka plan thread'inde toplu yazar"""
+    
+    # Kuyruğa konduğunda bekleyenler hemen yazılır ve thread durur
+    _STOP = object()
+    
+    def __init__(self, db_path: str, flush_interval: float = LAST_LOGIN_FLUSH_INTERVAL):
+        self.db_path = db_path
+        self.flush_interval = flush_interval
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        # Daemon thread flush penceresindeyken süreç kapanırsa kuyruktaki girişler kaybolmasın
+        atexit.register(self.close)
+    
+    def enqueue(self, user_id: int):
+        """Kullanıcının son giriş zamanını yazma kuyruğuna ekle"""
+        # CURRENT_TIMESTAMP ile aynı biçim (UTC)
+        login_time = datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+        self._queue.put((login_time, user_id))
+    
+    def close(self, timeout: float = 5.0):
+        """Bekleyen güncellemeleri flush penceresini beklemeden yaz ve thread'i durdur"""
+        self._queue.put(self._STOP)
+        self._thread.join(timeout)
+    
+    def _collect_batch(self) -> tuple:
+        """İlk kayıttan itibaren flush penceresi boyunca gelenleri topla: (batch, durdurulsun mu)"""
+        batch = []
+        item = self._queue.get()
+        deadline = time.monotonic() + self.flush_interval
+        while item is not self._STOP:
+            batch.append(item)
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return batch, False
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                return batch, False
+        return batch, True
+    
+    def _run(self):
+        """Kuyruğu boşaltan yazıcı döngüsü"""
+        # Yazıcının kendi bağlantısı; WAL sayesinde AuthSystem'in okumaları bu yazmaları beklemez
+        conn = sqlite3.connect(self.db_path, isolation_level=None)
+        conn.execute(f"PRAGMA synchronous={SQLITE_SYNCHRONOUS}")
+        stop = False
+        while not stop:
+            batch, stop = self._collect_batch()
+            if not batch:
+                continue
+            try:
+                conn.execute("BEGIN")
+                try:
+                    conn.executemany("UPDATE users SET last_login = ? WHERE id = ?", batch)
+                    conn.execute("COMMIT")
+                except Exception:
+                    conn.execute("ROLLBACK")
+                    raise
+            except Exception as e:
+                logger.error(f"Son giriş zamanı yazma hatası: {e}")
+        conn.close()
+
 class AuthSystem:
     """Basit auth sistemi - Streamlit için"""
     
     def __init__(self, db_path: str = "users.db"):
         self.db_path = db_path
+        # Tek, kalıcı bağlantı; autocommit modunda, tüm thread'ler paylaştığından okuma ve yazmalar kilitle korunur
+        # (WAL yalnızca ayrı bağlantıları birbirinden yalıtır, aynı bağlantıdaki eşzamanlı kullanımı değil)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self._lock = threading.Lock()
         self.init_database()
+        self._last_login_writer = LastLoginWriter(db_path)
     
     def init_database(self):
         """Veritabanını başlat"""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute("""
+        with self._lock:
+            # WAL: okumalar ayrı bağlantıdaki last_login yazıcısını beklemez
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(f"PRAGMA synchronous={SQLITE_SYNCHRONOUS}")
+            self._conn.execute("PRAGMA cache_size=-20000")
+            self._conn.execute("""
                 CREATE TABLE IF NOT EXISTS users (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
                     username TEXT UNIQUE NOT NULL,
@@ -90,51 +461,52 @@ class AuthSystem:
                     last_login TIMESTAMP
                 )
             """)
-            conn.commit()
-            # Varsayılan admin kullanıcısı oluştur
-            self.create_default_admin()
+        # Varsayılan admin kullanıcısı oluştur
+        self.create_default_admin()
     
     def create_default_admin(self):
         """Varsayılan admin kullanıcısı oluştur"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute("SELECT COUNT(*) FROM users WHERE username = 'admin'")
-                if cursor.fetchone()[0] == 0:
-                    password_hash = bcrypt.hashpw("admin123".encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
-                    cursor.execute("""
-                        INSERT INTO users (username, password_hash, role)
+            with self._lock:
+                row = self._conn.execute("SELECT COUNT(*) FROM users WHERE username = 'admin'").fetchone()
+                if row[0] == 0:
+                    self._conn.execute("""
+                        INSERT OR IGNORE INTO users (username, password_hash, role)
                         VALUES (?, ?, ?)
-                    """, ("admin", password_hash, "admin"))
-                    conn.commit()
+                    """, ("admin", _DEFAULT_ADMIN_HASH, "admin"))
                     logger.info("Varsayılan admin kullanıcısı oluşturuldu: admin/admin123")
         except Exception as e:
             logger.error(f"Varsayılan admin oluşturma hatası: {e}")
     
     def verify_password(self, password: str, password_hash: str) -> bool:
-        """Parola doğrulaması"""
-        return bcrypt.checkpw(password.encode('utf-8'), password_hash.encode('utf-8'))
+        """Parola doğrulaması (sonuç kısa süreliğine önbelleklenir)"""
+        cache = get_password_cache()
+        cache_key = cache.make_key(password, password_hash)
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
+        result = lazy_import('bcrypt').checkpw(password.encode('utf-8'), password_hash.encode('utf-8'))
+        cache.set(cache_key, result)
+        return result
     
     def authenticate_user(self, username: str, password: str) -> Optional[dict]:
         """Kullanıcı doğrulama"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute("SELECT * FROM users WHERE username = ?", (username,))
-                user = cursor.fetchone()
+            with self._lock:
+                user = self._conn.execute("SELECT * FROM users WHERE username = ?", (username,)).fetchone()
+            
+            if user and self.verify_password(password, user[2]):
+                # Son giriş zamanı arka planda toplu olarak yazılır
+                self._last_login_writer.enqueue(user[0])
                 
-                if user and self.verify_password(password, user[2]):
-                    # Son giriş zamanını güncelle
-                    cursor.execute("UPDATE users SET last_login = CURRENT_TIMESTAMP WHERE id = ?", (user[0],))
-                    conn.commit()
-                    
-                    return {
-                        'id': user[0],
-                        'username': user[1],
-                        'role': user[3],
-                        'created_at': user[4],
-                        'last_login': user[5]
-                    }
+                return {
+                    'id': user[0],
+                    'username': user[1],
+                    'role': user[3],
+                    'created_at': user[4],
+                    'last_login': user[5]
+                }
         except Exception as e:
             logger.error(f"Kullanıcı doğrulama hatası: {e}")
         return None
@@ -145,12 +517,14 @@ class AuthSystem:
             'user_id': user['id'],
             'username': user['username'],
             'role': user['role'],
-            'exp': datetime.utcnow() + timedelta(hours=24)
+            'exp': datetime.now(timezone.utc) + timedelta(hours=24)
         }
+        jwt = lazy_import('jwt')
         return jwt.encode(payload, JWT_SECRET, algorithm=JWT_ALGORITHM)
     
     def verify_token(self, token: str) -> Optional[dict]:
         """JWT token doğrula"""
+        jwt = lazy_import('jwt')
         try:
             payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
             return payload
@@ -159,31 +533,251 @@ class AuthSystem:
         except jwt.InvalidTokenError:
             return None
 
+def mysql_server_url(database: Optional[str] = None) -> str:
+    """.env'deki MySQL bilgileriyle bağlantı dizesi oluştur (veritabanı verilmezse sunucu düzeyi)"""
+    mysql_host = os.getenv('MYSQL_HOST', 'localhost')
+    mysql_port = int(os.getenv('MYSQL_PORT', '3306'))
+    mysql_user = os.getenv('MYSQL_USER', 'root')
+    mysql_password = os.getenv('MYSQL_PASSWORD', '')
+    
+    connection_string = f"mysql+pymysql://{mysql_user}:{mysql_password}@{mysql_host}:{mysql_port}"
+    if database:
+        connection_string += f"/{database}"
+    if MYSQL_LOCAL_INFILE:
+        # pymysql istemci tarafında LOAD DATA LOCAL INFILE'a izin verir
+        connection_string += "?local_infile=1"
+    return connection_string
+
+@st.cache_resource(show_spinner=False)
+def get_engine(connection_string: str, pooled: bool = True):
+    """Bağlantı dizesi başına tek SQLAlchemy engine döndür"""
+    if not pooled:
+        # Sunucu düzeyindeki seyrek işlemler (veritabanı listeleme/oluşturma) bağlantı tutmaz
+        return create_engine(connection_string, poolclass=NullPool)
+    if connection_string.startswith('sqlite'):
+        # SQLite tek dosya: sunucu havuzu ayarları gerekmez
+        return create_engine(connection_string, pool_pre_ping=True)
+    # LIFO: en son kullanılan bağlantı tekrar kullanılır, boştaki fazlalar zaman aşımıyla kapanır
+    return create_engine(
+        connection_string,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+        pool_pre_ping=True,
+        pool_use_lifo=True
+    )
+
+@st.cache_resource(show_spinner=False)
+def get_ai_helper():
+    """Süreç başına tek AIHelper döndür"""
+    return lazy_import('ai_helper').AIHelper()
+
+@st.cache_resource(show_spinner=False)
+def get_embedding_cache():
+    """Süreç başına tek EmbeddingCache döndür (model bir kez yüklenir)"""
+    return lazy_import('embedding_cache').EmbeddingCache()
+
+@st.cache_data(show_spinner=False)
+def default_prompts(action: str) -> tuple:
+    """AI işleminin varsayılan (prompt, sistem prompt'u) ikilisini döndür (işlem başına önbelleklenir)"""
+    # Sınıf sabitlerinden okunur; AIHelper örneği oluşturulmaz
+    ai_helper_class = lazy_import('ai_helper').AIHelper
+    return (
+        ai_helper_class.DEFAULT_PROMPTS.get(action, ""),
+        ai_helper_class.DEFAULT_SYSTEM_PROMPTS.get(action, "")
+    )
+
+@st.cache_data(show_spinner=False)
+def extract_column_texts(df: pd.DataFrame, columns: List[str], limit: int = AI_TEXTS_PER_COLUMN) -> List[str]:
+    """Seçilen kolonlardan AI analizi için metinleri al (aynı veri ve kolonlar için önbelleklenir)"""
+    if not columns:
+        return []
+    # Kolonun tamamı değil, yalnızca alınacak satırlar metne çevrilir; tek listeye tek seferde dönüşür
+    return pd.concat(
+        [df[col].dropna().head(limit).astype(str) for col in columns],
+        ignore_index=True
+    ).tolist()
+
+@st.cache_data(ttl=METADATA_CACHE_TTL, show_spinner=False, max_entries=32)
+def detect_text_columns(url_key: str, table_name: str, row_count: int, columns: tuple, _df: pd.DataFrame) -> List[str]:
+    """AI analizine uygun metin kolonlarını bul (bağlantı, tablo, satır sayısı ve kolonlar başına önbelleklenir)"""
+    # Önbellek tüm oturumlarda ortaktır; farklı veritabanlarındaki aynı adlı tablolar url_key ile ayrılır
+    # Aynı kolon adlarıyla yeniden yüklenen tablo anahtarı değiştirmez; TTL ve clear_metadata_cache eskiyi siler
+    # Null olmayan değer oranı %10'dan fazla olan metin kolonları, tek vektörel geçişte
+    non_null_ratios = _df.select_dtypes(include=['object', 'string']).notna().mean()
+    return non_null_ratios.index[non_null_ratios > 0.1].tolist()
+
+def truncate_text(value, limit: int) -> str:
+    """Metni en fazla limit karaktere kısalt (kısaltıldıysa sonuna '...' ekle)"""
+    text = str(value)
+    return text if len(text) <= limit else text[:limit] + '...'
+
+def ai_result_key(ai_action: str, ai_model: str, custom_prompt: Optional[str],
+                  custom_system_prompt: Optional[str], texts: List[str]) -> str:
+    """AI analizi sonucunu işlem, model, prompt'lar ve metinlere göre tanımlayan anahtar"""
+    digest = hashlib.blake2b(digest_size=16)
+    for part in (ai_action, ai_model, custom_prompt or "", custom_system_prompt or "", *texts):
+        digest.update(part.encode('utf-8', 'surrogatepass'))
+        # Ayraç: parçaların birleşimi farklı girdilerde aynı olmasın
+        digest.update(b'\x00')
+    return digest.hexdigest()
+
+def get_metrics():
+    """AI çağrılarının kaydedildiği paylaşılan MetricsCollector'ı döndür"""
+    return lazy_import('metrics').get_metrics_collector()
+
+def sanitize_table_name(table_name: str) -> str:
+    """Tablo adındaki harf, rakam ve alt çizgi dışındaki karakterleri '_' yap"""
+    if table_name.isascii():
+        return table_name.translate(_SAFE_NAME_TABLE)
+    return _UNSAFE_NAME_RE.sub('_', table_name)
+
+def engine_cache_key(engine) -> str:
+    """Önbellek anahtarı olarak kullanılacak, parolası gizlenmiş bağlantı URL'i"""
+    return engine.url.render_as_string(hide_password=True)
+
+def to_sql_chunksize(column_count: int) -> int:
+    """Parametre sınırını aşmayacak multi-row INSERT satır sayısını hesapla"""
+    return max(1, min(TO_SQL_MAX_ROWS, SQL_MAX_BIND_PARAMS // max(column_count, 1)))
+
+@st.cache_data(show_spinner=False)
+def sniff_csv_separator(sample: str) -> str:
+    """Örnek metinden CSV ayırıcısını tespit et (aynı örnek için önbelleklenir)"""
+    # Örneğin son satırı yarım kalmış olabilir
+    if '\n' in sample:
+        sample = sample[:sample.rindex('\n')]
+    
+    try:
+        return csv.Sniffer().sniff(sample, delimiters=''.join(CSV_SEPARATORS)).delimiter
+    except csv.Error:
+        pass
+    
+    # Sniffer karar veremezse: ilk 5 satırda ortalama en çok alan üreten ayırıcı
+    lines = [line for line in sample.split('\n')[:5] if line.strip()]
+    max_fields = 0
+    best_separator = ','
+    
+    for sep in CSV_SEPARATORS:
+        if lines:
+            avg_fields = sum(len(line.split(sep)) for line in lines) / len(lines)
+            if avg_fields > max_fields:
+                max_fields = avg_fields
+                best_separator = sep
+    
+    return best_separator
+
+@st.cache_data(ttl=METADATA_CACHE_TTL, show_spinner=False)
+def cached_database_list(url_key: str, _engine) -> List[str]:
+    """MySQL veritabanı listesini çek (bağlantı URL'i başına önbelleklenir)"""
+    with _engine.connect() as conn:
+        result = conn.execute(text("SHOW DATABASES"))
+        return [row[0] for row in result.fetchall() if row[0] not in MYSQL_SYSTEM_DATABASES]
+
+@st.cache_data(ttl=METADATA_CACHE_TTL, show_spinner=False)
+def cached_table_list(url_key: str, database_name: Optional[str], _engine) -> List[str]:
+    """Tablo listesini çek (URL ve veritabanı başına önbelleklenir)"""
+    query = TABLE_LIST_QUERIES.get(_engine.dialect.name)
+    if query is None:
+        # Diğer dialect'ler için SQLAlchemy inspector
+        return sa.inspect(_engine).get_table_names()
+    
+    # Tek sorgu; bağlantının oturum durumunu (USE) değiştirmez
+    with _engine.connect() as conn:
+        result = conn.execute(text(query), {"database_name": database_name or None})
+        return list(result.scalars().all())
+
+@st.cache_resource(show_spinner=False)
+def get_table_metadata(url_key: str) -> sa.MetaData:
+    """Bağlantı başına yansıtılmış (reflected) tablo tanımlarını tutan MetaData"""
+    return sa.MetaData()
+
+def clear_metadata_cache():
+    """Önbelleklenmiş veritabanı ve tablo listelerini temizle"""
+    cached_database_list.clear()
+    cached_table_list.clear()
+    # Yeniden yüklenen tabloların kolonları ve kolon tipleri/doluluk oranları değişmiş olabilir
+    get_table_metadata.clear()
+    detect_text_columns.clear()
+
+@st.cache_resource(show_spinner=False)
+def get_auth_system(db_path: str = "users.db") -> AuthSystem:
+    """Süreç başına tek AuthSystem (ve tek SQLite bağlantısı) döndür"""
+    return AuthSystem(db_path)
+
 class StreamlitApp:
     """Streamlit uygulaması ana sınıfı"""
     
     def __init__(self):
-        self.auth_system = AuthSystem()
+        self.auth_system = get_auth_system()
         self.engine = None
         self.explorer = None
         self.ai_helper = None
         self.cache = None
         self.connection_status = False
         
+    @contextmanager
+    def _spool_upload(self, uploaded_file, suffix: str = ''):
+        """Büyük yüklemeleri geçici dosyaya yazıp yolunu, küçükleri buffer olarak ver"""
+        if getattr(uploaded_file, 'size', 0) <= UPLOAD_SPOOL_THRESHOLD:
+            yield uploaded_file
+            return
+        
+        uploaded_file.seek(0)
+        with tempfile.NamedTemporaryFile(suffix=suffix, delete=False) as tmp_file:
+            shutil.copyfileobj(uploaded_file, tmp_file)
+            tmp_path = tmp_file.name
+        try:
+            yield tmp_path
+        finally:
+            os.unlink(tmp_path)
+            uploaded_file.seek(0)
+    
+    def _read_csv_arrow(self, source, separator: str, encoding: str) -> pd.DataFrame:
+        """CSV dosyasını pyarrow'un çok thread'li ayrıştırıcısıyla oku"""
+        pacsv = lazy_import('pyarrow.csv')
+        table = pacsv.read_csv(
+            source,
+            read_options=pacsv.ReadOptions(encoding=encoding, block_size=ARROW_CSV_BLOCK_SIZE),
+            parse_options=pacsv.ParseOptions(delimiter=separator)
+        )
+        # Dönüştürülen kolonların Arrow belleği hemen serbest bırakılır (tepe bellek düşer).
+        # split_blocks kullanılmaz: salt okunur diziler üretir, sonraki düzenlemeler hata verir
+        return table.to_pandas(self_destruct=True)
+    
     def load_csv_file(self, uploaded_file, separator=',') -> pd.DataFrame:
         """CSV dosyasını yükle"""
         try:
-            # Encoding tespiti
-            encodings = ['utf-8', 'latin-1', 'cp1252', 'iso-8859-1']
+            # Encoding tespiti (BOM varsa tek aday yeterli)
+            bom_encoding = self._bom_encoding(uploaded_file)
+            encodings = [bom_encoding] if bom_encoding else ['utf-8', 'latin-1', 'cp1252', 'iso-8859-1']
             df = None
             
-            for encoding in encodings:
-                try:
-                    uploaded_file.seek(0)  # Dosya pointer'ını başa al
-                    df = pd.read_csv(uploaded_file, encoding=encoding, sep=separator)
-                    break
-                except UnicodeDecodeError:
-                    continue
+            with self._spool_upload(uploaded_file, suffix='.csv') as source:
+                if ARROW_AVAILABLE and len(separator) == 1:
+                    try:
+                        encoding = self._detect_encoding(uploaded_file)
+                        if not isinstance(source, str):
+                            source.seek(0)
+                        df = self._read_csv_arrow(source, separator, encoding)
+                    except ValueError as e:
+                        # pyarrow.ArrowInvalid da ValueError'dır; pandas ile tekrar denenir
+                        logger.info(f"pyarrow CSV okuması başarısız, pandas kullanılacak: {e}")
+                
+                if df is None:
+                    read_options = {'sep': separator, 'engine': 'c', 'low_memory': False}
+                    if isinstance(source, str):
+                        # Diskteki dosya doğrudan memory-map ile okunur
+                        read_options['memory_map'] = True
+                    
+                    for encoding in encodings:
+                        try:
+                            if not isinstance(source, str):
+                                source.seek(0)  # Dosya pointer'ını başa al
+                            df = pd.read_csv(source, encoding=encoding, **read_options)
+                            break
+                        except UnicodeDecodeError:
+                            continue
                     
             if df is None:
                 raise ValueError("Dosya encoding'i tespit edilemedi")
@@ -195,42 +789,317 @@ class StreamlitApp:
     def detect_csv_separator(self, uploaded_file) -> str:
         """CSV dosyasının ayırıcısını otomatik tespit et"""
         try:
+            # Dosyanın tamamı değil, yalnızca başındaki sınırlı örnek okunur
+            encoding = self._bom_encoding(uploaded_file) or 'utf-8'
             uploaded_file.seek(0)
-            sample = uploaded_file.read(1024).decode('utf-8', errors='ignore')
+            sample = uploaded_file.read(CSV_SNIFF_SAMPLE_SIZE).decode(encoding, errors='ignore')
             uploaded_file.seek(0)
             
-            # Yaygın ayırıcıları test et
-            separators = [',', ';', '\t', '|']
-            max_fields = 0
-            best_separator = ','
+            return sniff_csv_separator(sample)
+        except:
+            return ','  # Varsayılan olarak virgül
+    
+    def _bom_encoding(self, uploaded_file) -> Optional[str]:
+        """Dosya BOM ile başlıyorsa karşılık gelen encoding'i döndür"""
+        uploaded_file.seek(0)
+        head = uploaded_file.read(4)
+        uploaded_file.seek(0)
+        for bom, encoding in _BOM_ENCODINGS:
+            if head.startswith(bom):
+                return encoding
+        return None
+    
+    def _detect_encoding(self, uploaded_file, sample_size: int = 65536) -> str:
+        """Dosyanın başından okunan örnekle encoding tespit et"""
+        bom_encoding = self._bom_encoding(uploaded_file)
+        if bom_encoding:
+            return bom_encoding
+        
+        encodings = ['utf-8', 'latin-1', 'cp1252', 'iso-8859-1']
+        uploaded_file.seek(0)
+        sample = uploaded_file.read(sample_size)
+        uploaded_file.seek(0)
+        
+        for encoding in encodings:
+            try:
+                # final=False: örneğin sonunda bölünmüş çok baytlı karakter hata sayılmaz
+                codecs.getincrementaldecoder(encoding)().decode(sample, final=False)
+                return encoding
+            except UnicodeDecodeError:
+                continue
+        raise ValueError("Dosya encoding'i tespit edilemedi")
+    
+    def _stream_chunks_to_table(self, read_chunks, table_name: str, engine, if_exists: str = 'replace',
+                                progress_callback=None) -> Dict[str, Any]:
+        """
+        Okuyucunun ürettiği DataFrame parçalarını veritabanına yaz
+        
+        Okuma ayrı bir thread'de yapılır ve sınırlı bir kuyruk üzerinden
+        yazıcıya aktarılır; bellek kullanımı dosya boyutundan bağımsızdır.
+        read_chunks, (parça, ilerleme oranı veya None) ikilileri üreten bir fonksiyondur.
+        
+        Returns:
+            Yazılan satır sayısı, kolonlar ve ilk parçadan önizleme
+        """
+        clean_table_name = sanitize_table_name(table_name)
+        
+        chunks = queue.Queue(maxsize=CSV_STREAM_QUEUE_SIZE)
+        stop_event = threading.Event()
+        done = object()
+        
+        def put(item) -> bool:
+            # Yazıcı durduysa okuyucunun kuyrukta sonsuza dek beklemesini engelle
+            while not stop_event.is_set():
+                try:
+                    chunks.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+        
+        def producer():
+            try:
+                for item in read_chunks():
+                    if not put(item):
+                        return
+                put(done)
+            except Exception as e:
+                put(e)
+        
+        reader_thread = threading.Thread(target=producer, daemon=True)
+        reader_thread.start()
+        
+        total_rows = 0
+        columns = []
+        preview = None
+        write_mode = if_exists
+        try:
+            while True:
+                item = chunks.get()
+                if item is done:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                
+                chunk, progress = item
+                chunk.to_sql(
+                    name=clean_table_name,
+                    con=engine,
+                    if_exists=write_mode,
+                    index=False,
+                    method='multi',
+                    chunksize=to_sql_chunksize(len(chunk.columns))
+                )
+                # İlk parçadan sonra tablo hazır, geri kalanlar eklenir
+                write_mode = 'append'
+                
+                if preview is None:
+                    preview = chunk.head(UPLOAD_PREVIEW_ROWS)
+                    columns = list(chunk.columns)
+                total_rows += len(chunk)
+                
+                if progress_callback and progress is not None:
+                    progress_callback(min(progress, 1.0))
+        finally:
+            stop_event.set()
+            reader_thread.join()
+        
+        return {
+            'rows': total_rows,
+            'columns': columns,
+            'preview': preview
+        }
+    
+    def stream_csv_to_table(self, uploaded_file, table_name: str, engine, separator: str = ',',
+                            if_exists: str = 'replace', chunksize: int = CSV_STREAM_CHUNKSIZE,
+                            progress_callback=None) -> Dict[str, Any]:
+        """CSV dosyasını parça parça okuyup veritabanına yaz"""
+        try:
+            encoding = self._detect_encoding(uploaded_file)
+            total_size = getattr(uploaded_file, 'size', 0)
             
-            for sep in separators:
+            def read_chunks():
+                uploaded_file.seek(0)
+                with pd.read_csv(uploaded_file, sep=separator, encoding=encoding,
+                                 chunksize=chunksize, low_memory=False) as reader:
+                    for chunk in reader:
+                        yield chunk, (uploaded_file.tell() / total_size if total_size else None)
+            
+            return self._stream_chunks_to_table(read_chunks, table_name, engine, if_exists, progress_callback)
+        except Exception as e:
+            raise Exception(f"CSV dosyası aktarılırken hata: {e}")
+    
+    def bulk_load_csv_mysql(self, uploaded_file, table_name: str, engine, separator: str = ',',
+                            if_exists: str = 'replace') -> Optional[Dict[str, Any]]:
+        """
+        CSV dosyasını MySQL'e LOAD DATA LOCAL INFILE ile yükle
+        
+        Tablo şeması ilk satırlardan pandas ile çıkarılıp boş tablo oluşturulur,
+        satırları ise sunucu dosyadan doğrudan ayrıştırır.
+        
+        Returns:
+            Yazılan satır sayısı, kolonlar ve önizleme; yöntem uygulanamıyorsa
+            veya sunucu LOCAL INFILE'ı reddederse None
+        """
+        if not MYSQL_LOCAL_INFILE or engine.dialect.name != 'mysql':
+            return None
+        
+        encoding = self._detect_encoding(uploaded_file)
+        charset = MYSQL_CHARSETS.get(encoding)
+        if charset is None:
+            return None
+        
+        uploaded_file.seek(0)
+        sample = pd.read_csv(uploaded_file, sep=separator, encoding=encoding,
+                             nrows=BULK_LOAD_SAMPLE_ROWS, low_memory=False)
+        uploaded_file.seek(0)
+        line_terminator = '\r\n' if b'\r\n' in uploaded_file.read(CSV_SNIFF_SAMPLE_SIZE) else '\n'
+        
+        clean_table_name = sanitize_table_name(table_name)
+        columns = [str(column) for column in sample.columns]
+        
+        # Boş DataFrame yalnızca tabloyu oluşturur (if_exists davranışı to_sql ile aynı)
+        sample.head(0).to_sql(name=clean_table_name, con=engine, if_exists=if_exists, index=False)
+        
+        # Boş alanlar pandas'taki gibi NULL olarak yazılır
+        variables = ", ".join(f"@c{i}" for i in range(len(columns)))
+        assignments = ", ".join(
+            "`{}` = NULLIF(@c{}, '')".format(column.replace('`', '``'), i)
+            for i, column in enumerate(columns)
+        )
+        
+        with tempfile.NamedTemporaryFile(suffix='.csv', delete=False) as tmp_file:
+            uploaded_file.seek(0)
+            shutil.copyfileobj(uploaded_file, tmp_file)
+            tmp_path = tmp_file.name
+        
+        try:
+            conn = engine.raw_connection()
+            try:
+                cursor = conn.cursor()
+                cursor.execute(
+                    f"LOAD DATA LOCAL INFILE %s INTO TABLE `{clean_table_name}` "
+                    f"CHARACTER SET {charset} "
+                    "FIELDS TERMINATED BY %s OPTIONALLY ENCLOSED BY '\"' ESCAPED BY '' "
+                    "LINES TERMINATED BY %s IGNORE 1 LINES "
+                    f"({variables}) SET {assignments}",
+                    (tmp_path, separator, line_terminator)
+                )
+                rows = cursor.rowcount
+                conn.commit()
+            except Exception as e:
+                if not e.args or e.args[0] not in MYSQL_LOCAL_INFILE_REFUSED:
+                    raise
+                logger.warning(f"LOAD DATA LOCAL INFILE reddedildi, dosya parça parça yüklenecek: {e}")
+                rows = None
+            finally:
+                conn.close()
+        finally:
+            os.unlink(tmp_path)
+        
+        if rows is None:
+            if if_exists != 'append':
+                # Yukarıda oluşturulan boş tablo kaldırılır; 'fail' ile yapılan yedek yükleme hata vermesin
+                with engine.begin() as conn:
+                    conn.execute(text(f"DROP TABLE IF EXISTS `{clean_table_name}`"))
+            return None
+        
+        return {
+            'rows': rows,
+            'columns': columns,
+            'preview': sample.head(UPLOAD_PREVIEW_ROWS)
+        }
+    
+    def stream_upload_to_table(self, uploaded_file, file_extension: str, table_name: str, engine,
+                               separator: str = ',', if_exists: str = 'replace') -> Optional[Dict[str, Any]]:
+        """
+        CSV/Excel dosyasını belleğe tamamen almadan veritabanına aktar
+        
+        MySQL'de CSV önce LOAD DATA LOCAL INFILE ile denenir; uygulanamazsa
+        (sunucu reddettiyse de) eşiği aşan dosyalar parça parça yazılır.
+        
+        Returns:
+            Aktarım sonucu; dosya bellekte işlenecekse None
+        """
+        if file_extension == 'csv':
+            # MySQL sunucusu dosyayı doğrudan ayrıştırır (local_infile açıksa)
+            result = self.bulk_load_csv_mysql(uploaded_file, table_name, engine, separator, if_exists)
+            if result is not None:
+                return result
+        
+        stream_threshold = {'csv': CSV_STREAM_THRESHOLD, 'xlsx': EXCEL_STREAM_THRESHOLD}.get(file_extension)
+        if stream_threshold is None or uploaded_file.size <= stream_threshold:
+            return None
+        
+        # Büyük CSV/Excel: parça parça oku ve yaz
+        progress_bar = st.progress(0.0)
+        if file_extension == 'csv':
+            result = self.stream_csv_to_table(
+                uploaded_file, table_name, engine, separator, if_exists,
+                progress_callback=progress_bar.progress
+            )
+        else:
+            result = self.stream_excel_to_table(
+                uploaded_file, table_name, engine, if_exists,
+                progress_callback=progress_bar.progress
+            )
+        progress_bar.progress(1.0)
+        return result
+    
+    def stream_excel_to_table(self, uploaded_file, table_name: str, engine, if_exists: str = 'replace',
+                              chunksize: int = EXCEL_STREAM_CHUNKSIZE, progress_callback=None) -> Dict[str, Any]:
+        """Excel dosyasını openpyxl read-only modunda satır satır okuyup veritabanına yaz"""
+        try:
+            def read_chunks():
+                openpyxl = lazy_import('openpyxl')
+                uploaded_file.seek(0)
+                workbook = openpyxl.load_workbook(uploaded_file, read_only=True, data_only=True)
                 try:
-                    lines = sample.split('\n')[:5]  # İlk 5 satırı kontrol et
-                    field_counts = []
+                    sheet = workbook.active
+                    rows = sheet.iter_rows(values_only=True)
+                    header = next(rows, None)
+                    if header is None:
+                        return
                     
-                    for line in lines:
-                        if line.strip():
-                            fields = line.split(sep)
-                            field_counts.append(len(fields))
+                    # İlk satır kolon adları (pd.read_excel ile aynı varsayım)
+                    columns = [str(name) if name is not None else f"Unnamed: {i}"
+                               for i, name in enumerate(header)]
+                    width = len(columns)
+                    total_rows = sheet.max_row
                     
-                    if field_counts:
-                        avg_fields = sum(field_counts) / len(field_counts)
-                        if avg_fields > max_fields:
-                            max_fields = avg_fields
-                            best_separator = sep
-                            
-                except:
-                    continue
-            
-            return best_separator
-        except:
-            return ','  # Varsayılan olarak virgül
+                    batch = []
+                    read_rows = 0
+                    for row in rows:
+                        # Tamamen boş satırları atla
+                        if all(value is None for value in row):
+                            continue
+                        batch.append(row[:width])
+                        if len(batch) >= chunksize:
+                            read_rows += len(batch)
+                            yield (pd.DataFrame.from_records(batch, columns=columns),
+                                   read_rows / total_rows if total_rows else None)
+                            batch = []
+                    if batch:
+                        yield pd.DataFrame.from_records(batch, columns=columns), 1.0
+                finally:
+                    workbook.close()
+            
+            return self._stream_chunks_to_table(read_chunks, table_name, engine, if_exists, progress_callback)
+        except Exception as e:
+            raise Exception(f"Excel dosyası aktarılırken hata: {e}")
     
     def load_excel_file(self, uploaded_file) -> pd.DataFrame:
         """Excel dosyasını yükle"""
         try:
-            # Excel dosyasını oku
+            # Excel dosyasını oku (varsa Rust tabanlı calamine ile)
+            if CALAMINE_AVAILABLE:
+                try:
+                    return pd.read_excel(uploaded_file, engine='calamine')
+                except (ImportError, ValueError) as e:
+                    # Eski pandas sürümleri calamine motorunu tanımaz
+                    logger.info(f"calamine ile okunamadı, openpyxl kullanılacak: {e}")
+                    uploaded_file.seek(0)
+            
             df = pd.read_excel(uploaded_file, engine='openpyxl')
             return df
         except Exception as e:
@@ -246,31 +1115,53 @@ class StreamlitApp:
             sql_commands = [cmd.strip() for cmd in sql_content.split(';') if cmd.strip()]
             
             results = []
-            with engine.connect() as conn:
-                for i, command in enumerate(sql_commands):
-                    if command:
+            is_mysql = engine.dialect.name == 'mysql'
+            # Tüm dosya tek transaction: tek commit, hata olursa geri alınır
+            # (MySQL'de DDL - CREATE/ALTER/DROP - örtük commit yapar; ondan önceki komutlar geri alınamaz)
+            with engine.begin() as conn:
+                if is_mysql:
+                    # Toplu INSERT'lerde indeks/anahtar kontrolleri commit'e kadar ertelenir
+                    conn.exec_driver_sql("SET unique_checks=0")
+                    conn.exec_driver_sql("SET foreign_key_checks=0")
+                try:
+                    for i, command in enumerate(sql_commands):
                         try:
+                            # text(): '%' sürücüye kaçışlı gider (LIKE '%abc%' pymysql/psycopg2'de de çalışır)
                             result = conn.execute(text(command))
-                            if result.returns_rows:
-                                # SELECT komutu ise sonuçları al
-                                rows = result.fetchall()
-                                results.append(f"Komut {i+1}: {len(rows)} satır döndürüldü")
-                            else:
-                                # INSERT, UPDATE, DELETE gibi komutlar
-                                results.append(f"Komut {i+1}: Başarıyla çalıştırıldı")
-                            conn.commit()
                         except Exception as e:
-                            results.append(f"Komut {i+1} hatası: {e}")
+                            raise Exception(f"Komut {i+1} hatası: {e}")
+                        if result.returns_rows:
+                            # SELECT komutu ise sonuçları al
+                            rows = result.fetchall()
+                            results.append(f"Komut {i+1}: {len(rows)} satır döndürüldü")
+                        else:
+                            # INSERT, UPDATE, DELETE gibi komutlar
+                            results.append(f"Komut {i+1}: Başarıyla çalıştırıldı")
+                finally:
+                    if is_mysql:
+                        # Geri yükleme hatası asıl SQL hatasını gölgelemesin
+                        try:
+                            conn.exec_driver_sql("SET unique_checks=1")
+                            conn.exec_driver_sql("SET foreign_key_checks=1")
+                        except Exception as reset_error:
+                            logger.warning(f"MySQL kontrol ayarları geri yüklenemedi: {reset_error}")
                             
             return "\n".join(results)
         except Exception as e:
             raise Exception(f"SQL dosyası çalıştırılırken hata: {e}")
     
+    def _store_upload_preview(self, table_name: str, df: pd.DataFrame, shape: tuple):
+        """Yüklenen verinin yalnızca önizlemesini ve boyutunu session state'e kaydet"""
+        st.session_state.uploaded_preview = df.head(UPLOAD_PREVIEW_ROWS).copy()
+        st.session_state.uploaded_shape = shape
+        st.session_state.uploaded_table_name = table_name
+        st.session_state.selected_table = table_name
+    
     def save_dataframe_to_database(self, df: pd.DataFrame, table_name: str, engine, if_exists: str = 'replace') -> bool:
         """DataFrame'i veritabanına kaydet"""
         try:
             # Tablo adını temizle (sadece alfanumerik ve alt çizgi)
-            clean_table_name = re.sub(r'[^a-zA-Z0-9_]', '_', table_name)
+            clean_table_name = sanitize_table_name(table_name)
             
             # DataFrame'i veritabanına yaz
             df.to_sql(
@@ -279,7 +1170,7 @@ class StreamlitApp:
                 if_exists=if_exists,
                 index=False,
                 method='multi',
-                chunksize=1000
+                chunksize=to_sql_chunksize(len(df.columns))
             )
             
             return True
@@ -289,13 +1180,9 @@ class StreamlitApp:
     def get_database_list(self, engine) -> List[str]:
         """Mevcut veritabanlarını listele"""
         try:
-            # MySQL için veritabanı listesi
+            # MySQL için veritabanı listesi (TTL ile önbelleklenir)
             if 'mysql' in str(engine.url):
-                with engine.connect() as conn:
-                    result = conn.execute(text("SHOW DATABASES"))
-                    databases = [row[0] for row in result.fetchall() 
-                               if row[0] not in ['information_schema', 'mysql', 'performance_schema', 'sys']]
-                return databases
+                return cached_database_list(engine_cache_key(engine), engine)
             else:
                 # SQLite için sadece mevcut veritabanı
                 return [engine.url.database or 'main']
@@ -306,17 +1193,8 @@ class StreamlitApp:
     def get_table_list(self, engine, database_name: str = None) -> List[str]:
         """Belirtilen veritabanındaki tabloları listele"""
         try:
-            with engine.connect() as conn:
-                if database_name and 'mysql' in str(engine.url):
-                    # Belirli bir veritabanındaki tabloları listele
-                    conn.execute(text(f"USE `{database_name}`"))
-                    result = conn.execute(text("SHOW TABLES"))
-                    tables = [row[0] for row in result.fetchall()]
-                else:
-                    # Mevcut veritabanındaki tabloları listele
-                    result = conn.execute(text("SHOW TABLES"))
-                    tables = [row[0] for row in result.fetchall()]
-                return tables
+            # Hatalar önbelleğe alınmaz, bir sonraki çağrıda yeniden denenir
+            return cached_table_list(engine_cache_key(engine), database_name, engine)
         except Exception as e:
             logger.error(f"Tablo listesi alınırken hata: {e}")
             return []
@@ -326,18 +1204,12 @@ class StreamlitApp:
         try:
             # MySQL için yeni veritabanı oluştur
             if 'mysql' in str(engine.url):
-                # Ana MySQL sunucusuna bağlan
-                mysql_host = os.getenv('MYSQL_HOST', 'localhost')
-                mysql_port = int(os.getenv('MYSQL_PORT', '3306'))
-                mysql_user = os.getenv('MYSQL_USER', 'root')
-                mysql_password = os.getenv('MYSQL_PASSWORD', '')
-                
-                temp_connection_string = f"mysql+pymysql://{mysql_user}:{mysql_password}@{mysql_host}:{mysql_port}"
-                temp_engine = create_engine(temp_connection_string)
+                if not _VALID_DATABASE_NAME_RE.match(database_name):
+                    raise ValueError(f"Geçersiz veritabanı adı: {database_name} (harf, rakam ve _ kullanın)")
                 
-                with temp_engine.connect() as conn:
+                # DDL tek, kısa ömürlü AUTOCOMMIT bağlantısında çalışır
+                with engine.connect().execution_options(isolation_level='AUTOCOMMIT') as conn:
                     conn.execute(text(f"CREATE DATABASE IF NOT EXISTS `{database_name}`"))
-                    conn.commit()
                     
                 return True
             else:
@@ -374,14 +1246,18 @@ class StreamlitApp:
             st.session_state.custom_prompt = None
         if 'custom_system_prompt' not in st.session_state:
             st.session_state.custom_system_prompt = None
+        if 'ai_results_cache' not in st.session_state:
+            st.session_state.ai_results_cache = OrderedDict()
         if 'custom_defaults' not in st.session_state:
             st.session_state.custom_defaults = {}
         if 'custom_system_defaults' not in st.session_state:
             st.session_state.custom_system_defaults = {}
         if 'available_models' not in st.session_state:
             st.session_state.available_models = ["llama3:latest", "qwen2.5-coder:32b-instruct-q4_0", "mistral:latest"]
-        if 'uploaded_data' not in st.session_state:
-            st.session_state.uploaded_data = None
+        if 'uploaded_preview' not in st.session_state:
+            st.session_state.uploaded_preview = None
+        if 'uploaded_shape' not in st.session_state:
+            st.session_state.uploaded_shape = None
         if 'uploaded_table_name' not in st.session_state:
             st.session_state.uploaded_table_name = None
         if 'show_data_upload' not in st.session_state:
@@ -464,13 +1340,7 @@ class StreamlitApp:
                 if st.button("🔗 Bağlan", type="primary"):
                     try:
                         # MySQL bağlantısı
-                        mysql_host = os.getenv('MYSQL_HOST', 'localhost')
-                        mysql_port = int(os.getenv('MYSQL_PORT', '3306'))
-                        mysql_user = os.getenv('MYSQL_USER', 'root')
-                        mysql_password = os.getenv('MYSQL_PASSWORD', '')
-                        
-                        connection_string = f"mysql+pymysql://{mysql_user}:{mysql_password}@{mysql_host}:{mysql_port}/{database}"
-                        self.engine = create_engine(connection_string)
+                        self.engine = get_engine(mysql_server_url(database))
                         
                         # Bağlantıyı test et
                         with self.engine.connect() as conn:
@@ -483,7 +1353,7 @@ class StreamlitApp:
                         
                         # Explorer'ı başlat
                         if EXPLORER_AVAILABLE:
-                            self.explorer = DataExplorer(self.engine)
+                            self.explorer = lazy_import('explorer').DataExplorer(self.engine)
                             
                     except Exception as e:
                         st.error(f"❌ Bağlantı hatası: {e}")
@@ -496,7 +1366,7 @@ class StreamlitApp:
                     
                     # AI modeli seçimi - Dinamik olarak güncelle
                     try:
-                        ai_helper = AIHelper()
+                        ai_helper = get_ai_helper()
                         available_models = ai_helper.get_available_models()
                         st.session_state.available_models = available_models
                     except:
@@ -527,8 +1397,8 @@ class StreamlitApp:
                     # Modelleri güncelle butonu
                     if st.button("🔄 Modelleri Güncelle"):
                         try:
-                            ai_helper = AIHelper()
-                            new_models = ai_helper.get_available_models()
+                            ai_helper = get_ai_helper()
+                            new_models = ai_helper.refresh_available_models()
                             st.session_state.available_models = new_models
                             st.success(f"✅ {len(new_models)} model güncellendi!")
                             st.rerun()
@@ -542,7 +1412,7 @@ class StreamlitApp:
                     with col1:
                         if st.button("📊 Cache Durumunu Göster"):
                             try:
-                                cache = EmbeddingCache()
+                                cache = get_embedding_cache()
                                 stats = cache.get_cache_stats()
                                 st.json(stats)
                             except Exception as e:
@@ -551,7 +1421,7 @@ class StreamlitApp:
                     with col2:
                         if st.button("🗑️ Cache Temizle"):
                             try:
-                                cache = EmbeddingCache()
+                                cache = get_embedding_cache()
                                 cache.clear_cache()
                                 st.success("✅ Cache temizlendi!")
                             except Exception as e:
@@ -564,7 +1434,7 @@ class StreamlitApp:
                     with col1:
                         if st.button("📊 Metrikleri Göster"):
                             try:
-                                metrics = MetricsCollector()
+                                metrics = get_metrics()
                                 stats = metrics.get_metrics_summary()
                                 
                                 # Ana metrikler
@@ -595,7 +1465,7 @@ class StreamlitApp:
                     with col2:
                         if st.button("🔄 Metrikleri Sıfırla"):
                             try:
-                                metrics = MetricsCollector()
+                                metrics = get_metrics()
                                 metrics.reset_metrics()
                                 st.success("✅ Metrikler sıfırlandı!")
                             except Exception as e:
@@ -604,7 +1474,7 @@ class StreamlitApp:
                     with col3:
                         if st.button("📤 Metrikleri Dışa Aktar"):
                             try:
-                                metrics = MetricsCollector()
+                                metrics = get_metrics()
                                 export_data = metrics.export_metrics()
                                 
                                 # JSON dosyası olarak indir
@@ -651,7 +1521,6 @@ class StreamlitApp:
         mysql_host = os.getenv('MYSQL_HOST', 'localhost')
         mysql_port = int(os.getenv('MYSQL_PORT', '3306'))
         mysql_user = os.getenv('MYSQL_USER', 'root')
-        mysql_password = os.getenv('MYSQL_PASSWORD', '')
         
         with st.form("mysql_connection"):
             st.info(f"🔗 MySQL Bağlantısı: {mysql_host}:{mysql_port}")
@@ -660,12 +1529,9 @@ class StreamlitApp:
             # Önce veritabanı listesini çek
             try:
                 # MySQL sunucusuna bağlan (veritabanı belirtmeden)
-                temp_connection_string = f"mysql+pymysql://{mysql_user}:{mysql_password}@{mysql_host}:{mysql_port}"
-                temp_engine = create_engine(temp_connection_string)
+                temp_engine = get_engine(mysql_server_url(), pooled=False)
                 
-                with temp_engine.connect() as conn:
-                    result = conn.execute(text("SHOW DATABASES"))
-                    databases = [row[0] for row in result.fetchall() if row[0] not in ['information_schema', 'mysql', 'performance_schema', 'sys']]
+                databases = cached_database_list(engine_cache_key(temp_engine), temp_engine)
                 
                 if not databases:
                     st.error("❌ Kullanıcının erişebileceği veritabanı bulunamadı!")
@@ -690,8 +1556,8 @@ class StreamlitApp:
                     return
                     
                 try:
-                    connection_string = f"mysql+pymysql://{mysql_user}:{mysql_password}@{mysql_host}:{mysql_port}/{database}"
-                    self.engine = create_engine(connection_string)
+                    # local_infile bağlantı argümanı da yardımcıdan gelir
+                    self.engine = get_engine(mysql_server_url(database))
                     
                     # Bağlantıyı test et
                     with self.engine.connect() as conn:
@@ -704,7 +1570,7 @@ class StreamlitApp:
                     
                     # Explorer'ı başlat
                     if EXPLORER_AVAILABLE:
-                        self.explorer = DataExplorer(self.engine)
+                        self.explorer = lazy_import('explorer').DataExplorer(self.engine)
                         
                 except Exception as e:
                     st.error(f"❌ Bağlantı hatası: {e}")
@@ -734,7 +1600,7 @@ class StreamlitApp:
                     return
                     
                 try:
-                    self.engine = create_engine(f"sqlite:///{db_path}")
+                    self.engine = get_engine(f"sqlite:///{db_path}")
                     
                     # Bağlantıyı test et
                     with self.engine.connect() as conn:
@@ -747,7 +1613,7 @@ class StreamlitApp:
                     
                     # Explorer'ı başlat
                     if EXPLORER_AVAILABLE:
-                        self.explorer = DataExplorer(self.engine)
+                        self.explorer = lazy_import('explorer').DataExplorer(self.engine)
                         
                 except Exception as e:
                     st.error(f"❌ Bağlantı hatası: {e}")
@@ -789,14 +1655,8 @@ class StreamlitApp:
             
             # .env dosyasındaki MySQL bilgileriyle otomatik bağlantı kur
             try:
-                mysql_host = os.getenv('MYSQL_HOST', 'localhost')
-                mysql_port = int(os.getenv('MYSQL_PORT', '3306'))
-                mysql_user = os.getenv('MYSQL_USER', 'root')
-                mysql_password = os.getenv('MYSQL_PASSWORD', '')
-                
                 # Ana MySQL sunucusuna bağlan
-                temp_connection_string = f"mysql+pymysql://{mysql_user}:{mysql_password}@{mysql_host}:{mysql_port}"
-                temp_engine = create_engine(temp_connection_string)
+                temp_engine = get_engine(mysql_server_url(), pooled=False)
                 
                 # Veritabanı listesini al
                 existing_databases = self.get_database_list(temp_engine)
@@ -811,6 +1671,11 @@ class StreamlitApp:
                 st.info("💡 Lütfen .env dosyasındaki MySQL bağlantı bilgilerini kontrol edin")
                 return
             
+            # Önbelleklenmiş veritabanı/tablo listelerini yenile
+            if st.button("🔄 Listeyi Yenile", key="refresh_metadata"):
+                clear_metadata_cache()
+                st.rerun()
+            
             # Veritabanı seçenekleri
             db_options = ["Yeni veritabanı oluştur"] + existing_databases
             
@@ -881,6 +1746,9 @@ class StreamlitApp:
             # Yükleme seçenekleri
             st.subheader("⚙️ Yükleme Seçenekleri")
             
+            # Ayırıcı yalnızca CSV için seçilir; diğer dosya türlerinde varsayılan kalır
+            separator = ','
+            
             col1, col2 = st.columns(2)
             with col1:
                 if selected_table_option == "Yeni tablo oluştur":
@@ -918,45 +1786,39 @@ class StreamlitApp:
                     with st.spinner("Dosya yükleniyor..."):
                         # 1. Veritabanı bağlantısı
                         if new_database_name:
-                            # Yeni veritabanı oluştur
-                            mysql_host = os.getenv('MYSQL_HOST', 'localhost')
-                            mysql_port = int(os.getenv('MYSQL_PORT', '3306'))
-                            mysql_user = os.getenv('MYSQL_USER', 'root')
-                            mysql_password = os.getenv('MYSQL_PASSWORD', '')
-                            
-                            # Ana MySQL sunucusuna bağlan
-                            temp_connection_string = f"mysql+pymysql://{mysql_user}:{mysql_password}@{mysql_host}:{mysql_port}"
-                            temp_engine = create_engine(temp_connection_string)
-                            
-                            # Yeni veritabanı oluştur
-                            self.create_database(new_database_name, temp_engine)
-                            
-                            # Yeni veritabanına bağlan
-                            target_connection_string = f"mysql+pymysql://{mysql_user}:{mysql_password}@{mysql_host}:{mysql_port}/{new_database_name}"
-                            target_engine = create_engine(target_connection_string)
-                            
-                            # Session state'i güncelle
-                            st.session_state.engine = target_engine
-                            st.session_state.connection_established = True
-                            target_database = new_database_name
+                            # Yeni veritabanını sunucu düzeyindeki engine ile oluştur
+                            self.create_database(new_database_name, get_engine(mysql_server_url(), pooled=False))
+                        
+                        # Seçilen (veya yeni oluşturulan) veritabanına bağlan
+                        target_engine = get_engine(mysql_server_url(target_database))
+                        
+                        # Session state'i güncelle
+                        st.session_state.engine = target_engine
+                        st.session_state.connection_established = True
+                        
+                        # 2. Dosyayı işle
+                        stream_result = self.stream_upload_to_table(
+                            uploaded_file, file_extension, table_name, target_engine, separator, if_exists
+                        )
+                        
+                        if stream_result is not None:
+                            file_label = "CSV" if file_extension == 'csv' else "Excel"
+                            st.success(f"✅ {file_label} dosyası başarıyla yüklendi!")
+                            st.info(f"📊 {stream_result['rows']} satır, {len(stream_result['columns'])} kolon")
                             
-                        else:
-                            # Mevcut veritabanını kullan
-                            mysql_host = os.getenv('MYSQL_HOST', 'localhost')
-                            mysql_port = int(os.getenv('MYSQL_PORT', '3306'))
-                            mysql_user = os.getenv('MYSQL_USER', 'root')
-                            mysql_password = os.getenv('MYSQL_PASSWORD', '')
+                            # Veri önizleme (ilk parçadan)
+                            if stream_result['preview'] is not None:
+                                st.subheader("👀 Veri Önizleme")
+                                st.dataframe(stream_result['preview'])
                             
-                            # Seçilen veritabanına bağlan
-                            target_connection_string = f"mysql+pymysql://{mysql_user}:{mysql_password}@{mysql_host}:{mysql_port}/{target_database}"
-                            target_engine = create_engine(target_connection_string)
+                            # Veri bellekte tutulmaz, yalnızca önizleme saklanır
+                            if stream_result['preview'] is not None:
+                                self._store_upload_preview(
+                                    table_name, stream_result['preview'],
+                                    (stream_result['rows'], len(stream_result['columns']))
+                                )
                             
-                            # Session state'i güncelle
-                            st.session_state.engine = target_engine
-                            st.session_state.connection_established = True
-                        
-                        # 2. Dosyayı işle
-                        if file_extension == 'csv':
+                        elif file_extension == 'csv':
                             # CSV dosyasını yükle
                             df = self.load_csv_file(uploaded_file, separator)
                             
@@ -971,10 +1833,8 @@ class StreamlitApp:
                                 st.subheader("👀 Veri Önizleme")
                                 st.dataframe(df.head(10))
                                 
-                                # Session state'i güncelle
-                                st.session_state.uploaded_data = df
-                                st.session_state.uploaded_table_name = table_name
-                                st.session_state.selected_table = table_name
+                                # Tam DataFrame session'da tutulmaz, yalnızca önizleme ve boyut
+                                self._store_upload_preview(table_name, df, df.shape)
                                 
                         elif file_extension == 'xlsx':
                             # Excel dosyasını yükle
@@ -991,10 +1851,8 @@ class StreamlitApp:
                                 st.subheader("👀 Veri Önizleme")
                                 st.dataframe(df.head(10))
                                 
-                                # Session state'i güncelle
-                                st.session_state.uploaded_data = df
-                                st.session_state.uploaded_table_name = table_name
-                                st.session_state.selected_table = table_name
+                                # Tam DataFrame session'da tutulmaz, yalnızca önizleme ve boyut
+                                self._store_upload_preview(table_name, df, df.shape)
                                 
                         elif file_extension == 'sql':
                             # SQL dosyasını çalıştır
@@ -1007,6 +1865,9 @@ class StreamlitApp:
                             # SQL dosyası için tablo seçimi
                             st.info("💡 SQL dosyası çalıştırıldı. Analiz etmek istediğiniz tabloyu seçin.")
                             
+                        # Yeni veritabanı/tablo listelerde hemen görünsün
+                        clear_metadata_cache()
+                        
                         # Başarı mesajı
                         st.success(f"🎉 Veri yükleme tamamlandı!")
                         st.info(f"📁 Veritabanı: {target_database}")
@@ -1051,7 +1912,7 @@ class StreamlitApp:
                     
                 try:
                     connection_string = f"postgresql://{postgres_user}:{postgres_password}@{postgres_host}:{postgres_port}/{database}"
-                    self.engine = create_engine(connection_string)
+                    self.engine = get_engine(connection_string)
                     
                     # Bağlantıyı test et
                     with self.engine.connect() as conn:
@@ -1063,7 +1924,7 @@ class StreamlitApp:
                     
                     # Explorer'ı başlat
                     if EXPLORER_AVAILABLE:
-                        self.explorer = DataExplorer(self.engine)
+                        self.explorer = lazy_import('explorer').DataExplorer(self.engine)
                         
                 except Exception as e:
                     st.error(f"❌ Bağlantı hatası: {e}")
@@ -1075,23 +1936,24 @@ class StreamlitApp:
         # Geliştirme sürecinde auth kontrolü yok
         
         # Yüklenen veri varsa göster
-        if st.session_state.get('uploaded_data') is not None:
+        if st.session_state.get('uploaded_preview') is not None:
             st.subheader("📁 Yüklenen Veri")
             
-            uploaded_df = st.session_state.uploaded_data
+            uploaded_df = st.session_state.uploaded_preview
             uploaded_table = st.session_state.uploaded_table_name
+            uploaded_rows, uploaded_columns = st.session_state.uploaded_shape
             
             col1, col2, col3 = st.columns(3)
             with col1:
-                st.metric("📊 Satır Sayısı", len(uploaded_df))
+                st.metric("📊 Satır Sayısı", uploaded_rows)
             with col2:
-                st.metric("📋 Kolon Sayısı", len(uploaded_df.columns))
+                st.metric("📋 Kolon Sayısı", uploaded_columns)
             with col3:
                 st.metric("📁 Tablo Adı", uploaded_table)
             
             # Veri önizleme
             st.subheader("👀 Veri Önizleme")
-            st.dataframe(uploaded_df.head(20))
+            st.dataframe(uploaded_df)
             
             # Analiz butonu
             if st.button("🔍 Bu Veriyi Analiz Et", type="primary"):
@@ -1113,8 +1975,8 @@ class StreamlitApp:
                 st.error("Veritabanı bağlantısı bulunamadı. Lütfen önce bağlantı kurun.")
                 return
                 
-            inspector = sa.inspect(engine)
-            tables = inspector.get_table_names()
+            # Her rerun'da yeniden sorgulanmaz (TTL'li önbellek)
+            tables = cached_table_list(engine_cache_key(engine), None, engine)
             
             if not tables:
                 st.warning("Veritabanında tablo bulunamadı.")
@@ -1153,9 +2015,19 @@ class StreamlitApp:
         """Tabloyu analiz et"""
         try:
             # Tablo şemasını al
+            engine = st.session_state.get('engine')
+            url_key = engine_cache_key(engine)
+            
+            # Tablo adı sorgulara girmeden önce mevcut tablolarla doğrulanır
+            if table_name not in cached_table_list(url_key, None, engine):
+                # Liste TTL süresince eskiyebilir; reddetmeden önce veritabanına doğrudan sor
+                if not sa.inspect(engine).has_table(table_name):
+                    st.error(f"Tablo bulunamadı: {table_name}")
+                    return
+                clear_metadata_cache()
+            
             with st.spinner("Tablo analiz ediliyor..."):
-                engine = st.session_state.get('engine')
-                explorer = DataExplorer(engine)
+                explorer = lazy_import('explorer').DataExplorer(engine)
                 analysis = explorer.analyze_table(table_name)
                 
             # Veri önizleme - EN ÜSTTE
@@ -1163,9 +2035,9 @@ class StreamlitApp:
             
             # Tablo analizi tamamlandığında otomatik olarak veri yükle
             try:
-                engine = st.session_state.get('engine')
-                query = f"SELECT * FROM {table_name} LIMIT 20"
-                df = pd.read_sql(query, engine)
+                # Tablo tanımı bağlantı başına bir kez yansıtılır; ad dialect'e göre tırnaklanır
+                table = sa.Table(table_name, get_table_metadata(url_key), autoload_with=engine)
+                df = pd.read_sql(sa.select(table).limit(20), engine)
                 st.dataframe(df)
                 st.session_state.table_data = df
             except Exception as e:
@@ -1185,7 +2057,13 @@ class StreamlitApp:
             with col2:
                 st.metric("Metin Kolonu", len(text_columns))
             with col3:
-                st.metric("Toplam Satır", analysis.get('total_rows', 'N/A'))
+                total_rows = analysis.get('total_rows', 'N/A')
+                if analysis.get('total_rows_estimated'):
+                    # İstatistiklerden gelen yaklaşık değer; kesin sayım yapılmadı
+                    st.metric("Toplam Satır (tahmini)", f"~{total_rows:,}",
+                              help="Veritabanı istatistiklerinden alınan yaklaşık satır sayısı")
+                else:
+                    st.metric("Toplam Satır", total_rows)
                 
             # Kolon detayları - 5'erli gruplar halinde renkli göster
             st.subheader("📝 Kolon Detayları")
@@ -1195,74 +2073,55 @@ class StreamlitApp:
             for i in range(0, len(columns_list), 5):
                 group = columns_list[i:i+5]
                 
-                # Her grup için renkli başlık
-                colors = ['#FF6B6B', '#4ECDC4', '#45B7D1', '#96CEB4', '#FFEAA7']
-                group_title = f"📋 Grup {i//5 + 1} ({len(group)} kolon)"
+                # Grup renkleri kartlardan önce bir kez seçilir
+                group_index = i // 5
+                color = COLUMN_CARD_COLORS[group_index % len(COLUMN_CARD_COLORS)]
+                next_color = COLUMN_CARD_COLORS[(group_index + 1) % len(COLUMN_CARD_COLORS)]
                 
-                st.markdown(f"""
-                <div style="
-                    background: linear-gradient(135deg, {colors[i//5 % len(colors)]}20, {colors[(i//5 + 1) % len(colors)]}20);
-                    border-left: 4px solid {colors[i//5 % len(colors)]};
-                    padding: 10px;
-                    border-radius: 5px;
-                    margin: 10px 0;
-                ">
-                    <h4 style="color: {colors[i//5 % len(colors)]}; margin: 0;">{group_title}</h4>
-                </div>
-                """, unsafe_allow_html=True)
+                # Başlık ve gruptaki tüm kartlar tek HTML bloğunda, tek st.markdown ile gönderilir
+                html_parts = [GROUP_HEADER_TEMPLATE.substitute(
+                    color=color,
+                    next_color=next_color,
+                    title=f"📋 Grup {group_index + 1} ({len(group)} kolon)"
+                )]
                 
-                # Her gruptaki kolonları göster - Kümelendirme gibi renkli kartlar
-                cols = st.columns(5)
                 for j, (column_name, column_data) in enumerate(group):
-                    color = colors[j % len(colors)]
+                    card_color = COLUMN_CARD_COLORS[j % len(COLUMN_CARD_COLORS)]
                     
+                    # Metin kolonu ise ek bilgiler
+                    text_html = ""
+                    if column_data.get('is_text', False):
+                        text_analysis = column_data.get('text_analysis', {})
+                        text_html = COLUMN_TEXT_INFO_TEMPLATE.substitute(
+                            color=card_color,
+                            shortest=html.escape(str(text_analysis.get('shortest_text', 'N/A'))[:20]),
+                            longest=html.escape(str(text_analysis.get('longest_text', 'N/A'))[:20])
+                        )
+                    
+                    # Kolon kartı - Kümelendirme gibi
+                    html_parts.append(COLUMN_CARD_TEMPLATE.substitute(
+                        color=card_color,
+                        name=html.escape(str(column_name)),
+                        dtype=column_data.get('dtype', 'N/A'),
+                        null_percentage=f"{column_data.get('null_percentage', 0):.1f}",
+                        unique_count=column_data.get('unique_count', 'N/A'),
+                        text_html=text_html
+                    ))
+                
+                html_parts.append("</div>")
+                group_html = "".join(html_parts)
+                st.markdown(group_html, unsafe_allow_html=True)
+                
+                # Örnekler ve kelimeler kartların altında, aynı sütun düzeninde
+                cols = st.columns(5)
+                for j, (column_name, column_data) in enumerate(group):
                     with cols[j]:
-                        # Kolon kartı - Kümelendirme gibi
-                        st.markdown(f"""
-                        <div style="
-                            background: linear-gradient(135deg, {color}20, {color}10);
-                            padding: 15px;
-                            border-radius: 10px;
-                            margin: 5px 0;
-                            border: 2px solid {color};
-                            box-shadow: 0 4px 8px rgba(0,0,0,0.1);
-                        ">
-                            <h6 style="margin: 0; color: {color}; font-size: 14px; font-weight: bold;">
-                                🔍 {column_name}
-                            </h6>
-                            <p style="margin: 5px 0; font-size: 11px; color: #666;">
-                                📊 {column_data.get('dtype', 'N/A')}
-                            </p>
-                            <p style="margin: 3px 0; font-size: 10px;">
-                                ❌ Null: {column_data.get('null_percentage', 0):.1f}%
-                            </p>
-                            <p style="margin: 3px 0; font-size: 10px;">
-                                🔢 Benzersiz: {column_data.get('unique_count', 'N/A')}
-                            </p>
-                        """, unsafe_allow_html=True)
-                        
-                        # Metin kolonu ise ek bilgiler
-                        if column_data.get('is_text', False):
-                            text_analysis = column_data.get('text_analysis', {})
-                            st.markdown(f"""
-                            <div style="
-                                background: {color}15;
-                                padding: 8px;
-                                border-radius: 5px;
-                                margin-top: 5px;
-                                font-size: 9px;
-                            ">
-                                <p style="margin: 2px 0;">📏 En kısa: {text_analysis.get('shortest_text', 'N/A')[:20]}...</p>
-                                <p style="margin: 2px 0;">📏 En uzun: {text_analysis.get('longest_text', 'N/A')[:20]}...</p>
-                            </div>
-                            """, unsafe_allow_html=True)
-                        
                         # Örnek değerler için expander
                         sample_values = column_data.get('sample_values', [])
                         if sample_values:
                             with st.expander("📋 Örnekler", expanded=False):
                                 for val in sample_values[:3]:
-                                    st.markdown(f"• {str(val)[:30]}{'...' if len(str(val)) > 30 else ''}")
+                                    st.markdown(f"• {truncate_text(val, 30)}")
                         
                         # En sık kelimeler (metin kolonları için)
                         if column_data.get('is_text', False):
@@ -1279,78 +2138,21 @@ class StreamlitApp:
         except Exception as e:
             st.error(f"Tablo analizi hatası: {e}")
             
-    def _render_ai_analysis(self, table_name: str):
-        """AI analizi bölümünü göster"""
-        st.subheader("🤖 AI Analizi")
-        
-        if not AI_HELPER_AVAILABLE:
-            st.error("AI Helper modülü bulunamadı!")
-            return
-            
-        # AI Helper'ı başlat
-        if not self.ai_helper:
-            try:
-                self.ai_helper = AIHelper()
-            except Exception as e:
-                st.error(f"AI Helper başlatılamadı: {e}")
-                return
-                
-        # Metin kolonlarını seç
-        df = st.session_state.table_data
-        
-        # Metin kolonlarını bul
-        text_columns = []
-        for col in df.columns:
-            if df[col].dtype == 'object':
-                # Null olmayan string değerlerin oranını kontrol et
-                non_null_ratio = df[col].notna().sum() / len(df)
-                if non_null_ratio > 0.1:  # %10'dan fazla veri varsa
-                    text_columns.append(col)
-                    
-        if not text_columns:
-            st.warning("Analiz edilecek metin kolonu bulunamadı.")
-            return
-            
-        # Kolon seçimi
-        selected_columns = st.multiselect(
-            "Analiz edilecek kolonları seçin:",
-            text_columns,
-            default=text_columns[:2] if len(text_columns) >= 2 else text_columns
-        )
-        
-        if not selected_columns:
-            st.warning("Lütfen en az bir kolon seçin.")
-            return
-            
-        # Prompt düzenleme bölümü
-        st.subheader("📝 AI Prompt Düzenleme")
-        
-        # Seçilen AI işlemine göre varsayılan prompt'u al
-        ai_action = st.session_state.get('ai_action', 'Özetleme')
-        default_prompt = self.ai_helper.get_default_prompt(ai_action)
-        default_system_prompt = self.ai_helper.get_default_system_prompt(ai_action)
-        
-        # AI işlemi değiştiğinde uygun prompt'u kullan
-        if 'last_ai_action' not in st.session_state or st.session_state.last_ai_action != ai_action:
-            # Önce özel varsayılan prompt var mı kontrol et
-            custom_defaults = st.session_state.get('custom_defaults', {})
-            custom_system_defaults = st.session_state.get('custom_system_defaults', {})
-            
-            if ai_action in custom_defaults:
-                st.session_state.custom_prompt = custom_defaults[ai_action]
-            else:
-                st.session_state.custom_prompt = default_prompt
-                
-            if ai_action in custom_system_defaults:
-                st.session_state.custom_system_prompt = custom_system_defaults[ai_action]
-            else:
-                st.session_state.custom_system_prompt = default_system_prompt
-                
-            st.session_state.last_ai_action = ai_action
-        
+    @staticmethod
+    def _reset_prompt(defaults_key: str, prompt_key: str, widget_key: str, ai_action: str, default: str):
+        """Prompt'u varsayılana döndür (buton callback'i; rerun'dan önce çalışır, ek st.rerun gerekmez)"""
+        st.session_state.setdefault(defaults_key, {}).pop(ai_action, None)
+        st.session_state[prompt_key] = default
+        # Widget durumu silinir; text_area bir sonraki çizimde value= ile (varsayılanla) yeniden oluşur
+        st.session_state.pop(widget_key, None)
+    
+    @st_fragment
+    def _render_prompt_editor(self, ai_action: str, default_prompt: str, default_system_prompt: str):
+        """AI ve sistem prompt'larını düzenleme alanı (düzenlenen değerler session state'e yazılır)"""
         # Mevcut prompt'u al (özel varsayılan, özel prompt veya orijinal varsayılan)
-        custom_defaults = st.session_state.get('custom_defaults', {})
-        custom_system_defaults = st.session_state.get('custom_system_defaults', {})
+        # Sözlükler rerun başına bir kez alınır; aşağıdaki kaydet/sıfırla işlemleri aynı nesneleri değiştirir
+        custom_defaults = st.session_state.setdefault('custom_defaults', {})
+        custom_system_defaults = st.session_state.setdefault('custom_system_defaults', {})
         
         if ai_action in custom_defaults:
             current_prompt = custom_defaults[ai_action]
@@ -1386,6 +2188,7 @@ class StreamlitApp:
                 help="AI modeline gönderilecek prompt'u düzenleyebilirsiniz. {texts} yer tutucusu metinlerle değiştirilecektir.",
                 key="ai_prompt"
             )
+            st.session_state.custom_prompt = custom_prompt
             
             # AI Prompt butonları - AI Prompt'un altında
             ai_col1, ai_col2 = st.columns(2)
@@ -1396,20 +2199,14 @@ class StreamlitApp:
                     st.warning("⚠️ Bu işlem için mevcut varsayılan AI prompt'u değiştireceksiniz. Emin misiniz?")
                     if st.button("✅ Evet, AI Prompt'u Kaydet", key="confirm_ai_save"):
                         # Bu AI işlemi için özel prompt'u kalıcı varsayılan yap
-                        if 'custom_defaults' not in st.session_state:
-                            st.session_state.custom_defaults = {}
-                        st.session_state.custom_defaults[ai_action] = custom_prompt
+                        custom_defaults[ai_action] = custom_prompt
                         st.success(f"✅ '{ai_action}' için AI prompt kaydedildi!")
-                        st.rerun()
                     
             with ai_col2:
-                if st.button("🔄 Varsayılan AI Prompt'a Dön", key="reset_ai_prompt", use_container_width=True):
-                    # AI prompt'a dön
-                    if 'custom_defaults' in st.session_state and ai_action in st.session_state.custom_defaults:
-                        del st.session_state.custom_defaults[ai_action]
-                    st.session_state.custom_prompt = default_prompt
+                if st.button("🔄 Varsayılan AI Prompt'a Dön", key="reset_ai_prompt", use_container_width=True,
+                             on_click=self._reset_prompt,
+                             args=('custom_defaults', 'custom_prompt', 'ai_prompt', ai_action, default_prompt)):
                     st.success("✅ AI prompt'a dönüldü!")
-                    st.rerun()
             
         with col2:
             st.markdown("**⚙️ Sistem Prompt:**")
@@ -1420,6 +2217,7 @@ class StreamlitApp:
                 help="AI modelinin rolünü ve davranışını belirleyen sistem prompt'u düzenleyebilirsiniz.",
                 key="system_prompt"
             )
+            st.session_state.custom_system_prompt = custom_system_prompt
             
             # Sistem Prompt butonları - Sistem Prompt'un altında
             system_col1, system_col2 = st.columns(2)
@@ -1430,32 +2228,83 @@ class StreamlitApp:
                     st.warning("⚠️ Bu işlem için mevcut varsayılan sistem prompt'u değiştireceksiniz. Emin misiniz?")
                     if st.button("✅ Evet, Sistem Prompt'u Kaydet", key="confirm_system_save"):
                         # Bu AI işlemi için özel sistem prompt'u kalıcı varsayılan yap
-                        if 'custom_system_defaults' not in st.session_state:
-                            st.session_state.custom_system_defaults = {}
-                        st.session_state.custom_system_defaults[ai_action] = custom_system_prompt
+                        custom_system_defaults[ai_action] = custom_system_prompt
                         st.success(f"✅ '{ai_action}' için sistem prompt kaydedildi!")
-                        st.rerun()
                         
             with system_col2:
-                if st.button("🔄 Varsayılan Sistem Prompt'una Dön", key="reset_system_prompt", use_container_width=True):
-                    # Sistem prompt'a dön
-                    if 'custom_system_defaults' in st.session_state and ai_action in st.session_state.custom_system_defaults:
-                        del st.session_state.custom_system_defaults[ai_action]
-                    st.session_state.custom_system_prompt = default_system_prompt
+                if st.button("🔄 Varsayılan Sistem Prompt'una Dön", key="reset_system_prompt", use_container_width=True,
+                             on_click=self._reset_prompt,
+                             args=('custom_system_defaults', 'custom_system_prompt', 'system_prompt',
+                                   ai_action, default_system_prompt)):
                     st.success("✅ Sistem prompt'a dönüldü!")
-                    st.rerun()
         
         st.markdown("</div>", unsafe_allow_html=True)
+
+    def _render_ai_analysis(self, table_name: str):
+        """AI analizi bölümünü göster"""
+        st.subheader("🤖 AI Analizi")
+        
+        if not AI_HELPER_AVAILABLE:
+            st.error("AI Helper modülü bulunamadı!")
+            return
+            
+        # AI Helper'ı başlat
+        if not self.ai_helper:
+            try:
+                self.ai_helper = get_ai_helper()
+            except Exception as e:
+                st.error(f"AI Helper başlatılamadı: {e}")
+                return
+                
+        # Metin kolonlarını seç
+        df = st.session_state.table_data
+        
+        # Metin kolonlarını bul (aynı bağlantı/tablo/veri için rerun'larda yeniden hesaplanmaz)
+        engine = st.session_state.get('engine')
+        url_key = engine_cache_key(engine) if engine is not None else ''
+        text_columns = detect_text_columns(url_key, table_name, len(df), tuple(df.columns), df)
+                    
+        if not text_columns:
+            st.warning("Analiz edilecek metin kolonu bulunamadı.")
+            return
+            
+        # Kolon seçimi
+        selected_columns = st.multiselect(
+            "Analiz edilecek kolonları seçin:",
+            text_columns,
+            default=text_columns[:2] if len(text_columns) >= 2 else text_columns
+        )
+        
+        if not selected_columns:
+            st.warning("Lütfen en az bir kolon seçin.")
+            return
+            
+        # Prompt düzenleme bölümü
+        st.subheader("📝 AI Prompt Düzenleme")
+        
+        # Seçilen AI işlemine göre varsayılan prompt'u al
+        ai_action = st.session_state.get('ai_action', 'Özetleme')
+        default_prompt, default_system_prompt = default_prompts(ai_action)
+        
+        # AI işlemi değiştiğinde uygun prompt'u kullan
+        if st.session_state.get('last_ai_action') != ai_action:
+            # Önce özel varsayılan prompt var mı kontrol et
+            st.session_state.custom_prompt = st.session_state.get('custom_defaults', {}).get(ai_action, default_prompt)
+            st.session_state.custom_system_prompt = st.session_state.get('custom_system_defaults', {}).get(
+                ai_action, default_system_prompt
+            )
+                
+            st.session_state.last_ai_action = ai_action
+        
+        # Prompt düzenleyicideki etkileşimler yalnızca düzenleyiciyi yeniden çalıştırır
+        self._render_prompt_editor(ai_action, default_prompt, default_system_prompt)
         
         # AI analizi başlat
         if st.button("🚀 AI Analizini Başlat", type="primary"):
             try:
                 with st.spinner("AI analizi yapılıyor..."):
                     # Seçilen kolonlardan metinleri al
-                    texts = []
-                    for col in selected_columns:
-                        col_texts = df[col].dropna().astype(str).tolist()
-                        texts.extend(col_texts[:50])  # Her kolondan max 50 metin
+                    texts = extract_column_texts(df, selected_columns)
                         
                     if not texts:
                         st.error("Analiz edilecek metin bulunamadı.")
@@ -1464,22 +2313,41 @@ class StreamlitApp:
                     # AI işlemini gerçekleştir
                     ai_model = st.session_state.get('ai_model', 'llama3:latest')
                     ai_action = st.session_state.get('ai_action', 'Özetleme')
+                    
+                    # Yalnızca işlemin prompt'a koyacağı metinler taşınır (birleştirme AIHelper'da tek kez yapılır)
+                    text_limit = lazy_import('ai_helper').AIHelper.TEXT_LIMITS.get(ai_action)
+                    if text_limit:
+                        texts = texts[:text_limit]
                     custom_prompt = st.session_state.get('custom_prompt')
                     custom_system_prompt = st.session_state.get('custom_system_prompt')
                     
-                    if ai_action == "Özetleme":
-                        result = self.ai_helper.summarize_texts(texts, model=ai_model, custom_prompt=custom_prompt, custom_system_prompt=custom_system_prompt)
-                    elif ai_action == "Sınıflandırma":
-                        result = self.ai_helper.classify_texts(texts, model=ai_model, custom_prompt=custom_prompt, custom_system_prompt=custom_system_prompt)
-                    elif ai_action == "Kümelendirme":
-                        result = self.ai_helper.cluster_texts(texts, model=ai_model, custom_prompt=custom_prompt, custom_system_prompt=custom_system_prompt)
-                    elif ai_action == "Trend Analizi":
-                        # Basit tarih simülasyonu
-                        dates = pd.date_range(start='2024-01-01', periods=len(texts), freq='D')
-                        result = self.ai_helper.analyze_trends(texts, dates.astype(str).tolist(), model=ai_model, custom_prompt=custom_prompt, custom_system_prompt=custom_system_prompt)
+                    # Aynı işlem, model, prompt ve metinler için AI tekrar çağrılmaz
+                    cache_key = ai_result_key(ai_action, ai_model, custom_prompt, custom_system_prompt, texts)
+                    ai_results_cache = st.session_state.setdefault('ai_results_cache', OrderedDict())
+                    result = ai_results_cache.get(cache_key)
+                    
+                    if result is None:
+                        if ai_action == "Özetleme":
+                            result = self.ai_helper.summarize_texts(texts, model=ai_model, custom_prompt=custom_prompt, custom_system_prompt=custom_system_prompt)
+                        elif ai_action == "Sınıflandırma":
+                            result = self.ai_helper.classify_texts(texts, model=ai_model, custom_prompt=custom_prompt, custom_system_prompt=custom_system_prompt)
+                        elif ai_action == "Kümelendirme":
+                            result = self.ai_helper.cluster_texts(texts, model=ai_model, custom_prompt=custom_prompt, custom_system_prompt=custom_system_prompt)
+                        elif ai_action == "Trend Analizi":
+                            # Basit tarih simülasyonu
+                            dates = [(TREND_START_DATE + timedelta(days=i)).isoformat() for i in range(len(texts))]
+                            result = self.ai_helper.analyze_trends(texts, dates, model=ai_model, custom_prompt=custom_prompt, custom_system_prompt=custom_system_prompt)
+                        else:
+                            st.error("Geçersiz AI işlemi.")
+                            return
+                        
+                        # Hatalı sonuçlar saklanmaz, sonraki tıklamada yeniden denenir
+                        if 'error' not in result:
+                            ai_results_cache[cache_key] = result
+                            while len(ai_results_cache) > AI_RESULT_CACHE_SIZE:
+                                ai_results_cache.popitem(last=False)
                     else:
-                        st.error("Geçersiz AI işlemi.")
-                        return
+                        ai_results_cache.move_to_end(cache_key)
                         
                     # Sonuçları göster
                     st.session_state.analysis_results = result
@@ -1530,79 +2398,41 @@ class StreamlitApp:
                                 valid_clusters = [c for c in clusters if isinstance(c, dict)]
                                 
                                 if valid_clusters:
-                                    # 5 sütunda kümeleri göster
-                                    cols = st.columns(5)
-                                    for i, cluster in enumerate(valid_clusters):
-                                        cluster_name = cluster.get('name', f'Küme {i+1}')
-                                        texts = cluster.get('texts', [])
-                                        indices = cluster.get('text_indices', [])
-                                        
-                                        with cols[i % 5]:
-                                            # Küme kartı
-                                            st.markdown(f"""
-                                            <div style="
-                                                background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-                                                padding: 12px;
-                                                border-radius: 8px;
-                                                margin: 5px 0;
-                                                color: white;
-                                                box-shadow: 0 2px 4px rgba(0,0,0,0.1);
-                                                min-height: 120px;
-                                            ">
-                                                <h5 style="margin: 0; color: white; font-size: 14px;">🔍 {cluster_name}</h5>
-                                                <p style="margin: 3px 0; font-size: 12px;">📊 {len(texts)} metin</p>
-                                                <p style="margin: 3px 0; font-size: 11px; opacity: 0.9;">{', '.join(map(str, [idx+1 for idx in indices[:5]]))}{'...' if len(indices) > 5 else ''}</p>
-                                            </div>
-                                            """, unsafe_allow_html=True)
-                                            
-                                            # İlk 3 metni kompakt göster
-                                            for j, text in enumerate(texts[:3]):
-                                                st.markdown(f"""
-                                                <div style="
-                                                    background: #f8f9fa;
-                                                    padding: 8px;
-                                                    border-radius: 6px;
-                                                    border-left: 3px solid #667eea;
-                                                    margin: 3px 0;
-                                                    font-size: 11px;
-                                                    max-height: 60px;
-                                                    overflow: hidden;
-                                                ">
-                                                    <strong>#{indices[j]+1 if j < len(indices) else j+1}</strong><br>
-                                                    {text[:50]}{'...' if len(text) > 50 else ''}
-                                                </div>
-                                                """, unsafe_allow_html=True)
-                                            
-                                            # Daha fazla metin varsa expander
-                                            if len(texts) > 3:
-                                                with st.expander(f"+{len(texts)-3} daha"):
-                                                    for j in range(3, min(len(texts), 8)):
-                                                        st.markdown(f"**{indices[j]+1 if j < len(indices) else j+1}:** {texts[j][:60]}{'...' if len(texts[j]) > 60 else ''}")
-                                    
-                                    # 5'ten fazla küme varsa yeni satır
-                                    if len(valid_clusters) > 5:
-                                        st.markdown("---")
-                                        st.write(f"**Diğer {len(valid_clusters)-5} küme:**")
-                                        remaining_cols = st.columns(5)
-                                        for i, cluster in enumerate(valid_clusters[5:]):
-                                            cluster_name = cluster.get('name', f'Küme {i+6}')
+                                    # Kümeleri 5'erli satırlar halinde göster; her satır kendi sütunlarını alır
+                                    for row_start in range(0, len(valid_clusters), 5):
+                                        cols = st.columns(5)
+                                        for offset, cluster in enumerate(valid_clusters[row_start:row_start + 5]):
+                                            i = row_start + offset
+                                            cluster_name = cluster.get('name', f'Küme {i+1}')
                                             texts = cluster.get('texts', [])
                                             indices = cluster.get('text_indices', [])
                                             
-                                            with remaining_cols[i % 5]:
-                                                st.markdown(f"""
-                                                <div style="
-                                                    background: linear-gradient(135deg, #28a745 0%, #20c997 100%);
-                                                    padding: 10px;
-                                                    border-radius: 8px;
-                                                    margin: 3px 0;
-                                                    color: white;
-                                                    box-shadow: 0 2px 4px rgba(0,0,0,0.1);
-                                                ">
-                                                    <h6 style="margin: 0; color: white; font-size: 12px;">🔍 {cluster_name}</h6>
-                                                    <p style="margin: 2px 0; font-size: 10px;">📊 {len(texts)} metin</p>
-                                                </div>
-                                                """, unsafe_allow_html=True)
+                                            with cols[offset]:
+                                                # Küme kartı ve ilk 3 metin tek HTML bloğunda, tek st.markdown ile gönderilir
+                                                html_parts = [CLUSTER_CARD_TEMPLATE.substitute(
+                                                    name=html.escape(str(cluster_name)),
+                                                    count=len(texts),
+                                                    indices=', '.join(str(idx + 1) for idx in indices[:5]) + ('...' if len(indices) > 5 else '')
+                                                )]
+                                                
+                                                # İlk 3 metni kompakt göster
+                                                for j, text in enumerate(texts[:3]):
+                                                    html_parts.append(CLUSTER_TEXT_TEMPLATE.substitute(
+                                                        number=indices[j] + 1 if j < len(indices) else j + 1,
+                                                        text=html.escape(truncate_text(text, 50))
+                                                    ))
+                                                
+                                                st.markdown("".join(html_parts), unsafe_allow_html=True)
+                                                
+                                                # Daha fazla metin varsa expander
+                                                if len(texts) > 3:
+                                                    with st.expander(f"+{len(texts)-3} daha"):
+                                                        # Satırlar tek st.markdown ile gönderilir
+                                                        st.markdown("\n\n".join(
+                                                            f"**{indices[j]+1 if j < len(indices) else j+1}:** {truncate_text(texts[j], 60)}"
+                                                            for j in range(3, min(len(texts), 8))
+                                                        ))
+                                    
                                     # Ham metin gösterilmesin - sadece JSON expander'da görünsün
                             else:
                                 # Ham yanıtı göster
@@ -1644,40 +2474,8 @@ class StreamlitApp:
 def main():
     """Ana uygulama fonksiyonu"""
     # CSS stilleri - SADECE TEMEL STİLLER
-    st.markdown("""
-    <style>
-        .main-header {
-            font-size: 2.5rem;
-            font-weight: bold;
-            color: #1f77b4;
-            text-align: center;
-            margin-bottom: 0.5rem !important;
-        }
-        
-        .metric-card {
-            background-color: #f0f2f6;
-            padding: 1rem;
-            border-radius: 0.5rem;
-            border-left: 4px solid #1f77b4;
-        }
-        
-        .success-box {
-            background-color: #d4edda;
-            border: 1px solid #c3e6cb;
-            border-radius: 0.5rem;
-            padding: 1rem;
-            margin: 1rem 0;
-        }
-        
-        .error-box {
-            background-color: #f8d7da;
-            border: 1px solid #f5c6cb;
-            border-radius: 0.5rem;
-            padding: 1rem;
-            margin: 1rem 0;
-        }
-    </style>
-    """, unsafe_allow_html=True)
+    # Streamlit önceki çalıştırmada çizilmeyen öğeleri kaldırır; stil her rerun'da gönderilmeli
+    st.markdown(APP_CSS, unsafe_allow_html=True)
     
     app = StreamlitApp()
     app.init_session_state()
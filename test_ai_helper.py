@@ -11,12 +11,32 @@ import json
 import requests
 from ai_helper import AIHelper
 
+def mock_response(status_code=200, json_data=None):
+    """Hazır HTTP yanıt mock'u üret"""
+    response = Mock(status_code=status_code)
+    response.json.return_value = json_data or {}
+    return response
+
+@pytest.fixture(autouse=True)
+def _block_network(monkeypatch):
+    """Mock'lanmamış HTTP istekleri bağlantı zaman aşımını beklemeden hata versin"""
+    monkeypatch.setattr('requests.get', Mock(side_effect=RuntimeError("Testlerde ağ erişimi kapalı")))
+    monkeypatch.setattr('requests.post', Mock(side_effect=RuntimeError("Testlerde ağ erişimi kapalı")))
+
+@pytest.fixture(scope="module")
+def shared_ai_helper():
+    """Modül boyunca tek AIHelper (başlatma sırasındaki model isteği mock'lanır)"""
+    with patch('requests.get') as mock_get:
+        mock_get.return_value = mock_response(200, {'models': []})
+        yield AIHelper()
+
 class TestAIHelper:
     """AI Helper test sınıfı"""
     
-    def setup_method(self):
-        """Her test öncesi çalışır"""
-        self.ai_helper = AIHelper()
+    @pytest.fixture(autouse=True)
+    def _use_shared_ai_helper(self, shared_ai_helper):
+        """Her testte paylaşılan AIHelper'ı kullan"""
+        self.ai_helper = shared_ai_helper
         
     def test_init(self):
         """AI Helper başlatma testi"""
@@ -26,15 +46,12 @@ class TestAIHelper:
     @patch('requests.get')
     def test_get_available_models_success(self, mock_get):
         """Mevcut modelleri alma testi - başarılı"""
-        mock_response = Mock()
-        mock_response.status_code = 200
-        mock_response.json.return_value = {
+        mock_get.return_value = mock_response(200, {
             'models': [
                 {'name': 'llama3:latest'},
                 {'name': 'qwen2.5-coder:32b-instruct-q4_0'}
             ]
-        }
-        mock_get.return_value = mock_response
+        })
         
         models = self.ai_helper._get_available_models()
         assert models == ['llama3:latest', 'qwen2.5-coder:32b-instruct-q4_0']
@@ -50,10 +67,7 @@ class TestAIHelper:
     @patch('requests.post')
     def test_call_ollama_success(self, mock_post):
         """Ollama çağrısı testi - başarılı"""
-        mock_response = Mock()
-        mock_response.status_code = 200
-        mock_response.json.return_value = {'response': 'Test yanıtı'}
-        mock_post.return_value = mock_response
+        mock_post.return_value = mock_response(200, {'response': 'Test yanıtı'})
         
         result = self.ai_helper._call_ollama('llama3:latest', 'Test prompt')
         assert result == 'Test yanıtı'
@@ -66,62 +80,47 @@ class TestAIHelper:
         result = self.ai_helper._call_ollama('llama3:latest', 'Test prompt')
         assert result == ""
         
-    @patch.object(AIHelper, '_call_ollama')
-    def test_summarize_texts(self, mock_call):
-        """Metin özetleme testi"""
-        mock_call.return_value = "Bu bir özet."
-        
-        texts = ["Metin 1", "Metin 2", "Metin 3"]
-        result = self.ai_helper.summarize_texts(texts, 'llama3:latest')
-        
-        assert 'summary' in result
-        assert result['summary'] == "Bu bir özet."
-        assert result['model'] == 'llama3:latest'
-        assert result['text_count'] == 3
-        
-    @patch.object(AIHelper, '_call_ollama')
-    def test_classify_texts(self, mock_call):
-        """Metin sınıflandırma testi"""
-        mock_call.return_value = "Teknik"
-        
-        texts = ["Bu teknik bir metin", "Bu genel bir metin"]
-        result = self.ai_helper.classify_texts(texts, 'llama3:latest')
-        
-        assert 'classifications' in result
-        assert len(result['classifications']) == 2
-        assert result['model'] == 'llama3:latest'
-        
-    @patch.object(AIHelper, '_call_ollama')
-    def test_cluster_texts(self, mock_call):
-        """Metin kümelendirme testi"""
-        mock_call.return_value = "Grup 1: Teknik - Metinler: 1,2"
-        
-        texts = ["Teknik metin 1", "Teknik metin 2", "Genel metin"]
-        result = self.ai_helper.cluster_texts(texts, 'llama3:latest')
-        
-        assert 'clusters' in result
-        assert result['model'] == 'llama3:latest'
-        assert result['text_count'] == 3
-        
-    @patch.object(AIHelper, '_call_ollama')
-    def test_analyze_trends(self, mock_call):
-        """Trend analizi testi"""
-        mock_call.return_value = "Artış trendi gözleniyor"
-        
-        texts = ["Ocak verisi", "Şubat verisi", "Mart verisi"]
-        dates = ["2024-01-01", "2024-02-01", "2024-03-01"]
-        result = self.ai_helper.analyze_trends(texts, dates, 'llama3:latest')
-        
-        assert 'trends' in result
-        assert result['model'] == 'llama3:latest'
-        assert result['text_count'] == 3
+    @pytest.mark.parametrize("method,args,stub_response,result_key,text_count", [
+        ('summarize_texts', (["Metin 1", "Metin 2", "Metin 3"],),
+         "Bu bir özet.", 'summary', 3),
+        ('classify_texts', (["Bu teknik bir metin", "Bu genel bir metin"],),
+         "Teknik", 'classifications', 2),
+        ('cluster_texts', (["Teknik metin 1", "Teknik metin 2", "Genel metin"],),
+         "Grup 1: Teknik - Metinler: 1,2", 'clusters', 3),
+        ('analyze_trends', (["Ocak verisi", "Şubat verisi", "Mart verisi"],
+                            ["2024-01-01", "2024-02-01", "2024-03-01"]),
+         "Artış trendi gözleniyor", 'trends', 3),
+    ])
+    def test_ai_method(self, method, args, stub_response, result_key, text_count):
+        """Özetleme/sınıflandırma/kümelendirme/trend analizi testi"""
+        with patch.object(AIHelper, '_call_ollama', return_value=stub_response):
+            result = getattr(self.ai_helper, method)(*args, 'llama3:latest')
+        
+        assert result_key in result
+        assert result['model_used'] == 'llama3:latest'
+        assert result['texts_analyzed'] == text_count
+
+    @pytest.mark.parametrize("method,analysis_type", [
+        ('summarize_texts', "Özetleme"),
+        ('cluster_texts', "Kümelendirme"),
+        ('analyze_trends', "Trend Analizi"),
+    ])
+    def test_texts_analyzed_follows_text_limits(self, method, analysis_type, monkeypatch):
+        """texts_analyzed değeri TEXT_LIMITS ile aynı sınırı kullanmalı"""
+        monkeypatch.setitem(AIHelper.TEXT_LIMITS, analysis_type, 4)
+        texts = [f"Metin {i}" for i in range(30)]
+        args = (texts, [f"2024-01-{i + 1:02d}" for i in range(30)]) if method == 'analyze_trends' else (texts,)
+        with patch.object(AIHelper, '_call_ollama', return_value="Grup 1: A - Metinler: 1") as mock_call:
+            result = getattr(self.ai_helper, method)(*args, 'llama3:latest')
+        
+        assert result['texts_analyzed'] == 4
+        prompt = mock_call.call_args[0][1]
+        assert "Metin 3" in prompt and "Metin 4" not in prompt
         
     @patch('requests.get')
     def test_test_connection_success(self, mock_get):
         """Bağlantı testi - başarılı"""
-        mock_response = Mock()
-        mock_response.status_code = 200
-        mock_get.return_value = mock_response
+        mock_get.return_value = mock_response(200)
         
         result = self.ai_helper.test_connection()
         assert result == True
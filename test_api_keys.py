@@ -3,21 +3,54 @@
 API Anahtarlarını Test Etme Scripti
 """
 import os
+import pytest
+from pathlib import Path
 from dotenv import load_dotenv
 import openai
 import google.generativeai as genai
 
-# .env dosyasını yükle
-load_dotenv('.env')
+# .env dosyasını yükle (aynı süreçte/alt süreçlerde tekrar ayrıştırma)
+if not os.environ.get('_ENV_LOADED'):
+    load_dotenv('.env')
+    os.environ['_ENV_LOADED'] = '1'
 
-def test_openai():
-    """OpenAI API anahtarını test et"""
-    api_key = os.getenv('OPENAI_API_KEY')
-    print(f"OpenAI API Key (ilk 10 karakter): {api_key[:10]}...")
-    
+# pytest-recording kasetleri: cassettes/<modül>/<test>.yaml
+CASSETTE_DIR = Path(__file__).parent / 'cassettes' / 'test_api_keys'
+
+# Kasetlere API anahtarı yazılmasın
+VCR_FILTER_HEADERS = ['authorization', 'x-goog-api-key']
+VCR_FILTER_QUERY_PARAMETERS = ['key']
+
+@pytest.fixture(scope='module')
+def vcr_config():
+    """pytest-recording ayarları: anahtarları kasetten temizle"""
+    return {
+        'filter_headers': VCR_FILTER_HEADERS,
+        'filter_query_parameters': VCR_FILTER_QUERY_PARAMETERS,
+    }
+
+def _api_key_or_skip(request, env_name):
+    """API anahtarını döndür; ne anahtar ne de oynatılabilir kaset varsa testi atla"""
+    api_key = os.getenv(env_name)
+    if (CASSETTE_DIR / f"{request.node.name}.yaml").exists():
+        # Kasetteki istekler anahtarsız kaydedilir; oynatmak için yer tutucu yeterli
+        return api_key or "kaset-oynatma"
     if not api_key:
-        print("❌ OpenAI API anahtarı bulunamadı")
-        return False
+        pytest.skip(f"{env_name} tanımlı değil ve {request.node.name} için kaset yok")
+    # pytest-recording varsayılan 'none' kipinde kaset yoksa ağ isteklerini engeller
+    if request.config.getoption("--record-mode", default=None) == "none":
+        pytest.skip(f"{request.node.name} kaseti yok; kaydetmek için --record-mode=once kullanın")
+    return api_key
+
+def _is_quota_error(error):
+    """Kota/limit hatası mı (anahtar geçerli, yalnızca limit aşıldı)"""
+    message = str(error)
+    return "quota" in message.lower() or "429" in message
+
+@pytest.mark.vcr
+def test_openai(request):
+    """OpenAI API anahtarını test et"""
+    api_key = _api_key_or_skip(request, 'OPENAI_API_KEY')
     
     try:
         client = openai.OpenAI(api_key=api_key)
@@ -26,49 +59,29 @@ def test_openai():
             messages=[{"role": "user", "content": "Merhaba"}],
             max_tokens=5
         )
-        print("✅ OpenAI API anahtarı geçerli")
-        return True
     except Exception as e:
-        if "quota" in str(e).lower() or "429" in str(e):
-            print("⚠️ OpenAI API anahtarı geçerli ama quota aşıldı")
-            return True  # Anahtar geçerli, sadece limit aşıldı
-        else:
-            print(f"❌ OpenAI API anahtarı geçersiz: {e}")
-            return False
+        if not _is_quota_error(e):
+            pytest.fail(f"OpenAI API anahtarı geçersiz: {e}")
+        return  # Anahtar geçerli, sadece limit aşıldı
+    
+    assert response.choices, "OpenAI yanıtı boş"
 
-def test_gemini():
+@pytest.mark.vcr
+def test_gemini(request):
     """Gemini API anahtarını test et"""
-    api_key = os.getenv('GEMINI_API_KEY')
-    print(f"Gemini API Key (ilk 10 karakter): {api_key[:10]}...")
-    
-    if not api_key:
-        print("❌ Gemini API anahtarı bulunamadı")
-        return False
+    api_key = _api_key_or_skip(request, 'GEMINI_API_KEY')
     
     try:
-        genai.configure(api_key=api_key)
+        # gRPC trafiği kaydedilemez; VCR'ın yakalayabilmesi için REST kullan
+        genai.configure(api_key=api_key, transport='rest')
         model = genai.GenerativeModel('gemini-1.5-pro')
         response = model.generate_content("Merhaba")
-        print("✅ Gemini API anahtarı geçerli")
-        return True
     except Exception as e:
-        if "quota" in str(e).lower() or "429" in str(e):
-            print("⚠️ Gemini API anahtarı geçerli ama quota aşıldı")
-            return True  # Anahtar geçerli, sadece limit aşıldı
-        else:
-            print(f"❌ Gemini API anahtarı geçersiz: {e}")
-            return False
+        if not _is_quota_error(e):
+            pytest.fail(f"Gemini API anahtarı geçersiz: {e}")
+        return  # Anahtar geçerli, sadece limit aşıldı
+    
+    assert response.candidates, "Gemini yanıtı boş"
 
 if __name__ == "__main__":
-    print("🔑 API Anahtarlarını Test Ediyorum...")
-    print("=" * 50)
-    
-    openai_ok = test_openai()
-    print()
-    gemini_ok = test_gemini()
-    
-    print("=" * 50)
-    if openai_ok and gemini_ok:
-        print("🎉 Tüm API anahtarları geçerli!")
-    else:
-        print("⚠️  Bazı API anahtarları geçersiz. Lütfen kontrol edin.") 
\ No newline at end of file
+    pytest.main([__file__, "-v"])
@@ -4,40 +4,64 @@
 Bu dosya auth.py modülünün testlerini içerir.
 """
 
-import pytest
-import tempfile
 import os
+import pytest
+import sqlite3
+import uuid
 from auth import AuthSystem, UserRole, User, JWTManager
-from datetime import datetime
+from sqlite_config import synchronous_mode
+from datetime import datetime, timezone
+
+@pytest.fixture(scope="module")
+def temp_db():
+    """Bellekte paylaşımlı geçici veritabanı oluştur"""
+    # pytest-xdist işçileri arasında çakışmasın diye işçi adı da eklenir
+    worker = os.environ.get('PYTEST_XDIST_WORKER', 'gw0')
+    db_uri = f"file:auth_test_{worker}_{uuid.uuid4().hex}?mode=memory&cache=shared"
+    # Bellekteki veritabanı son bağlantı kapanınca silinir; testler boyunca açık tutulur
+    keeper = sqlite3.connect(db_uri, uri=True)
+    
+    yield db_uri
+    
+    keeper.close()
+
+@pytest.fixture(scope="module")
+def auth_system(temp_db):
+    """Modül boyunca tek AuthSystem (şema bir kez oluşturulur)"""
+    return AuthSystem(temp_db)
+
+@pytest.fixture(scope="module")
+def demo_user():
+    """JWT testleri için ortak kullanıcı"""
+    return User(
+        id=1,
+        username="testuser",
+        password_hash="hash",
+        role=UserRole.ADMIN
+    )
+
+@pytest.fixture(scope="module")
+def demo_token(demo_user):
+    """Modül boyunca tek JWT token"""
+    return JWTManager.create_token(demo_user)
 
 class TestAuthSystem:
     """AuthSystem sınıfı için testler"""
     
-    @pytest.fixture
-    def temp_db(self):
-        """Geçici veritabanı oluştur"""
-        with tempfile.NamedTemporaryFile(suffix='.db', delete=False) as f:
-            db_path = f.name
-        
-        yield db_path
-        
-        # Test sonrası temizlik
-        if os.path.exists(db_path):
-            os.unlink(db_path)
-    
-    @pytest.fixture
-    def auth_system(self, temp_db):
-        """Test için AuthSystem instance'ı oluştur"""
-        return AuthSystem(temp_db)
+    @pytest.fixture(autouse=True)
+    def clean_users(self, auth_system):
+        """Her test sonrası kullanıcı tablosunu boşalt"""
+        yield
+        # Bekleyen last_login yazımları bir sonraki testin satırlarına karışmasın
+        auth_system.flush_last_logins()
+        with sqlite3.connect(auth_system.db_path, uri=True) as conn:
+            conn.execute("DELETE FROM users")
+            conn.execute("DELETE FROM sqlite_sequence WHERE name = 'users'")
     
     def test_init_database(self, auth_system):
         """Veritabanı başlatma testi"""
-        # Veritabanı dosyasının oluşturulduğunu kontrol et
-        assert os.path.exists(auth_system.db_path)
-        
         # Tabloların oluşturulduğunu kontrol et
-        import sqlite3
-        with sqlite3.connect(auth_system.db_path) as conn:
+        with sqlite3.connect(auth_system.db_path, uri=True) as conn:
             cursor = conn.cursor()
             cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='users'")
             assert cursor.fetchone() is not None
@@ -117,6 +141,28 @@ class TestAuthSystem:
         user = auth_system.authenticate_user("nonexistent", "testpass")
         assert user is None
     
+    def test_last_login_flush(self, auth_system):
+        """Girişin son giriş zamanı flush ile veritabanına yazılır (UTC)"""
+        auth_system.create_user("testuser", "testpass", UserRole.ADMIN)
+        assert auth_system.get_user_by_username("testuser").last_login is None
+        
+        auth_system.authenticate_user("testuser", "testpass")
+        auth_system.flush_last_logins()
+        
+        last_login = auth_system.get_user_by_username("testuser").last_login
+        assert last_login is not None
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        assert abs((now - last_login).total_seconds()) < 60
+    
+    def test_last_login_flush_registered_once(self, temp_db, monkeypatch):
+        """Çıkışta yalnızca modülün auth_system'i flush edilir; yeni örnekler atexit'te birikmez"""
+        registered = []
+        monkeypatch.setattr('auth.atexit.register', registered.append)
+        
+        AuthSystem(temp_db)
+        
+        assert registered == []
+    
     def test_list_users(self, auth_system):
         """Kullanıcı listesi testi"""
         # Başlangıçta boş olmalı
@@ -155,32 +201,15 @@ class TestAuthSystem:
 class TestJWTManager:
     """JWTManager sınıfı için testler"""
     
-    def test_create_token(self):
+    def test_create_token(self, demo_token):
         """JWT token oluşturma testi"""
-        user = User(
-            id=1,
-            username="testuser",
-            password_hash="hash",
-            role=UserRole.ADMIN
-        )
-        
-        token = JWTManager.create_token(user)
-        assert token is not None
-        assert isinstance(token, str)
-        assert len(token) > 0
+        assert demo_token is not None
+        assert isinstance(demo_token, str)
+        assert len(demo_token) > 0
     
-    def test_verify_token(self):
+    def test_verify_token(self, demo_token):
         """JWT token doğrulama testi"""
-        user = User(
-            id=1,
-            username="testuser",
-            password_hash="hash",
-            role=UserRole.ADMIN
-        )
-        
-        # Geçerli token oluştur
-        token = JWTManager.create_token(user)
-        payload = JWTManager.verify_token(token)
+        payload = JWTManager.verify_token(demo_token)
         
         assert payload is not None
         assert payload["sub"] == "testuser"
@@ -199,17 +228,17 @@ class TestJWTManager:
 class TestUserRole:
     """UserRole enum testi"""
     
-    def test_user_roles(self):
+    @pytest.mark.parametrize("role,value", [
+        (UserRole.ADMIN, "admin"),
+        (UserRole.ANALYST, "analyst"),
+        (UserRole.VIEWER, "viewer"),
+    ])
+    def test_user_roles(self, role, value):
         """Kullanıcı rolleri testi"""
-        assert UserRole.ADMIN.value == "admin"
-        assert UserRole.ANALYST.value == "analyst"
-        assert UserRole.VIEWER.value == "viewer"
+        assert role.value == value
         
         # Enum değerlerini kontrol et
-        roles = [role.value for role in UserRole]
-        assert "admin" in roles
-        assert "analyst" in roles
-        assert "viewer" in roles
+        assert value in [r.value for r in UserRole]
 
 class TestUserModel:
     """User Pydantic model testi"""
@@ -245,6 +274,18 @@ class TestUserModel:
                 role=UserRole.ADMIN
             )
 
+class TestSqliteConfig:
+    """Ortak SQLite ayarları testleri"""
+    
+    def test_synchronous_mode(self, monkeypatch):
+        """Bilinen değerler normalize edilir, diğerleri reddedilir"""
+        monkeypatch.setenv('SQLITE_SYNCHRONOUS', ' full ')
+        assert synchronous_mode() == 'FULL'
+        
+        monkeypatch.setenv('SQLITE_SYNCHRONOUS', 'NORMAL; DROP TABLE users')
+        with pytest.raises(ValueError):
+            synchronous_mode()
+
 if __name__ == "__main__":
     # Testleri çalıştır
     pytest.main([__file__, "-v"]) 
\ No newline at end of file
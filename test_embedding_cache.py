@@ -7,9 +7,33 @@ Bu dosya embedding_cache.py modülünün testlerini içerir.
 import pytest
 import tempfile
 import os
+import hashlib
+import sqlite3
 import numpy as np
+import embedding_cache
 from embedding_cache import EmbeddingCache
-import time
+
+@pytest.fixture(scope="session")
+def st_model():
+    """Oturum boyunca tek SentenceTransformer modeli (yalnızca bir kez yüklenir)"""
+    try:
+        from sentence_transformers import SentenceTransformer
+        return SentenceTransformer("all-MiniLM-L6-v2")
+    except Exception as e:
+        # İnternet bağlantısı yoksa testleri atla
+        pytest.skip(f"Model yüklenemedi (internet bağlantısı gerekli): {e}")
+
+class HashEncoder:
+    """Metnin hash'inden belirlenimci vektör üreten hafif encoder (gerçek model yerine)"""
+    
+    dimension = 384
+    
+    def encode(self, text, **kwargs):
+        if isinstance(text, list):
+            return np.stack([self.encode(item) for item in text])
+        digest = hashlib.sha256(text.encode('utf-8')).digest()
+        repeated = digest * (self.dimension // len(digest))
+        return np.frombuffer(repeated, dtype=np.uint8).astype(np.float32) / 255
 
 class TestEmbeddingCache:
     """EmbeddingCache sınıfı için testler"""
@@ -22,18 +46,15 @@ class TestEmbeddingCache:
         
         yield db_path
         
-        # Test sonrası temizlik
-        if os.path.exists(db_path):
-            os.unlink(db_path)
+        # Test sonrası temizlik (WAL yan dosyaları dahil)
+        for path in (db_path, db_path + '-wal', db_path + '-shm'):
+            if os.path.exists(path):
+                os.unlink(path)
     
     @pytest.fixture
     def cache(self, temp_db):
-        """Test için EmbeddingCache instance'ı oluştur"""
-        try:
-            return EmbeddingCache(db_path=temp_db)
-        except Exception as e:
-            # İnternet bağlantısı yoksa test'i atla
-            pytest.skip(f"Model yüklenemedi (internet bağlantısı gerekli): {e}")
+        """Test için EmbeddingCache instance'ı oluştur (model yerine hash tabanlı encoder)"""
+        return EmbeddingCache(db_path=temp_db, model=HashEncoder())
     
     def test_init_database(self, cache):
         """Veritabanı başlatma testi"""
@@ -57,7 +78,74 @@ class TestEmbeddingCache:
         
         assert hash1 == hash2  # Aynı metin aynı hash
         assert hash1 != hash3  # Farklı metin farklı hash
-        assert len(hash1) == 64  # SHA256 hash uzunluğu
+        # xxh3_128: 128 bit; xxhash kurulu değilse sha256 (256 bit)
+        assert len(hash1) == (32 if cache.hash_algorithm == "xxh3_128" else 64)
+    
+    def test_sha256_hashing(self, temp_db):
+        """Eski kayıtlarla uyumlu SHA256 hash'leme testi"""
+        cache = EmbeddingCache(db_path=temp_db, model=HashEncoder(), hash_algorithm="sha256")
+        assert len(cache._hash_text("Merhaba dünya")) == 64
+        
+        with pytest.raises(ValueError):
+            EmbeddingCache(db_path=temp_db, model=HashEncoder(), hash_algorithm="md5")
+    
+    def test_xxhash_missing_falls_back_to_sha256(self, temp_db, monkeypatch):
+        """xxhash yoksa anahtarlar adıyla birlikte sha256'ya düşmeli"""
+        monkeypatch.setattr('embedding_cache.XXHASH_AVAILABLE', False)
+        cache = EmbeddingCache(db_path=temp_db, model=HashEncoder())
+        
+        assert cache.hash_algorithm == "sha256"
+        assert cache._hash_text("Merhaba dünya") == hashlib.sha256("Merhaba dünya".encode('utf-8')).hexdigest()
+    
+    def test_legacy_sha256_db_keeps_hits(self, temp_db):
+        """cache_meta'sız eski (sha256) veritabanı varsayılanla açıldığında kayıtlar ıskalanmamalı"""
+        legacy = EmbeddingCache(db_path=temp_db, model=HashEncoder(), hash_algorithm="sha256")
+        legacy.get_embedding("Eski metin")
+        with sqlite3.connect(temp_db) as conn:
+            conn.execute("DROP TABLE cache_meta")
+        
+        cache = EmbeddingCache(db_path=temp_db, model=HashEncoder())
+        cache.get_embedding("Eski metin")
+        
+        assert cache.hash_algorithm == "sha256"
+        assert cache.get_cache_size() == 1
+        assert cache.get_cache_stats()['cache_hits'] == 1
+    
+    def test_stored_hash_algorithm_wins(self, temp_db):
+        """Veritabanına kayıtlı algoritma, istenen algoritmadan önce gelmeli"""
+        EmbeddingCache(db_path=temp_db, model=HashEncoder(), hash_algorithm="sha256").get_embedding("Metin")
+        
+        cache = EmbeddingCache(db_path=temp_db, model=HashEncoder(), hash_algorithm="xxh3_128")
+        
+        assert cache.hash_algorithm == "sha256"
+    
+    def test_clear_cache_switches_to_preferred_algorithm(self, temp_db):
+        """Cache temizlenince tercih edilen algoritmaya geçilmeli ve bu kalıcı olmalı"""
+        EmbeddingCache(db_path=temp_db, model=HashEncoder(), hash_algorithm="sha256").get_embedding("Metin")
+        cache = EmbeddingCache(db_path=temp_db, model=HashEncoder())
+        expected = "xxh3_128" if embedding_cache.XXHASH_AVAILABLE else "sha256"
+        
+        cache.clear_cache()
+        cache.get_embedding("Metin")
+        
+        assert cache.hash_algorithm == expected
+        assert EmbeddingCache(db_path=temp_db, model=HashEncoder()).hash_algorithm == expected
+    
+    def test_stored_xxhash_without_xxhash_clears_entries(self, temp_db, monkeypatch):
+        """xxh3_128 anahtarlı cache xxhash olmadan açılırsa kopya kayıt üretmemek için temizlenmeli"""
+        EmbeddingCache(db_path=temp_db, model=HashEncoder(), hash_algorithm="sha256")
+        with sqlite3.connect(temp_db) as conn:
+            conn.execute("UPDATE cache_meta SET value = 'xxh3_128' WHERE key = 'hash_algorithm'")
+            conn.execute(
+                "INSERT INTO embeddings (text_hash, text_content, embedding_vector, model_name) "
+                "VALUES ('abc', 'Metin', x'00', 'test')"
+            )
+        monkeypatch.setattr('embedding_cache.XXHASH_AVAILABLE', False)
+        
+        cache = EmbeddingCache(db_path=temp_db, model=HashEncoder())
+        
+        assert cache.hash_algorithm == "sha256"
+        assert cache.get_cache_size() == 0
     
     def test_embedding_serialization(self, cache):
         """Embedding serileştirme testi"""
@@ -65,8 +153,16 @@ class TestEmbeddingCache:
         serialized = cache._serialize_embedding(original)
         deserialized = cache._deserialize_embedding(serialized)
         
-        assert isinstance(serialized, str)
-        assert np.array_equal(original, deserialized)
+        assert isinstance(serialized, bytes)
+        assert len(serialized) == 4 + original.size  # float32 ölçek + int8 değerler
+        # int8 nicemleme hatası en fazla yarım adım (ölçek / 2)
+        assert np.allclose(original, deserialized, atol=4.0 / 127 / 2)
+        
+        # Sıfır vektörü bozulmadan saklanmalı
+        assert np.array_equal(cache._deserialize_embedding(cache._serialize_embedding(np.zeros(3))), np.zeros(3))
+        
+        # Eski JSON kayıtları okunabilmeli
+        assert np.array_equal(cache._deserialize_embedding("[1.0, 2.0]"), np.array([1.0, 2.0]))
     
     def test_get_embedding_new_text(self, cache):
         """Yeni metin embedding testi"""
@@ -89,8 +185,8 @@ class TestEmbeddingCache:
         embedding2 = cache.get_embedding(text)
         size_after_second = cache.get_cache_size()
         
-        # Aynı embedding döndürülmeli
-        assert np.array_equal(embedding1, embedding2)
+        # Aynı embedding döndürülmeli (cache'teki kopya int8 nicemlenmiştir)
+        assert np.allclose(embedding1, embedding2, atol=np.abs(embedding1).max() / 127)
         # Cache boyutu değişmemeli
         assert size_after_first == size_after_second
     
@@ -145,10 +241,21 @@ class TestEmbeddingCache:
         cache.clear_cache()
         assert cache.get_cache_size() == 0
     
+    def test_timestamp_is_utc(self, cache):
+        """Zaman damgaları CURRENT_TIMESTAMP gibi UTC olmalı (yerel saat dilimi karışmamalı)"""
+        cache._now = lambda: 0.0
+        
+        assert cache._timestamp() == "1970-01-01 00:00:00.000000"
+    
     def test_get_oldest_embeddings(self, cache):
         """Eski embedding'leri listeleme testi"""
+        counter = [0]
+        def fake_clock():
+            counter[0] += 1
+            return counter[0]
+        cache._now = fake_clock  # sleep yerine her çağrıda ilerleyen saat
+        
         cache.get_embedding("İlk metin")
-        time.sleep(0.1)  # Zaman farkı için
         cache.get_embedding("İkinci metin")
         
         oldest = cache.get_oldest_embeddings(limit=5)
@@ -170,15 +277,15 @@ class TestEmbeddingCache:
     
     def test_multiple_models(self, temp_db):
         """Farklı modeller testi"""
-        cache1 = EmbeddingCache(db_path=temp_db, model_name="all-MiniLM-L6-v2")
-        cache2 = EmbeddingCache(db_path=temp_db, model_name="all-MiniLM-L6-v2")
+        cache1 = EmbeddingCache(db_path=temp_db, model_name="all-MiniLM-L6-v2", model=HashEncoder())
+        cache2 = EmbeddingCache(db_path=temp_db, model_name="all-MiniLM-L6-v2", model=HashEncoder())
         
         text = "Test metni"
         embedding1 = cache1.get_embedding(text)
         embedding2 = cache2.get_embedding(text)
         
-        # Aynı model aynı embedding üretmeli
-        assert np.array_equal(embedding1, embedding2)
+        # Aynı model aynı embedding üretmeli (ikincisi int8 nicemlenmiş cache'ten gelir)
+        assert np.allclose(embedding1, embedding2, atol=np.abs(embedding1).max() / 127)
     
     def test_large_text(self, cache):
         """Büyük metin testi"""
@@ -196,34 +303,48 @@ class TestEmbeddingCache:
         assert isinstance(embedding, np.ndarray)
         assert embedding.shape[0] > 0
     
-    def test_concurrent_access(self, temp_db):
-        """Eşzamanlı erişim testi"""
-        import threading
+    def test_get_embeddings_batch(self, cache):
+        """Toplu embedding testi"""
+        cache.get_embedding("Metin 1")
         
-        cache = EmbeddingCache(db_path=temp_db)
-        results = []
+        texts = ["Metin 1", "Metin 2", "Metin 3", "Metin 2"]
+        embeddings = cache.get_embeddings_batch(texts)
         
-        def embed_text(text):
-            try:
-                embedding = cache.get_embedding(text)
-                results.append((text, embedding.shape))
-            except Exception as e:
-                results.append((text, str(e)))
+        assert len(embeddings) == 4
+        assert np.array_equal(embeddings[0], cache.get_embedding("Metin 1"))
+        assert np.array_equal(embeddings[1], embeddings[3])
+        assert cache.get_cache_size() == 3
         
-        threads = []
-        texts = [f"Test metni {i}" for i in range(5)]
+        stats = cache.get_cache_stats()
+        assert stats["cache_misses"] == 3  # İlk tekil çağrı + iki yeni metin
         
-        for text in texts:
-            thread = threading.Thread(target=embed_text, args=(text,))
-            threads.append(thread)
-            thread.start()
+        with pytest.raises(ValueError):
+            cache.get_embeddings_batch(["Metin", "  "])
+    
+    def test_concurrent_access(self, cache):
+        """Eşzamanlı erişim testi (SQLite kilitlenmesi)"""
+        from concurrent.futures import ThreadPoolExecutor
+        
+        texts = [f"Test metni {i}" for i in range(5)]
         
-        for thread in threads:
-            thread.join()
+        # map sonuçları giriş sırasıyla döndürür; iş parçacığındaki hata burada yükselir
+        with ThreadPoolExecutor(max_workers=5) as executor:
+            results = list(executor.map(cache.get_embedding, texts))
         
         assert len(results) == 5
-        for text, result in results:
-            assert isinstance(result, tuple)  # (text, shape) tuple'ı
+        assert all(embedding.shape == results[0].shape for embedding in results)
+    
+    @pytest.mark.slow
+    def test_real_model_encoding(self, temp_db, st_model):
+        """Gerçek model ile embedding testi"""
+        cache = EmbeddingCache(db_path=temp_db, model=st_model)
+        
+        embedding1 = cache.get_embedding("Gerçek model ile test metni")
+        embedding2 = cache.get_embedding("Gerçek model ile test metni")
+        
+        assert embedding1.shape == (384,)
+        assert np.allclose(embedding1, embedding2, atol=np.abs(embedding1).max() / 127)
+        assert cache.get_cache_size() == 1
 
 
 def test_cli_arguments():
@@ -9,66 +9,168 @@ Bu dosya explorer.py modülünün test fonksiyonlarını içerir.
 import pytest
 import pandas as pd
 import numpy as np
-import tempfile
+import sqlalchemy as sa
 import os
 import json
-from unittest.mock import Mock, patch, MagicMock
+import re
+import sys
+from contextlib import ExitStack
+from dataclasses import dataclass
+from types import MappingProxyType, SimpleNamespace
+from typing import Any
+from unittest.mock import DEFAULT, Mock, patch, MagicMock
 from datetime import datetime
 
-# Test edilecek modülü import et
 try:
-    from explorer import DataExplorer
+    from orjson import loads as json_loads
 except ImportError:
-    pytest.skip("explorer modülü bulunamadı", allow_module_level=True)
+    json_loads = json.loads
+
+# Test edilecek modülü import et
+explorer_module = pytest.importorskip("explorer", reason="explorer modülü bulunamadı")
+DataExplorer = explorer_module.DataExplorer
+
+@dataclass
+class FakeColumn:
+    """sa.Table kolonlarının get_table_schema'nın okuduğu alanları"""
+    name: str
+    type: str
+    nullable: bool = True
+    primary_key: bool = False
+    unique: bool = False
+    default: Any = None
+
+# İlk kolon primary key
+MOCK_COLS = [
+    FakeColumn('id', 'VARCHAR(50)', primary_key=True),
+    FakeColumn('name', 'VARCHAR(60)'),
+    FakeColumn('description', 'VARCHAR(70)'),
+]
+
+# Metin fixture'ları: modülde bir kez kurulan, sys.intern ile paylaşılan değişmez demetler
+_DESCRIPTIONS = tuple(sys.intern(text) for text in (
+    'Bu bir açıklama metnidir',
+    'Başka bir açıklama',
+    'Üçüncü açıklama metni',
+    'Dördüncü açıklama',
+    'Beşinci açıklama metni'
+))
+_NOTES = tuple(sys.intern(text) if text is not None else None for text in (
+    'Bu bir not metnidir ve oldukça uzun olabilir',
+    'Kısa not',
+    'Orta uzunlukta bir not metni',
+    None,
+    'Son not metni'
+))
+_TEST_TEXTS = tuple(sys.intern(text) for text in (
+    'Bu bir test metnidir',
+    'Başka bir test metni',
+    'Üçüncü test metni',
+    'Dördüncü test metni',
+    'Beşinci test metni'
+))
+
+# test_error_handling'in beklediği hata mesajları
+_CONN_RE = re.compile(r'Connection failed')
+_TABLE_RE = re.compile(r'nonexistent_table')
+
+# get_text_columns testi için sabit analiz sonucu (salt okunur, modülde bir kez kurulur)
+_MOCK_ANALYSIS = MappingProxyType({
+    'columns_analysis': {
+        'id': {
+            'is_text': False,
+            'null_percentage': 0,
+            'unique_percentage': 100
+        },
+        'name': {
+            'is_text': True,
+            'null_percentage': 0,
+            'unique_percentage': 80,
+            'text_analysis': {
+                'avg_length': 10,
+                'avg_words_per_text': 2
+            }
+        },
+        'description': {
+            'is_text': True,
+            'null_percentage': 10,
+            'unique_percentage': 90,
+            'text_analysis': {
+                'avg_length': 50,
+                'avg_words_per_text': 8
+            }
+        },
+        'aciklama': {
+            'is_text': True,
+            'null_percentage': 5,
+            'unique_percentage': 85,
+            'text_analysis': {
+                'avg_length': 30,
+                'avg_words_per_text': 5
+            }
+        }
+    }
+})
+
+# explorer'daki tüm zaman damgaları için sabit an
+FROZEN_NOW = datetime(2024, 1, 1)
+
+@pytest.fixture(scope="module", autouse=True)
+def _freeze_time():
+    """explorer.datetime.now() modül boyunca sabit değer döndürsün (deterministik çıktı)"""
+    with patch('explorer.datetime') as mock_datetime:
+        mock_datetime.now.return_value = FROZEN_NOW
+        yield
+
+@pytest.fixture(scope="module")
+def mock_engine():
+    """Mock SQLAlchemy engine"""
+    mock_engine = Mock()
+    return mock_engine
+
+@pytest.fixture(scope="module")
+def sample_dataframe():
+    """Test için örnek veri çerçevesi (modülde bir kez; değiştirecek test df.copy(deep=False) kullanmalı)"""
+    # Kolonlar hedef dtype'larıyla hazır verilir; pandas tür çıkarımı yapmaz
+    data = {
+        'id': np.arange(1, 6, dtype=np.int32),
+        'name': np.array(['Ahmet', 'Mehmet', 'Ayşe', 'Fatma', 'Ali'], dtype=object),
+        'description': np.array(_DESCRIPTIONS, dtype=object),
+        'age': np.array([25, 30, 35, 28, 32], dtype=np.int16),
+        'email': np.array(['ahmet@test.com', 'mehmet@test.com', 'ayse@test.com', 'fatma@test.com', 'ali@test.com'],
+                          dtype=object),
+        'notes': np.array(_NOTES, dtype=object)
+    }
+    return pd.DataFrame.from_dict(data, orient='columns')
+
+@pytest.fixture(scope="session")
+def shared_explorer():
+    """Oturum boyunca tek DataExplorer (create_engine yalnızca kurulumda patch'lenir)"""
+    # Patch kurulum sonrası kaldırılır; gerçek create_engine kullanan testler etkilenmez
+    with patch('explorer.sa.create_engine', return_value=Mock()):
+        return DataExplorer(
+            host='localhost',
+            user='test_user',
+            password='test_pass',
+            database='test_db'
+        )
+
+@pytest.fixture
+def patched_explorer(shared_explorer):
+    """Şema, satır sayısı ve read_sql mock'lanmış explorer; (explorer, schema, count, read_sql) döner"""
+    with ExitStack() as stack:
+        mock_schema = stack.enter_context(patch.object(shared_explorer, 'get_table_schema'))
+        mock_count = stack.enter_context(patch.object(shared_explorer, '_get_table_row_count'))
+        mock_read_sql = stack.enter_context(patch('explorer.pd.read_sql'))
+        yield shared_explorer, mock_schema, mock_count, mock_read_sql
 
 class TestDataExplorer:
     """DataExplorer sınıfı testleri"""
     
     @pytest.fixture
-    def mock_engine(self):
-        """Mock SQLAlchemy engine"""
-        mock_engine = Mock()
-        return mock_engine
-    
-    @pytest.fixture
-    def sample_dataframe(self):
-        """Test için örnek veri çerçevesi"""
-        data = {
-            'id': [1, 2, 3, 4, 5],
-            'name': ['Ahmet', 'Mehmet', 'Ayşe', 'Fatma', 'Ali'],
-            'description': [
-                'Bu bir açıklama metnidir',
-                'Başka bir açıklama',
-                'Üçüncü açıklama metni',
-                'Dördüncü açıklama',
-                'Beşinci açıklama metni'
-            ],
-            'age': [25, 30, 35, 28, 32],
-            'email': ['ahmet@test.com', 'mehmet@test.com', 'ayse@test.com', 'fatma@test.com', 'ali@test.com'],
-            'notes': [
-                'Bu bir not metnidir ve oldukça uzun olabilir',
-                'Kısa not',
-                'Orta uzunlukta bir not metni',
-                None,
-                'Son not metni'
-            ]
-        }
-        return pd.DataFrame(data)
-    
-    @pytest.fixture
-    def explorer(self):
+    def explorer(self, shared_explorer):
         """Test için DataExplorer instance'ı"""
-        with patch('explorer.sa.create_engine') as mock_create_engine:
-            mock_engine = Mock()
-            mock_create_engine.return_value = mock_engine
-            
-            explorer = DataExplorer(
-                host='localhost',
-                user='test_user',
-                password='test_pass',
-                database='test_db'
-            )
-            return explorer
+        return shared_explorer
     
     def test_init(self):
         """DataExplorer başlatma testi"""
@@ -93,29 +195,11 @@ class TestDataExplorer:
     
     def test_get_table_schema(self, explorer):
         """Tablo şeması alma testi"""
-        # Mock tablo ve kolonlar
-        mock_table = Mock()
-        mock_columns = []
-        
-        for i, col_name in enumerate(['id', 'name', 'description']):
-            mock_col = Mock()
-            mock_col.name = col_name
-            mock_col.type = f'VARCHAR({50 + i*10})'
-            mock_col.nullable = True
-            mock_col.primary_key = (i == 0)  # İlk kolon primary key
-            mock_col.unique = False
-            mock_col.default = None
-            mock_columns.append(mock_col)
-        
-        mock_table.columns = mock_columns
+        # Sahte tablo ve kolonlar (salt okunur öznitelik torbası; Mock gerekmez)
+        mock_table = SimpleNamespace(columns=MOCK_COLS)
         
-        with patch('explorer.sa.MetaData') as mock_metadata, \
-             patch('explorer.sa.Table') as mock_table_class:
-            
-            mock_metadata_instance = Mock()
-            mock_metadata.return_value = mock_metadata_instance
-            
-            mock_table_class.return_value = mock_table
+        with patch.multiple('explorer.sa', MetaData=DEFAULT, Table=DEFAULT) as mocks:
+            mocks['Table'].return_value = mock_table
             
             schema = explorer.get_table_schema('test_table')
             
@@ -125,23 +209,20 @@ class TestDataExplorer:
             assert schema['columns'][0]['name'] == 'id'
             assert schema['columns'][0]['primary_key'] == True
     
-    def test_analyze_table(self, explorer, sample_dataframe):
+    def test_analyze_table(self, patched_explorer, sample_dataframe):
         """Tablo analizi testi"""
-        with patch.object(explorer, 'get_table_schema') as mock_schema, \
-             patch.object(explorer, '_get_table_row_count') as mock_count, \
-             patch('explorer.pd.read_sql') as mock_read_sql:
-            
-            mock_schema.return_value = {'table_name': 'test_table', 'columns': []}
-            mock_count.return_value = 100
-            mock_read_sql.return_value = sample_dataframe
-            
-            analysis = explorer.analyze_table('test_table')
-            
-            assert analysis['table_name'] == 'test_table'
-            assert analysis['total_rows'] == 100
-            assert analysis['sample_size'] == 5
-            assert len(analysis['columns_analysis']) == 6
-            assert 'text_columns' in analysis
+        explorer, mock_schema, mock_count, mock_read_sql = patched_explorer
+        mock_schema.return_value = {'table_name': 'test_table', 'columns': []}
+        mock_count.return_value = 100
+        mock_read_sql.return_value = sample_dataframe
+        
+        analysis = explorer.analyze_table('test_table')
+        
+        assert analysis['table_name'] == 'test_table'
+        assert analysis['total_rows'] == 100
+        assert analysis['sample_size'] == 5
+        assert len(analysis['columns_analysis']) == 6
+        assert 'text_columns' in analysis
     
     def test_analyze_column(self, explorer, sample_dataframe):
         """Kolon analizi testi"""
@@ -197,13 +278,8 @@ class TestDataExplorer:
     
     def test_analyze_text_column(self, explorer):
         """Metin kolonu detaylı analizi testi"""
-        text_data = pd.Series([
-            'Bu bir test metnidir',
-            'Başka bir test metni',
-            'Üçüncü test metni',
-            'Dördüncü test metni',
-            'Beşinci test metni'
-        ])
+        # Arrow destekli string dtype ile hızlı yolu test et
+        text_data = pd.Series(_TEST_TEXTS, dtype='string[pyarrow]')
         
         analysis = explorer._analyze_text_column(text_data)
         
@@ -217,50 +293,13 @@ class TestDataExplorer:
         assert len(analysis['most_common_words']) > 0
         
         # Türkçe kelime kontrolü
-        words = [word for word, _ in analysis['most_common_words']]
-        assert 'test' in words or 'metni' in words
+        words = frozenset(word for word, _ in analysis['most_common_words'])
+        assert not words.isdisjoint(('test', 'metni'))
     
     def test_get_text_columns(self, explorer):
         """Metin kolonları tespiti testi"""
         with patch.object(explorer, 'analyze_table') as mock_analyze:
-            # Mock analiz sonucu
-            mock_analysis = {
-                'columns_analysis': {
-                    'id': {
-                        'is_text': False,
-                        'null_percentage': 0,
-                        'unique_percentage': 100
-                    },
-                    'name': {
-                        'is_text': True,
-                        'null_percentage': 0,
-                        'unique_percentage': 80,
-                        'text_analysis': {
-                            'avg_length': 10,
-                            'avg_words_per_text': 2
-                        }
-                    },
-                    'description': {
-                        'is_text': True,
-                        'null_percentage': 10,
-                        'unique_percentage': 90,
-                        'text_analysis': {
-                            'avg_length': 50,
-                            'avg_words_per_text': 8
-                        }
-                    },
-                    'aciklama': {
-                        'is_text': True,
-                        'null_percentage': 5,
-                        'unique_percentage': 85,
-                        'text_analysis': {
-                            'avg_length': 30,
-                            'avg_words_per_text': 5
-                        }
-                    }
-                }
-            }
-            mock_analyze.return_value = mock_analysis
+            mock_analyze.return_value = _MOCK_ANALYSIS
             
             text_columns = explorer.get_text_columns('test_table')
             
@@ -269,7 +308,7 @@ class TestDataExplorer:
             assert text_columns[0]['column_name'] == 'aciklama'
             assert text_columns[0]['score'] > text_columns[1]['score']
     
-    def test_export_analysis(self, explorer):
+    def test_export_analysis(self, explorer, tmp_path):
         """Analiz sonuçlarını dışa aktarma testi"""
         with patch.object(explorer, 'analyze_table') as mock_analyze, \
              patch.object(explorer, 'get_text_columns') as mock_text_columns:
@@ -277,28 +316,17 @@ class TestDataExplorer:
             mock_analyze.return_value = {'table_name': 'test_table'}
             mock_text_columns.return_value = [{'column_name': 'description'}]
             
-            with tempfile.NamedTemporaryFile(mode='w', suffix='.json', delete=False) as tmp_file:
-                tmp_path = tmp_file.name
+            output_path = tmp_path / 'out.json'
+            output_file = explorer.export_analysis('test_table', str(output_path))
             
-            try:
-                output_file = explorer.export_analysis('test_table', tmp_path)
-                
-                assert output_file == tmp_path
-                assert os.path.exists(tmp_path)
-                
-                # JSON dosyasını oku ve kontrol et
-                with open(tmp_path, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                
-                assert 'table_analysis' in data
-                assert 'text_columns' in data
-                assert 'export_timestamp' in data
-                assert 'explorer_version' in data
-                
-            finally:
-                # Test dosyasını temizle
-                if os.path.exists(tmp_path):
-                    os.unlink(tmp_path)
+            assert output_file == str(output_path)
+            assert output_path.exists()
+            
+            # JSON dosyasını oku ve kontrol et
+            data = json_loads(output_path.read_bytes())
+            
+            assert {'table_analysis', 'text_columns', 'export_timestamp', 'explorer_version'} <= data.keys()
+            assert data['export_timestamp'] == FROZEN_NOW.isoformat()
     
     def test_get_table_row_count(self, explorer):
         """Tablo satır sayısı alma testi"""
@@ -309,56 +337,84 @@ class TestDataExplorer:
             count = explorer._get_table_row_count('test_table')
             assert count == 100
     
+    def test_estimate_table_row_count(self):
+        """İstatistiklerden yaklaşık satır sayısı testi"""
+        engine = sa.create_engine('sqlite://')
+        with engine.begin() as conn:
+            conn.execute(sa.text("CREATE TABLE test_table (id INTEGER)"))
+            conn.execute(sa.text("INSERT INTO test_table VALUES (1), (2), (3)"))
+        explorer = DataExplorer(engine)
+        
+        # ANALYZE öncesi istatistik yok, kesin sayıma bırakılır
+        assert explorer._estimate_table_row_count('test_table') is None
+        
+        with engine.begin() as conn:
+            conn.execute(sa.text("ANALYZE"))
+        assert explorer._estimate_table_row_count('test_table') == 3
+    
     def test_error_handling(self, explorer):
         """Hata yönetimi testi"""
         # Bağlantı hatası
         with patch('explorer.sa.create_engine', side_effect=Exception("Connection failed")):
-            with pytest.raises(Exception):
-                DataExplorer('host', 'user', 'pass', 'db')
+            with pytest.raises(Exception, match=_CONN_RE):
+                DataExplorer(host='host', user='user', password='pass', database='db')
         
-        # Tablo bulunamadı hatası
-        with patch.object(explorer, 'engine') as mock_engine:
-            mock_engine.execute.side_effect = Exception("Table not found")
-            
-            with pytest.raises(Exception):
+        # Tablo bulunamadı hatası (gerçek, boş bir bellek içi veritabanında)
+        with patch.object(explorer, 'engine', sa.create_engine('sqlite://')):
+            with pytest.raises(sa.exc.NoSuchTableError, match=_TABLE_RE):
                 explorer.get_table_schema('nonexistent_table')
 
+    def test_print_summary_marks_estimate(self, capsys):
+        """İstatistikten gelen satır sayısı özette tahmini olarak gösterilmeli"""
+        engine = sa.create_engine('sqlite://')
+        with engine.begin() as conn:
+            conn.execute(sa.text("CREATE TABLE test_table (id INTEGER)"))
+            conn.execute(sa.text("INSERT INTO test_table VALUES (1), (2), (3)"))
+            conn.execute(sa.text("ANALYZE"))
+        
+        DataExplorer(engine).print_summary('test_table')
+        
+        assert "Toplam Satır (tahmini): ~3" in capsys.readouterr().out
+    
+    def test_table_name_not_interpolated(self):
+        """Tablo adı SQL'e ham eklenmemeli: geçersiz ad reddedilir, özel karakterli ad tırnaklanır"""
+        engine = sa.create_engine('sqlite://')
+        with engine.begin() as conn:
+            conn.execute(sa.text('CREATE TABLE "my table" (id INTEGER, note TEXT)'))
+            conn.execute(sa.text("""INSERT INTO "my table" VALUES (1, 'bir'), (2, 'iki')"""))
+        explorer = DataExplorer(engine)
+        
+        with pytest.raises(sa.exc.NoSuchTableError):
+            explorer.analyze_table('"my table"; DROP TABLE "my table"')
+        
+        analysis = explorer.analyze_table('my table')
+        assert analysis['sample_size'] == 2
+        assert explorer._get_table_row_count('my table') == 2
+
 class TestDataExplorerIntegration:
     """Entegrasyon testleri (gerçek veritabanı gerektirmez)"""
     
-    def test_full_workflow(self):
+    # Birim testlerin kapsadığı akışı tekrarlar; hızlı çalıştırmada -m "not slow" ile atlanır
+    pytestmark = pytest.mark.slow
+    
+    def test_full_workflow(self, patched_explorer, sample_dataframe):
         """Tam iş akışı testi"""
-        with patch('explorer.sa.create_engine') as mock_create_engine:
-            mock_engine = Mock()
-            mock_create_engine.return_value = mock_engine
-            
-            explorer = DataExplorer('host', 'user', 'pass', 'db')
-            
-            # Mock veri
-            sample_data = {
-                'id': [1, 2, 3],
-                'name': ['Test1', 'Test2', 'Test3'],
-                'description': ['Açıklama 1', 'Açıklama 2', 'Açıklama 3']
-            }
-            df = pd.DataFrame(sample_data)
-            
-            with patch.object(explorer, 'get_table_schema') as mock_schema, \
-                 patch.object(explorer, '_get_table_row_count') as mock_count, \
-                 patch('explorer.pd.read_sql') as mock_read_sql:
-                
-                mock_schema.return_value = {'table_name': 'test', 'columns': []}
-                mock_count.return_value = 3
-                mock_read_sql.return_value = df
-                
-                # Tam analiz yap
-                analysis = explorer.analyze_table('test_table')
-                text_columns = explorer.get_text_columns('test_table')
-                
-                assert analysis['table_name'] == 'test_table'
-                assert len(text_columns) > 0
-                
-                # En az bir metin kolonu olmalı
-                assert any(col['column_name'] == 'description' for col in text_columns)
+        explorer, mock_schema, mock_count, mock_read_sql = patched_explorer
+        
+        # Mock veri: paylaşılan çerçevenin ilk 3 satırı
+        mock_schema.return_value = {'table_name': 'test', 'columns': []}
+        mock_count.return_value = 3
+        mock_read_sql.return_value = sample_dataframe.head(3)
+        
+        # Tam analiz yap
+        analysis = explorer.analyze_table('test_table')
+        text_columns = explorer.get_text_columns('test_table')
+        
+        assert analysis['table_name'] == 'test_table'
+        assert len(text_columns) > 0
+        
+        # En az bir metin kolonu olmalı
+        assert any(col['column_name'] == 'description' for col in text_columns)
 
 if __name__ == "__main__":
     pytest.main([__file__, "-v"]) 
\ No newline at end of file
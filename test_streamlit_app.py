@@ -9,83 +9,211 @@ Test Kapsamı:
 - Veritabanı bağlantı formları
 - Tablo analizi fonksiyonları
 - AI analizi entegrasyonu
+
+Paralel çalıştırma: pytest -n auto --dist loadgroup
+(tüm testler oturum fixture'larını paylaşmak için aynı işçide kalır)
 """
 
 import pytest
 import pandas as pd
+import numpy as np
 import sqlalchemy as sa
 from unittest.mock import Mock, patch, MagicMock
+import codecs
+import io
+import sqlite3
 import sys
+import time
+import types
+import importlib.util
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+# Mikro benchmark'lar yalnızca pytest-benchmark kuruluysa çalışır
+BENCHMARK_AVAILABLE = importlib.util.find_spec("pytest_benchmark") is not None
+
+# Oturum boyunca paylaşılan streamlit mock'u ve import edilen modül tek işçide kurulur
+pytestmark = pytest.mark.xdist_group(name="streamlit_app")
+
+# streamlit_app'in içe aktardığı ağır/opsiyonel modüller
+_STUBBED_MODULES = ("torch", "sentence_transformers", "transformers", "dotenv")
+
+@pytest.fixture(scope="session", autouse=True)
+def _stub_heavy_imports():
+    """Modülleri yalnızca bu dosyanın testleri seçildiğinde boş modüllerle değiştir (yüklü olanlara dokunma)"""
+    # Boş modülde olmayan öznitelik Mock çocuğu üretmek yerine hemen AttributeError verir
+    for name in _STUBBED_MODULES:
+        sys.modules.setdefault(name, types.ModuleType(name))
+    # streamlit_app import sırasında load_dotenv() çağırır
+    if not hasattr(sys.modules['dotenv'], 'load_dotenv'):
+        sys.modules['dotenv'].load_dotenv = lambda *args, **kwargs: False
+    # Testler streamlit çağrılarını doğruladığından o Mock olarak kalır
+    st = sys.modules.setdefault('streamlit', Mock())
+    if isinstance(st, Mock):
+        # Dekore edilen fonksiyonlar Mock'a dönüşmesin; modül import edilmeden önce bağlanmalı
+        st.cache_data = st.cache_resource = _passthrough_cache
+        st.fragment = lambda func: func
+
+def _passthrough_cache(func=None, **kwargs):
+    """st.cache_data/st.cache_resource yerine: fonksiyonu önbelleksiz, doğrudan çağrılabilir bırakır"""
+    def decorate(f):
+        # clear_metadata_cache gibi çağıranlar için .clear() yine bulunur
+        f.clear = lambda *args, **kwargs: None
+        return f
+    return decorate(func) if callable(func) else decorate
+
+class _SessionState(dict):
+    """Hem st.session_state['x'] hem st.session_state.x erişimini destekleyen sözlük"""
+    __getattr__ = dict.get
+    __setattr__ = dict.__setitem__
+    __delattr__ = dict.__delitem__
+
+# sample_dataframe tarih kolonu: DatetimeIndex kurmadan beş günlük datetime64 dizisi
+_DATES = np.arange('2024-01-01', '2024-01-06', dtype='datetime64[D]').astype('datetime64[ns]')
+
+# AI Helper mock'larının döndürdüğü sabit sonuçlar (modül yüklenirken bir kez oluşur; değiştirilmemeli)
+_CLASSIFY_RESULT = {
+    'classifications': [
+        {'text': 'test1', 'category': 'A', 'confidence': 0.9},
+        {'text': 'test2', 'category': 'B', 'confidence': 0.8}
+    ]
+}
+_CLUSTER_RESULT = {
+    'clusters': [
+        ['test1', 'test2'],
+        ['test3', 'test4']
+    ]
+}
+_TREND_RESULT = {
+    'trends': {
+        'trend1': 'Artış trendi',
+        'trend2': 'Azalış trendi'
+    }
+}
+
+class _CM:
+    """Girişte inner'ı (yoksa kendisini) döndüren hafif context manager"""
+    def __init__(self, inner=None):
+        self._inner = self if inner is None else inner
+    
+    def __enter__(self):
+        return self._inner
+    
+    def __exit__(self, *exc_info):
+        return False
+
+def _wire_streamlit(st):
+    """session_state ve sidebar/form context manager mock'larını bağla"""
+    st.session_state = _SessionState()
+    
+    # Sidebar ve form context manager'ları
+    st.sidebar = _CM()
+    st.form = Mock(return_value=_CM(Mock()))
+    st.spinner = Mock(return_value=_CM())
+    st.expander = Mock(return_value=_CM())
+    # Varsayılan olarak dosya yüklenmemiştir
+    st.file_uploader = Mock(return_value=None)
+    # Metin alanları düzenlenmemiş gibi başlangıç değerini döndürür
+    st.text_area = Mock(side_effect=lambda label, value='', **kwargs: value)
+    # st.columns(3) ve st.columns([1, 4]) istenen sayıda context manager döndürür
+    st.columns = Mock(side_effect=lambda spec, **kwargs: [_CM() for _ in range(spec if isinstance(spec, int) else len(spec))])
+
+def _clicked(label_prefix: str):
+    """st.button side_effect'i: yalnızca etiketi label_prefix ile başlayan butona tıklanmış olur"""
+    return lambda label, *args, **kwargs: label.startswith(label_prefix)
+
+# AI analizini başlatan buton (prompt kaydet/sıfırla butonlarına tıklanmaz)
+_START_AI_BUTTON = "🚀"
+
+def _upload(data: bytes, name: str) -> io.BytesIO:
+    """st.file_uploader'ın döndürdüğü UploadedFile gibi ad ve boyut taşıyan bellek dosyası"""
+    uploaded = io.BytesIO(data)
+    uploaded.name = name
+    uploaded.size = len(data)
+    return uploaded
 
-# Test için gerekli modülleri mock'la
-sys.modules['streamlit'] = Mock()
-sys.modules['streamlit'].session_state = {}
+@pytest.fixture(scope="session")
+def mock_streamlit(_stub_heavy_imports):
+    """Streamlit modülünü mock'la (oturum boyunca tek Mock)"""
+    # streamlit_app import edilirken sys.modules'taki bu Mock'u 'st' olarak bağlar
+    st = sys.modules['streamlit']
+    _wire_streamlit(st)
+    return st
 
-# Torch ve diğer modülleri mock'la
-sys.modules['torch'] = Mock()
-sys.modules['sentence_transformers'] = Mock()
-sys.modules['transformers'] = Mock()
-sys.modules['dotenv'] = Mock()
+@pytest.fixture(scope="session")
+def mock_engine():
+    """SQLAlchemy engine mock'u"""
+    # spec: yalnızca gerçek Engine/Connection öznitelikleri; yazım hataları AttributeError verir
+    engine = Mock(spec=sa.engine.Engine)
+    # url örnek özniteliği olduğundan spec'te yok; engine_cache_key için gerçek bir URL verilir
+    engine.url = sa.engine.make_url('sqlite://')
+    # connect() bağlamı execute'u None döndüren bağlantıyı verir
+    connection_mock = Mock(spec=sa.engine.Connection, **{'execute.return_value': None})
+    engine.connect = Mock(return_value=_CM(connection_mock))
+    return engine
+
+@pytest.fixture
+def sqlite_engine():
+    """Tüm bağlantıların aynı bellek içi veritabanını gördüğü gerçek SQLite engine'i"""
+    engine = sa.create_engine('sqlite://', poolclass=sa.pool.StaticPool)
+    yield engine
+    engine.dispose()
+
+@pytest.fixture(scope="session")
+def sample_dataframe():
+    """Test için örnek DataFrame (salt okunur kullanılır)"""
+    return pd.DataFrame({
+        'id': [1, 2, 3, 4, 5],
+        'text': ['Bu bir test metni', 'Başka bir metin', 'Üçüncü metin', 'Dördüncü metin', 'Beşinci metin'],
+        'category': ['A', 'B', 'A', 'C', 'B'],
+        'date': _DATES
+    })
+
+@pytest.fixture(scope="session")
+def streamlit_app_cls(mock_streamlit):
+    """streamlit_app'i oturumda bir kez import et ve 'st'yi mock'a bağla"""
+    import streamlit_app
+    previous_st = streamlit_app.st
+    streamlit_app.st = mock_streamlit
+    yield streamlit_app.StreamlitApp
+    streamlit_app.st = previous_st
+
+@pytest.fixture(scope="session")
+def streamlit_module(streamlit_app_cls):
+    """Mock'a bağlanmış streamlit_app modülü (modül düzeyindeki yardımcılar için)"""
+    return sys.modules['streamlit_app']
+
+# Testlerin dönüş değeri atadığı veya çağrılarını doğruladığı streamlit fonksiyonları
+_RESET_LEAVES = ("success", "error", "info", "markdown", "metric", "selectbox",
+                 "button", "multiselect", "subheader", "form_submit_button", "json")
+
+@pytest.fixture(autouse=True)
+def _reset_mocks(mock_streamlit, mock_engine):
+    """Paylaşılan mock'ların çağrı kayıtlarını ve test içinde ayarlanan değerlerini temizle"""
+    # Tüm Mock ağacı yerine yalnızca testlerin ayarladığı/doğruladığı yapraklar sıfırlanır
+    for name in _RESET_LEAVES:
+        getattr(mock_streamlit, name).reset_mock(return_value=True, side_effect=True)
+    # session_state, sidebar ve form (içindeki text_input vb. ayarlarıyla) yeni baştan kurulur
+    _wire_streamlit(mock_streamlit)
+    mock_engine.reset_mock()
+
+@pytest.fixture
+def app(streamlit_app_cls, monkeypatch):
+    """StreamlitApp instance'ı oluştur"""
+    # Önbellek dekoratörleri devre dışı; gerçek AuthSystem çalışma dizininde users.db açmasın
+    monkeypatch.setattr('streamlit_app.get_auth_system', Mock())
+    return streamlit_app_cls()
 
 class TestStreamlitApp:
     """StreamlitApp sınıfı testleri"""
     
     @pytest.fixture
-    def mock_streamlit(self):
-        """Streamlit modülünü mock'la"""
-        with patch.dict('sys.modules', {'streamlit': Mock()}):
-            import streamlit as st
-            # Session state'i object olarak mock'la
-            st.session_state = Mock()
-            st.session_state.__getitem__ = Mock(side_effect=lambda key: st.session_state._get(key))
-            st.session_state.__setitem__ = Mock(side_effect=lambda key, value: st.session_state._set(key, value))
-            st.session_state._data = {}
-            st.session_state._get = Mock(side_effect=lambda key: st.session_state._data.get(key))
-            st.session_state._set = Mock(side_effect=lambda key, value: st.session_state._data.update({key: value}))
-            
-            # Sidebar context manager mock'u
-            sidebar_mock = Mock()
-            sidebar_mock.__enter__ = Mock(return_value=sidebar_mock)
-            sidebar_mock.__exit__ = Mock(return_value=None)
-            st.sidebar = sidebar_mock
-            
-            # Form context manager mock'u
-            form_mock = Mock()
-            form_mock.__enter__ = Mock(return_value=form_mock)
-            form_mock.__exit__ = Mock(return_value=None)
-            st.form = Mock(return_value=form_mock)
-            
-            yield st
-            
-    @pytest.fixture
-    def app(self, mock_streamlit):
-        """StreamlitApp instance'ı oluştur"""
-        with patch('streamlit_app.st', mock_streamlit):
-            from streamlit_app import StreamlitApp
-            return StreamlitApp()
-            
-    @pytest.fixture
-    def mock_engine(self):
-        """SQLAlchemy engine mock'u"""
-        engine = Mock()
-        # Context manager mock'u
-        connection_mock = Mock()
-        connection_mock.__enter__ = Mock(return_value=connection_mock)
-        connection_mock.__exit__ = Mock(return_value=None)
-        connection_mock.execute = Mock(return_value=None)
-        engine.connect = Mock(return_value=connection_mock)
-        return engine
-        
-    @pytest.fixture
-    def sample_dataframe(self):
-        """Test için örnek DataFrame"""
-        return pd.DataFrame({
-            'id': [1, 2, 3, 4, 5],
-            'text': ['Bu bir test metni', 'Başka bir metin', 'Üçüncü metin', 'Dördüncü metin', 'Beşinci metin'],
-            'category': ['A', 'B', 'A', 'C', 'B'],
-            'date': pd.date_range('2024-01-01', periods=5)
-        })
+    def connected_env(self, monkeypatch, mock_engine):
+        """Başarılı bağlantı ortamı: get_engine mock engine'i döndürür, DataExplorer mock'lanır"""
+        monkeypatch.setattr('streamlit_app.get_engine', Mock(return_value=mock_engine))
+        monkeypatch.setattr('streamlit_app.EXPLORER_AVAILABLE', True)
+        monkeypatch.setattr('explorer.DataExplorer', Mock())
+        return mock_engine
         
     def test_init(self, app):
         """StreamlitApp başlatma testi"""
@@ -116,317 +244,947 @@ class TestStreamlitApp:
         # st.markdown çağrılarını kontrol et
         assert mock_streamlit.markdown.call_count >= 2
         
-    def test_mysql_connection_success(self, app, mock_streamlit, mock_engine):
-        """MySQL bağlantı başarı testi"""
-        with patch('streamlit_app.create_engine', return_value=mock_engine):
-            with patch('streamlit_app.EXPLORER_AVAILABLE', True):
-                with patch('streamlit_app.DataExplorer') as mock_explorer:
-                    
-                    # Form submit simülasyonu
-                    mock_streamlit.form.return_value.__enter__.return_value.text_input.side_effect = [
-                        'localhost',  # host
-                        'testdb',     # database
-                        'user',       # username
-                        'pass'        # password
-                    ]
-                    mock_streamlit.form.return_value.__enter__.return_value.number_input.return_value = 3306
-                    mock_streamlit.form.return_value.__enter__.return_value.form_submit_button.return_value = True
-                    
-                    app._render_mysql_connection()
-                    
-                    # Başarılı bağlantı kontrolü
-                    assert app.engine == mock_engine
-                    assert app.connection_status is True
-                    assert mock_streamlit.session_state['connection_established'] is True
-                    mock_streamlit.success.assert_called_once()
-                    
-    def test_mysql_connection_failure(self, app, mock_streamlit):
-        """MySQL bağlantı hata testi"""
-        with patch('streamlit_app.create_engine', side_effect=Exception("Connection failed")):
-            
-            # Form submit simülasyonu
-            mock_streamlit.form.return_value.__enter__.return_value.text_input.side_effect = [
-                'localhost',  # host
-                'testdb',     # database
-                'user',       # username
-                'pass'        # password
-            ]
-            mock_streamlit.form.return_value.__enter__.return_value.number_input.return_value = 3306
-            mock_streamlit.form.return_value.__enter__.return_value.form_submit_button.return_value = True
-            
-            app._render_mysql_connection()
-            
-            # Hata kontrolü
-            assert app.connection_status is False
-            assert mock_streamlit.session_state['connection_established'] is False
-            mock_streamlit.error.assert_called_once()
-            
-    def test_sqlite_connection_success(self, app, mock_streamlit, mock_engine):
-        """SQLite bağlantı başarı testi"""
-        with patch('streamlit_app.create_engine', return_value=mock_engine):
-            with patch('streamlit_app.EXPLORER_AVAILABLE', True):
-                with patch('streamlit_app.DataExplorer') as mock_explorer:
-                    
-                    # Form submit simülasyonu
-                    mock_streamlit.form.return_value.__enter__.return_value.text_input.return_value = './test.db'
-                    mock_streamlit.form.return_value.__enter__.return_value.form_submit_button.return_value = True
-                    
-                    app._render_sqlite_connection()
-                    
-                    # Başarılı bağlantı kontrolü
-                    assert app.engine == mock_engine
-                    assert app.connection_status is True
-                    assert mock_streamlit.session_state['connection_established'] is True
-                    mock_streamlit.success.assert_called_once()
-                    
-    def test_postgresql_connection_success(self, app, mock_streamlit, mock_engine):
-        """PostgreSQL bağlantı başarı testi"""
-        with patch('streamlit_app.create_engine', return_value=mock_engine):
-            with patch('streamlit_app.EXPLORER_AVAILABLE', True):
-                with patch('streamlit_app.DataExplorer') as mock_explorer:
-                    
-                    # Form submit simülasyonu
-                    mock_streamlit.form.return_value.__enter__.return_value.text_input.side_effect = [
-                        'localhost',  # host
-                        'testdb',     # database
-                        'user',       # username
-                        'pass'        # password
-                    ]
-                    mock_streamlit.form.return_value.__enter__.return_value.number_input.return_value = 5432
-                    mock_streamlit.form.return_value.__enter__.return_value.form_submit_button.return_value = True
-                    
-                    app._render_postgresql_connection()
-                    
-                    # Başarılı bağlantı kontrolü
-                    assert app.engine == mock_engine
-                    assert app.connection_status is True
-                    assert mock_streamlit.session_state['connection_established'] is True
-                    mock_streamlit.success.assert_called_once()
-                    
+    @pytest.mark.parametrize("method,database", [
+        pytest.param('_render_mysql_connection', 'testdb', id="mysql"),
+        pytest.param('_render_postgresql_connection', 'analiz_db', id="postgresql"),
+        pytest.param('_render_sqlite_connection', 'users.db', id="sqlite"),
+    ])
+    def test_connection_success(self, app, mock_streamlit, connected_env, monkeypatch, method, database):
+        """Veritabanı bağlantı başarı testi (bağlantı bilgileri .env'den, veritabanı listeden seçilir)"""
+        # MySQL formu veritabanlarını sunucudan listeler
+        monkeypatch.setattr('streamlit_app.cached_database_list', Mock(return_value=[database]))
+        # Form submit simülasyonu
+        mock_streamlit.selectbox.return_value = database
+        mock_streamlit.form_submit_button.return_value = True
+        
+        getattr(app, method)()
+        
+        # Başarılı bağlantı kontrolü
+        assert app.engine == connected_env
+        assert app.connection_status is True
+        assert mock_streamlit.session_state['connection_established'] is True
+        assert mock_streamlit.success.call_count == 1
+        
+    def test_mysql_connection_failure(self, app, mock_streamlit, mock_engine, monkeypatch):
+        """MySQL bağlantı hata testi (sunucuya ulaşılır, seçilen veritabanına bağlanılamaz)"""
+        def get_engine(connection_string, pooled=True):
+            # Veritabanı listeleme (havuzsuz) başarılı, veritabanı bağlantısı başarısız
+            if pooled:
+                raise Exception("Connection failed")
+            return mock_engine
+        monkeypatch.setattr('streamlit_app.get_engine', get_engine)
+        monkeypatch.setattr('streamlit_app.cached_database_list', Mock(return_value=['testdb']))
+        
+        # Form submit simülasyonu
+        mock_streamlit.selectbox.return_value = 'testdb'
+        mock_streamlit.form_submit_button.return_value = True
+        
+        app._render_mysql_connection()
+        
+        # Hata kontrolü
+        assert app.connection_status is False
+        assert mock_streamlit.session_state['connection_established'] is False
+        assert mock_streamlit.error.call_count == 1
+        
     def test_render_main_content_no_connection(self, app, mock_streamlit):
         """Bağlantı yokken ana içerik testi"""
         mock_streamlit.session_state['connection_established'] = False
         
         app.render_main_content()
         
-        mock_streamlit.info.assert_called_once()
+        mock_streamlit.error.assert_called_once()
+        assert "bağlantısı bulunamadı" in mock_streamlit.error.call_args[0][0]
         
     def test_render_main_content_with_connection(self, app, mock_streamlit, mock_engine):
         """Bağlantı varken ana içerik testi"""
         app.engine = mock_engine
         mock_streamlit.session_state['connection_established'] = True
+        mock_streamlit.session_state['engine'] = mock_engine
         
-        # Inspector mock'u
-        mock_inspector = Mock()
-        mock_inspector.get_table_names.return_value = ['table1', 'table2']
-        
-        with patch('streamlit_app.sa.inspect', return_value=mock_inspector):
+        with patch('streamlit_app.cached_table_list', return_value=['table1', 'table2']):
             with patch.object(app, '_analyze_table') as mock_analyze:
                 
                 mock_streamlit.selectbox.return_value = 'table1'
+                mock_streamlit.button.side_effect = _clicked("🔍 Tablo Analizini Başlat")
                 
                 app.render_main_content()
                 
-                mock_streamlit.selectbox.assert_called()
+                assert mock_streamlit.selectbox.call_count >= 1
                 mock_analyze.assert_called_once_with('table1')
                 
-    def test_analyze_table_success(self, app, mock_streamlit, mock_engine):
-        """Tablo analizi başarı testi"""
-        app.engine = mock_engine
+    @pytest.fixture
+    def analyzed_table(self, mock_streamlit, sqlite_engine, sample_dataframe, monkeypatch):
+        """Gerçek SQLite'taki test_table ve analiz sonucu ayarlanabilen DataExplorer mock'u"""
+        from explorer import DataExplorer
+        sample_dataframe.to_sql('test_table', sqlite_engine, index=False)
+        mock_streamlit.session_state['engine'] = sqlite_engine
         
-        # Explorer mock'u
-        mock_explorer = Mock()
-        mock_explorer.analyze_table.return_value = {
-            'columns': [
-                {
-                    'name': 'id',
-                    'type': 'INTEGER',
-                    'null_rate': 0.0,
-                    'unique_count': 100,
+        mock_explorer = Mock(spec=DataExplorer)
+        monkeypatch.setattr('explorer.DataExplorer', Mock(return_value=mock_explorer))
+        return mock_explorer
+    
+    def test_analyze_table_success(self, app, mock_streamlit, analyzed_table):
+        """Tablo analizi başarı testi"""
+        analyzed_table.analyze_table.return_value = {
+            'table_name': 'test_table',
+            'total_rows': 5,
+            'total_rows_estimated': False,
+            'columns_analysis': {
+                'id': {
+                    'dtype': 'int64',
+                    'null_percentage': 0.0,
+                    'unique_count': 5,
                     'is_text': False,
-                    'sample_values': [1, 2, 3, 4, 5]
+                    'sample_values': [1, 2, 3]
                 },
-                {
-                    'name': 'text',
-                    'type': 'TEXT',
-                    'null_rate': 0.1,
-                    'unique_count': 50,
+                'text': {
+                    'dtype': 'object',
+                    'null_percentage': 0.0,
+                    'unique_count': 5,
                     'is_text': True,
-                    'shortest_text': 'a',
-                    'longest_text': 'very long text',
-                    'sample_values': ['text1', 'text2', 'text3'],
-                    'most_common_words': [('test', 10), ('text', 8)]
+                    'sample_values': ['Bu bir test metni'],
+                    'text_analysis': {
+                        'shortest_text': 'Üçüncü metin',
+                        'longest_text': 'Bu bir test metni',
+                        'most_common_words': [('metin', 3)]
+                    }
                 }
-            ],
-            'row_count': 100
+            },
+            'text_columns': ['text']
         }
-        app.explorer = mock_explorer
         
         app._analyze_table('test_table')
         
-        mock_explorer.analyze_table.assert_called_once_with('test_table')
+        analyzed_table.analyze_table.assert_called_once_with('test_table')
+        mock_streamlit.error.assert_not_called()
         assert mock_streamlit.subheader.call_count >= 2
+        # Önizleme gerçek tablodan okunur ve AI analizine aktarılır
+        assert len(mock_streamlit.session_state['table_data']) == 5
+        assert mock_streamlit.session_state['show_ai_analysis'] is True
         
-    def test_analyze_table_error(self, app, mock_streamlit, mock_engine):
-        """Tablo analizi hata testi"""
-        app.engine = mock_engine
+    @pytest.mark.parametrize("estimated,label,value", [
+        (True, "Toplam Satır (tahmini)", "~12,345"),
+        (False, "Toplam Satır", 12345),
+    ])
+    def test_analyze_table_row_estimate_label(self, app, mock_streamlit, analyzed_table, estimated, label, value):
+        """İstatistikten gelen satır sayısı arayüzde tahmini olarak etiketlenmeli"""
+        analyzed_table.analyze_table.return_value = {
+            'table_name': 'test_table',
+            'total_rows': 12345,
+            'total_rows_estimated': estimated,
+            'columns_analysis': {},
+            'text_columns': []
+        }
+        
+        app._analyze_table('test_table')
         
-        # Explorer mock'u
-        mock_explorer = Mock()
-        mock_explorer.analyze_table.side_effect = Exception("Analysis failed")
-        app.explorer = mock_explorer
+        metrics = {call.args[0]: call.args[1] for call in mock_streamlit.metric.call_args_list}
+        assert metrics[label] == value
+    
+    def test_analyze_table_stale_table_list(self, app, mock_streamlit, analyzed_table, monkeypatch):
+        """Önbellekteki liste eskiyse tablo veritabanında doğrulanıp analiz edilmeli"""
+        # Analiz çağrıldıktan sonra çıktı üretimi bu testin konusu değil
+        analyzed_table.analyze_table.side_effect = Exception("Analysis failed")
+        clear_cache = Mock()
+        monkeypatch.setattr('streamlit_app.cached_table_list', lambda *args: [])
+        monkeypatch.setattr('streamlit_app.clear_metadata_cache', clear_cache)
+        
+        app._analyze_table('test_table')
+        
+        clear_cache.assert_called_once()
+        analyzed_table.analyze_table.assert_called_once_with('test_table')
+    
+    def test_analyze_table_missing_table(self, app, mock_streamlit, analyzed_table):
+        """Veritabanında olmayan tablo adı sorguya girmeden reddedilmeli"""
+        app._analyze_table('missing_table; DROP TABLE test_table')
+        
+        analyzed_table.analyze_table.assert_not_called()
+        assert "Tablo bulunamadı" in mock_streamlit.error.call_args[0][0]
+    
+    def test_analyze_table_error(self, app, mock_streamlit, analyzed_table):
+        """Tablo analizi hata testi"""
+        analyzed_table.analyze_table.side_effect = Exception("Analysis failed")
         
         app._analyze_table('test_table')
         
         mock_streamlit.error.assert_called_once()
+        assert "Analysis failed" in mock_streamlit.error.call_args[0][0]
         
-    def test_render_ai_analysis_no_ai_helper(self, app, mock_streamlit):
+    def test_render_ai_analysis_no_ai_helper(self, app, mock_streamlit, monkeypatch):
         """AI Helper yokken AI analizi testi"""
-        with patch('streamlit_app.AI_HELPER_AVAILABLE', False):
-            app._render_ai_analysis('test_table')
-            
-            mock_streamlit.error.assert_called_once()
+        monkeypatch.setattr('streamlit_app.AI_HELPER_AVAILABLE', False)
+        
+        app._render_ai_analysis('test_table')
+        
+        assert mock_streamlit.error.call_count == 1
             
-    def test_render_ai_analysis_with_ai_helper(self, app, mock_streamlit, sample_dataframe):
+    def test_render_ai_analysis_with_ai_helper(self, app, mock_streamlit, sample_dataframe, monkeypatch):
         """AI Helper ile AI analizi testi"""
-        with patch('streamlit_app.AI_HELPER_AVAILABLE', True):
-            with patch('streamlit_app.AIHelper') as mock_ai_helper_class:
-                
-                # AI Helper mock'u
-                mock_ai_helper = Mock()
-                mock_ai_helper.summarize_texts.return_value = {
-                    'summary': 'Bu bir test özetidir.',
-                    'word_count': 100
-                }
-                mock_ai_helper_class.return_value = mock_ai_helper
-                app.ai_helper = mock_ai_helper
-                
-                # Session state ayarla
-                mock_streamlit.session_state['table_data'] = sample_dataframe
-                mock_streamlit.session_state['ai_model'] = 'openai'
-                mock_streamlit.session_state['ai_action'] = 'Özetleme'
-                
-                # Multiselect mock'u
-                mock_streamlit.multiselect.return_value = ['text']
-                
-                # Button click simülasyonu
-                mock_streamlit.button.return_value = True
-                
-                app._render_ai_analysis('test_table')
-                
-                # AI analizi çağrıldı mı kontrol et
-                mock_ai_helper.summarize_texts.assert_called_once()
-                mock_streamlit.success.assert_called_once()
-                
-    def test_render_ai_analysis_different_actions(self, app, mock_streamlit, sample_dataframe):
+        from ai_helper import AIHelper
+        monkeypatch.setattr('streamlit_app.AI_HELPER_AVAILABLE', True)
+        mock_get_ai_helper = Mock()
+        monkeypatch.setattr('streamlit_app.get_ai_helper', mock_get_ai_helper)
+        
+        # AI Helper mock'u
+        mock_ai_helper = Mock(spec=AIHelper)
+        mock_ai_helper.summarize_texts.return_value = {
+            'summary': 'Bu bir test özetidir.',
+            'word_count': 100
+        }
+        mock_get_ai_helper.return_value = mock_ai_helper
+        app.ai_helper = mock_ai_helper
+        
+        # Session state ayarla
+        mock_streamlit.session_state['table_data'] = sample_dataframe
+        mock_streamlit.session_state['ai_model'] = 'openai'
+        mock_streamlit.session_state['ai_action'] = 'Özetleme'
+        
+        # Multiselect mock'u
+        mock_streamlit.multiselect.return_value = ['text']
+        
+        # Button click simülasyonu
+        mock_streamlit.button.side_effect = _clicked(_START_AI_BUTTON)
+        
+        app._render_ai_analysis('test_table')
+        
+        # AI analizi çağrıldı mı kontrol et
+        assert mock_ai_helper.summarize_texts.call_count == 1
+        assert mock_streamlit.success.call_count == 1
+        
+    def test_render_ai_analysis_different_actions(self, app, mock_streamlit, sample_dataframe, monkeypatch):
         """Farklı AI işlemleri testi"""
-        with patch('streamlit_app.AI_HELPER_AVAILABLE', True):
-            with patch('streamlit_app.AIHelper') as mock_ai_helper_class:
-                
-                # AI Helper mock'u
-                mock_ai_helper = Mock()
-                mock_ai_helper.classify_texts.return_value = {
-                    'classifications': [
-                        {'text': 'test1', 'category': 'A', 'confidence': 0.9},
-                        {'text': 'test2', 'category': 'B', 'confidence': 0.8}
-                    ]
-                }
-                mock_ai_helper.cluster_texts.return_value = {
-                    'clusters': [
-                        ['test1', 'test2'],
-                        ['test3', 'test4']
-                    ]
-                }
-                mock_ai_helper.analyze_trends.return_value = {
-                    'trends': {
-                        'trend1': 'Artış trendi',
-                        'trend2': 'Azalış trendi'
-                    }
-                }
-                mock_ai_helper_class.return_value = mock_ai_helper
-                app.ai_helper = mock_ai_helper
-                
-                # Session state ayarla
-                mock_streamlit.session_state['table_data'] = sample_dataframe
-                mock_streamlit.multiselect.return_value = ['text']
-                mock_streamlit.button.return_value = True
-                
-                # Farklı AI işlemlerini test et
-                actions = ['Sınıflandırma', 'Kümelendirme', 'Trend Analizi']
-                
-                for action in actions:
-                    mock_streamlit.session_state['ai_action'] = action
-                    app._render_ai_analysis('test_table')
-                    
-                # Her işlem için ilgili fonksiyon çağrıldı mı kontrol et
-                mock_ai_helper.classify_texts.assert_called_once()
-                mock_ai_helper.cluster_texts.assert_called_once()
-                mock_ai_helper.analyze_trends.assert_called_once()
-                
+        from ai_helper import AIHelper
+        monkeypatch.setattr('streamlit_app.AI_HELPER_AVAILABLE', True)
+        mock_get_ai_helper = Mock()
+        monkeypatch.setattr('streamlit_app.get_ai_helper', mock_get_ai_helper)
+        
+        # AI Helper mock'u
+        mock_ai_helper = Mock(spec=AIHelper)
+        mock_ai_helper.classify_texts.return_value = _CLASSIFY_RESULT
+        mock_ai_helper.cluster_texts.return_value = _CLUSTER_RESULT
+        mock_ai_helper.analyze_trends.return_value = _TREND_RESULT
+        mock_get_ai_helper.return_value = mock_ai_helper
+        app.ai_helper = mock_ai_helper
+        
+        # Session state ayarla
+        mock_streamlit.session_state['table_data'] = sample_dataframe
+        mock_streamlit.multiselect.return_value = ['text']
+        mock_streamlit.button.side_effect = _clicked(_START_AI_BUTTON)
+        
+        # Farklı AI işlemlerini test et
+        actions = ['Sınıflandırma', 'Kümelendirme', 'Trend Analizi']
+        
+        for action in actions:
+            mock_streamlit.session_state['ai_action'] = action
+            app._render_ai_analysis('test_table')
+            
+        # Her işlem için ilgili fonksiyon çağrıldı mı kontrol et
+        assert mock_ai_helper.classify_texts.call_count == 1
+        assert mock_ai_helper.cluster_texts.call_count == 1
+        assert mock_ai_helper.analyze_trends.call_count == 1
+        
     def test_render_footer(self, app, mock_streamlit):
         """Footer render testi"""
         app.render_footer()
         
-        mock_streamlit.markdown.assert_called()
+        assert mock_streamlit.markdown.call_count >= 1
+        
+    @pytest.fixture
+    def connected_sidebar(self, mock_streamlit, monkeypatch):
+        """Bağlantı kurulmuş sidebar: AI ayarları, cache ve metrik bölümleri görünür"""
+        mock_streamlit.session_state['connection_established'] = True
+        # Ollama'ya bağlanılmaz; model listesi mock'tan gelir
+        mock_ai_helper = Mock(**{'get_available_models.return_value': ['llama3:latest']})
+        monkeypatch.setattr('streamlit_app.get_ai_helper', Mock(return_value=mock_ai_helper))
         
-    def test_cache_integration(self, app, mock_streamlit):
+    def test_cache_integration(self, app, mock_streamlit, connected_sidebar, monkeypatch):
         """Cache entegrasyonu testi"""
-        with patch('streamlit_app.CACHE_AVAILABLE', True):
-            with patch('streamlit_app.EmbeddingCache') as mock_cache_class:
-                
-                # Cache mock'u
-                mock_cache = Mock()
-                mock_cache.get_cache_stats.return_value = {
-                    'cache_size': 100,
-                    'hit_rate': 85.5
-                }
-                mock_cache_class.return_value = mock_cache
-                
-                # Cache temizleme butonu
-                mock_streamlit.button.return_value = True
-                
-                # Sidebar cache bölümünü test et
-                with patch.object(app, '_render_mysql_connection'):
-                    app.render_sidebar()
-                    
-                mock_cache.get_cache_stats.assert_called_once()
-                mock_streamlit.metric.assert_called()
+        monkeypatch.setattr('streamlit_app.CACHE_AVAILABLE', True)
+        
+        # Cache mock'u
+        mock_cache = Mock()
+        mock_cache.get_cache_stats.return_value = {
+            'cache_size': 100,
+            'hit_rate': 85.5
+        }
+        monkeypatch.setattr('streamlit_app.get_embedding_cache', Mock(return_value=mock_cache))
+        
+        # Cache durumu butonu
+        mock_streamlit.button.side_effect = _clicked("📊 Cache Durumunu Göster")
+        
+        app.render_sidebar()
+        
+        assert mock_cache.get_cache_stats.call_count == 1
+        mock_streamlit.json.assert_called_with(mock_cache.get_cache_stats.return_value)
+        mock_cache.clear_cache.assert_not_called()
                 
-    def test_metrics_integration(self, app, mock_streamlit):
+    def test_metrics_integration(self, app, mock_streamlit, connected_sidebar, monkeypatch):
         """Metrik entegrasyonu testi"""
-        with patch('streamlit_app.METRICS_AVAILABLE', True):
-            with patch('streamlit_app.get_metrics_summary') as mock_get_metrics:
-                
-                # Metrik mock'u
-                mock_get_metrics.return_value = {
-                    'stats': {
-                        'total_calls': 50,
-                        'total_tokens': 1000
-                    }
-                }
-                
-                # Metrik sıfırlama butonu
-                mock_streamlit.button.return_value = True
-                
-                # Sidebar metrik bölümünü test et
-                with patch.object(app, '_render_mysql_connection'):
-                    app.render_sidebar()
-                    
-                mock_get_metrics.assert_called_once()
-                mock_streamlit.metric.assert_called()
+        monkeypatch.setattr('streamlit_app.METRICS_AVAILABLE', True)
+        
+        # Metrik mock'u
+        mock_metrics = Mock()
+        mock_metrics.get_metrics_summary.return_value = {
+            'stats': {
+                'total_calls': 50,
+                'total_tokens': 1000,
+                'total_errors': 0,
+                'model_stats': {'openai': {'calls': 50, 'tokens': 1000, 'errors': 0}},
+                'last_call_time': None
+            }
+        }
+        monkeypatch.setattr('streamlit_app.get_metrics', Mock(return_value=mock_metrics))
+        
+        # Metrikleri göster butonu
+        mock_streamlit.button.side_effect = _clicked("📊 Metrikleri Göster")
+        
+        app.render_sidebar()
+        
+        assert mock_metrics.get_metrics_summary.call_count == 1
+        mock_streamlit.metric.assert_any_call("📞 Toplam AI Çağrısı", 50)
+        mock_streamlit.metric.assert_any_call("Çağrı", 50)
+        mock_metrics.reset_metrics.assert_not_called()
                 
-    def test_error_handling(self, app, mock_streamlit):
+    def test_error_handling(self, app, mock_streamlit, mock_engine):
         """Hata yönetimi testi"""
-        # Genel hata durumları için test
-        with patch('streamlit_app.EXPLORER_AVAILABLE', True):
-            with patch('streamlit_app.DataExplorer', side_effect=Exception("Explorer error")):
-                
-                app.engine = Mock()
-                mock_streamlit.session_state['connection_established'] = True
-                
-                app.render_main_content()
-                
-                mock_streamlit.error.assert_called()
+        # Tablo listesi alınamazsa hata kullanıcıya gösterilir, uygulama çökmez
+        mock_streamlit.session_state['connection_established'] = True
+        mock_streamlit.session_state['engine'] = mock_engine
+        
+        with patch('streamlit_app.cached_table_list', side_effect=Exception("Explorer error")):
+            app.render_main_content()
+            
+        mock_streamlit.error.assert_called_once()
+        assert "Explorer error" in mock_streamlit.error.call_args[0][0]
+
+class TestPasswordCache:
+    """bcrypt doğrulama önbelleği testleri"""
+    
+    @pytest.fixture
+    def clock(self, monkeypatch):
+        """streamlit_app'in gördüğü monoton saat (yalnızca elle ilerler)"""
+        now = [1000.0]
+        monkeypatch.setattr('streamlit_app.time', types.SimpleNamespace(monotonic=lambda: now[0]))
+        return now
+    
+    def test_lru_eviction(self, streamlit_module):
+        """Sınır aşılınca en uzun süre kullanılmayan kayıt atılır"""
+        cache = streamlit_module.PasswordCache(maxsize=2)
+        key_a, key_b, key_c = (cache.make_key(pw, "hash") for pw in ("a", "b", "c"))
+        cache.set(key_a, True)
+        cache.set(key_b, True)
+        # a kullanıldı; en eski kayıt artık b
+        assert cache.get(key_a) is True
+        
+        cache.set(key_c, False)
+        
+        assert len(cache._entries) == 2
+        assert cache.get(key_b) is None
+        assert cache.get(key_a) is True
+        assert cache.get(key_c) is False
+    
+    def test_ttl_expiry(self, streamlit_module, clock):
+        """Süresi dolan sonuç döndürülmez ve silinir"""
+        cache = streamlit_module.PasswordCache(ttl=300)
+        key = cache.make_key("parola", "hash")
+        cache.set(key, True)
+        
+        clock[0] += 299
+        assert cache.get(key) is True
+        clock[0] += 2
+        assert cache.get(key) is None
+        assert key not in cache._entries
+    
+    def test_keys(self, streamlit_module):
+        """Anahtar parola, hash ve süreç pepper'ına bağlıdır"""
+        cache = streamlit_module.PasswordCache()
+        key = cache.make_key("parola", "hash")
+        
+        assert cache.make_key("parola", "hash") == key
+        assert cache.make_key("parola2", "hash") != key
+        assert cache.make_key("parola", "hash2") != key
+        # Ayraç: parola|hash sınırı kaydırılarak aynı anahtar üretilemez
+        assert cache.make_key("parola|h", "ash") != key
+        assert streamlit_module.PasswordCache().make_key("parola", "hash") != key
+    
+    def test_wrong_password_never_served(self, streamlit_module, tmp_path, monkeypatch):
+        """Doğru parolanın önbelleklenmiş sonucu yanlış parolaya verilmez"""
+        import bcrypt
+        cache = streamlit_module.PasswordCache()
+        monkeypatch.setattr('streamlit_app.get_password_cache', lambda: cache)
+        password_hash = bcrypt.hashpw(b"dogru123", bcrypt.gensalt(rounds=4)).decode('utf-8')
+        checkpw = Mock(wraps=bcrypt.checkpw)
+        monkeypatch.setattr(bcrypt, 'checkpw', checkpw)
+        auth_system = streamlit_module.AuthSystem(str(tmp_path / "users.db"))
+        auth_system._last_login_writer.close()
+        
+        assert auth_system.verify_password("dogru123", password_hash) is True
+        assert auth_system.verify_password("yanlis123", password_hash) is False
+        assert auth_system.verify_password("dogru123", password_hash) is True
+        assert auth_system.verify_password("yanlis123", password_hash) is False
+        
+        # Her parola bir kez bcrypt ile doğrulandı, tekrarlar önbellekten geldi
+        assert checkpw.call_count == 2
+
+class TestLastLoginWriter:
+    """Arka planda toplu last_login yazıcısı testleri"""
+    
+    @pytest.fixture
+    def users_db(self, tmp_path):
+        """İki kullanıcılı users tablosu olan SQLite dosyası"""
+        db_path = str(tmp_path / "users.db")
+        with sqlite3.connect(db_path) as conn:
+            conn.execute("CREATE TABLE users (id INTEGER PRIMARY KEY, last_login TIMESTAMP)")
+            conn.executemany("INSERT INTO users (id) VALUES (?)", [(1,), (2,)])
+        return db_path
+    
+    @staticmethod
+    def _last_logins(db_path: str) -> list:
+        with sqlite3.connect(db_path) as conn:
+            return [row[0] for row in conn.execute("SELECT last_login FROM users ORDER BY id")]
+    
+    def test_close_writes_pending(self, streamlit_module, users_db):
+        """close() flush penceresini beklemeden kuyruktakileri yazar"""
+        # Pencere testten uzun: yazım ancak close() ile olabilir
+        writer = streamlit_module.LastLoginWriter(users_db, flush_interval=60)
+        writer.enqueue(1)
+        writer.enqueue(2)
+        
+        writer.close()
+        
+        assert not writer._thread.is_alive()
+        assert all(self._last_logins(users_db))
+    
+    def test_batch_window(self, streamlit_module, users_db):
+        """Pencere dolunca close() beklenmeden yazılır"""
+        writer = streamlit_module.LastLoginWriter(users_db, flush_interval=0.01)
+        writer.enqueue(1)
+        
+        deadline = time.monotonic() + 5
+        while self._last_logins(users_db)[0] is None and time.monotonic() < deadline:
+            time.sleep(0.01)
+        writer.close()
+        
+        last_login, untouched = self._last_logins(users_db)
+        assert last_login is not None
+        assert untouched is None
+    
+    def test_close_registered_at_exit(self, streamlit_module, users_db, monkeypatch):
+        """Süreç kapanırken bekleyen girişler flush edilir"""
+        registered = []
+        monkeypatch.setattr('streamlit_app.atexit.register', registered.append)
+        
+        writer = streamlit_module.LastLoginWriter(users_db)
+        writer.close()
+        
+        assert writer.close in registered
+    
+    def test_auth_system_synchronous(self, streamlit_module, tmp_path, monkeypatch):
+        """AuthSystem bağlantısı sqlite_config'deki synchronous ayarını kullanır"""
+        monkeypatch.setattr('streamlit_app.SQLITE_SYNCHRONOUS', 'FULL')
+        
+        auth_system = streamlit_module.AuthSystem(str(tmp_path / "users.db"))
+        auth_system._last_login_writer.close()
+        
+        # FULL = 2
+        assert auth_system._conn.execute("PRAGMA synchronous").fetchone()[0] == 2
+    
+    def test_auth_system_concurrent_reads(self, streamlit_module, tmp_path, monkeypatch):
+        """Paylaşılan bağlantıdaki okumalar thread'ler arasında kilitle sıralanır"""
+        cache = streamlit_module.PasswordCache()
+        monkeypatch.setattr('streamlit_app.get_password_cache', lambda: cache)
+        auth_system = streamlit_module.AuthSystem(str(tmp_path / "users.db"))
+        
+        def login(_):
+            return [auth_system.authenticate_user("admin", "admin123") for _ in range(50)]
+        
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = [user for users in executor.map(login, range(8)) for user in users]
+        auth_system._last_login_writer.close()
+        
+        assert len(results) == 400
+        assert all(user is not None and user['username'] == 'admin' for user in results)
+
+def _csv_upload(rows: int, name: str = 'data.csv') -> io.BytesIO:
+    """id ve ad kolonlu, verilen satır sayısında CSV yüklemesi"""
+    lines = ["id,ad"] + [f"{i},kayıt {i}" for i in range(rows)]
+    return _upload("\n".join(lines).encode('utf-8'), name)
+
+def _table_count(engine, table_name: str) -> int:
+    with engine.connect() as conn:
+        return conn.execute(sa.text(f'SELECT COUNT(*) FROM "{table_name}"')).scalar()
+
+class TestCsvStreaming:
+    """CSV'nin okuyucu thread'i ve sınırlı kuyrukla parça parça aktarımı testleri"""
+    
+    def test_multi_chunk(self, app, sqlite_engine):
+        """Birden çok parça tek tabloya yazılır, ilerleme bildirilir"""
+        progress = []
+        
+        result = app.stream_csv_to_table(_csv_upload(25), 'my table', sqlite_engine,
+                                         chunksize=10, progress_callback=progress.append)
+        
+        assert result['rows'] == 25
+        assert result['columns'] == ['id', 'ad']
+        assert result['preview']['ad'].iloc[0] == 'kayıt 0'
+        # Tablo adı temizlenir
+        assert _table_count(sqlite_engine, 'my_table') == 25
+        assert len(progress) == 3
+        assert all(0 < value <= 1.0 for value in progress)
+    
+    def test_producer_error_reaches_caller(self, app, sqlite_engine):
+        """Okuyucu thread'indeki hata yazan tarafta yükselir"""
+        def read_chunks():
+            yield pd.DataFrame({'id': [1, 2]}), None
+            raise ValueError("bozuk satır")
+        
+        with pytest.raises(ValueError, match="bozuk satır"):
+            app._stream_chunks_to_table(read_chunks, 'items', sqlite_engine)
+        
+        # Hatadan önceki parça yazılmıştır
+        assert _table_count(sqlite_engine, 'items') == 2
+    
+    def test_writer_error_stops_producer(self, app, sqlite_engine, monkeypatch):
+        """Yazıcı durursa okuyucu dolu kuyrukta takılı kalmaz"""
+        monkeypatch.setattr('streamlit_app.CSV_STREAM_QUEUE_SIZE', 1)
+        produced = []
+        def read_chunks():
+            for i in range(100):
+                produced.append(i)
+                yield pd.DataFrame({'id': [i]}), None
+        
+        with patch.object(pd.DataFrame, 'to_sql', side_effect=RuntimeError("disk dolu")):
+            with pytest.raises(RuntimeError, match="disk dolu"):
+                app._stream_chunks_to_table(read_chunks, 'items', sqlite_engine)
+        
+        # join() döndü; okuyucu tüm dosyayı okumadan durdu
+        assert len(produced) < 100
+    
+    def test_append(self, app, sqlite_engine):
+        """if_exists='append' mevcut tabloya ekler, 'replace' baştan yazar"""
+        app.stream_csv_to_table(_csv_upload(5), 'items', sqlite_engine, chunksize=2)
+        app.stream_csv_to_table(_csv_upload(5), 'items', sqlite_engine, chunksize=2, if_exists='append')
+        assert _table_count(sqlite_engine, 'items') == 10
+        
+        app.stream_csv_to_table(_csv_upload(3), 'items', sqlite_engine, chunksize=2)
+        assert _table_count(sqlite_engine, 'items') == 3
+
+class TestMysqlBulkLoad:
+    """MySQL LOAD DATA LOCAL INFILE yüklemesi ve yedek akış testleri"""
+    
+    @pytest.fixture
+    def mysql_engine(self, monkeypatch):
+        """LOAD DATA komutunu kaydeden MySQL engine mock'u (şema to_sql'i çalıştırılmaz)"""
+        monkeypatch.setattr('streamlit_app.MYSQL_LOCAL_INFILE', True)
+        monkeypatch.setattr(pd.DataFrame, 'to_sql', Mock())
+        cursor = Mock(rowcount=3)
+        loaded = {}
+        def execute(sql, params):
+            # Geçici dosya komut çalışırken vardır, sonra silinir
+            loaded['exists'] = Path(params[0]).exists()
+        cursor.execute.side_effect = execute
+        raw_conn = Mock(**{'cursor.return_value': cursor})
+        ddl_conn = Mock()
+        engine = Mock(**{'dialect.name': 'mysql', 'raw_connection.return_value': raw_conn,
+                         'begin.return_value': _CM(ddl_conn)})
+        engine.cursor, engine.raw_conn, engine.ddl_conn, engine.loaded = cursor, raw_conn, ddl_conn, loaded
+        return engine
+    
+    @pytest.mark.parametrize("newline", ["\n", "\r\n"], ids=["lf", "crlf"])
+    def test_generated_sql(self, app, mysql_engine, newline):
+        """Komut, tırnaklanmış kolonlar ve NULLIF atamalarıyla parametreli üretilir"""
+        data = newline.join(["id;ad`soyad;şehir", "1;Ali;", "2;;Bursa", "3;Ayşe;İzmir"]).encode('utf-8')
+        
+        result = app.bulk_load_csv_mysql(_upload(data, 'kişiler.csv'), 'kişi listesi', mysql_engine, separator=';')
+        
+        sql, params = mysql_engine.cursor.execute.call_args[0]
+        assert sql == (
+            "LOAD DATA LOCAL INFILE %s INTO TABLE `ki_i_listesi` CHARACTER SET utf8mb4 "
+            "FIELDS TERMINATED BY %s OPTIONALLY ENCLOSED BY '\"' ESCAPED BY '' "
+            "LINES TERMINATED BY %s IGNORE 1 LINES "
+            "(@c0, @c1, @c2) SET `id` = NULLIF(@c0, ''), `ad``soyad` = NULLIF(@c1, ''), `şehir` = NULLIF(@c2, '')"
+        )
+        assert params[1:] == (';', newline)
+        assert mysql_engine.loaded['exists'] and not Path(params[0]).exists()
+        mysql_engine.raw_conn.commit.assert_called_once()
+        assert result['rows'] == 3
+        assert result['columns'] == ['id', 'ad`soyad', 'şehir']
+    
+    def test_not_applicable(self, app, mysql_engine, monkeypatch):
+        """local_infile kapalıysa veya veritabanı MySQL değilse komut çalışmaz"""
+        upload = _csv_upload(3)
+        monkeypatch.setattr('streamlit_app.MYSQL_LOCAL_INFILE', False)
+        assert app.bulk_load_csv_mysql(upload, 'items', mysql_engine) is None
+        
+        monkeypatch.setattr('streamlit_app.MYSQL_LOCAL_INFILE', True)
+        mysql_engine.dialect.name = 'sqlite'
+        assert app.bulk_load_csv_mysql(upload, 'items', mysql_engine) is None
+        mysql_engine.raw_connection.assert_not_called()
+    
+    @pytest.mark.parametrize("if_exists,dropped", [('replace', True), ('fail', True), ('append', False)])
+    def test_refused(self, app, mysql_engine, if_exists, dropped):
+        """Sunucu LOCAL INFILE'ı reddederse None döner; oluşturulan boş tablo kaldırılır"""
+        mysql_engine.cursor.execute.side_effect = Exception(3948, "Loading local data is disabled")
+        
+        assert app.bulk_load_csv_mysql(_csv_upload(3), 'items', mysql_engine, if_exists=if_exists) is None
+        
+        assert mysql_engine.ddl_conn.execute.called is dropped
+        mysql_engine.raw_conn.close.assert_called_once()
+    
+    def test_other_errors_propagate(self, app, mysql_engine):
+        """Reddetme dışındaki hatalar yutulmaz"""
+        mysql_engine.cursor.execute.side_effect = Exception(1064, "syntax error")
+        
+        with pytest.raises(Exception, match="syntax error"):
+            app.bulk_load_csv_mysql(_csv_upload(3), 'items', mysql_engine)
+    
+    def test_refused_falls_back_to_stream(self, app, mysql_engine, monkeypatch):
+        """Reddedilen büyük CSV stream_csv_to_table ile parça parça yüklenir"""
+        mysql_engine.cursor.execute.side_effect = Exception(3948, "Loading local data is disabled")
+        monkeypatch.setattr('streamlit_app.CSV_STREAM_THRESHOLD', 0)
+        stream_result = {'rows': 3, 'columns': ['id', 'ad'], 'preview': None}
+        monkeypatch.setattr(app, 'stream_csv_to_table', Mock(return_value=stream_result))
+        upload = _csv_upload(3)
+        
+        result = app.stream_upload_to_table(upload, 'csv', 'items', mysql_engine, ',', 'replace')
+        
+        assert result is stream_result
+        args = app.stream_csv_to_table.call_args[0]
+        assert args[:5] == (upload, 'items', mysql_engine, ',', 'replace')
+    
+    def test_connection_form_enables_local_infile(self, app, mock_streamlit, mock_engine, monkeypatch):
+        """MySQL bağlantı formunun engine'leri de local_infile bağlantı argümanını taşır"""
+        monkeypatch.setattr('streamlit_app.MYSQL_LOCAL_INFILE', True)
+        get_engine = Mock(return_value=mock_engine)
+        monkeypatch.setattr('streamlit_app.get_engine', get_engine)
+        monkeypatch.setattr('streamlit_app.cached_database_list', Mock(return_value=['testdb']))
+        mock_streamlit.selectbox.return_value = 'testdb'
+        mock_streamlit.form_submit_button.return_value = True
+        
+        app._render_mysql_connection()
+        
+        urls = [call.args[0] for call in get_engine.call_args_list]
+        assert len(urls) == 2
+        assert all(url.endswith("?local_infile=1") for url in urls)
+        assert urls[1].split('?')[0].endswith("/testdb")
+    
+    def test_small_file_loaded_in_memory(self, app, mysql_engine, monkeypatch):
+        """Eşiğin altındaki dosya için akış yapılmaz (bellekte yüklenir)"""
+        monkeypatch.setattr('streamlit_app.MYSQL_LOCAL_INFILE', False)
+        monkeypatch.setattr(app, 'stream_csv_to_table', Mock())
+        
+        assert app.stream_upload_to_table(_csv_upload(3), 'csv', 'items', mysql_engine) is None
+        app.stream_csv_to_table.assert_not_called()
+
+def _xlsx_upload(rows: list, name: str = 'data.xlsx') -> io.BytesIO:
+    """Verilen satırlardan (ilk satır başlık) openpyxl ile üretilmiş xlsx yüklemesi"""
+    import openpyxl
+    workbook = openpyxl.Workbook()
+    for row in rows:
+        workbook.active.append(row)
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+    return _upload(buffer.getvalue(), name)
+
+# Başlık, arada tamamen boş bir satır ve beş veri satırı
+_EXCEL_ROWS = [
+    ['id', 'ad', None],
+    [1, 'Ali', 'x'],
+    [2, 'Ayşe', None],
+    [None, None, None],
+    [3, 'Can', 'y'],
+    [4, 'Deniz', None],
+    [5, 'Ece', 'z'],
+]
+
+class TestExcelLoading:
+    """Excel yükleme (openpyxl akışı ve calamine) testleri"""
+    
+    def test_stream_excel_to_table(self, app, sqlite_engine):
+        """Satırlar parça parça yazılır; boş satır atlanır, adsız kolon adlandırılır"""
+        progress = []
+        
+        result = app.stream_excel_to_table(_xlsx_upload(_EXCEL_ROWS), 'excel tablo', sqlite_engine,
+                                           chunksize=2, progress_callback=progress.append)
+        
+        assert result['rows'] == 5
+        assert result['columns'] == ['id', 'ad', 'Unnamed: 2']
+        df = pd.read_sql('SELECT * FROM excel_tablo', sqlite_engine)
+        assert df['id'].tolist() == [1, 2, 3, 4, 5]
+        assert df['ad'].tolist() == ['Ali', 'Ayşe', 'Can', 'Deniz', 'Ece']
+        assert df['Unnamed: 2'].isna().sum() == 2
+        assert progress[-1] == 1.0
+    
+    def test_stream_excel_header_only(self, app, sqlite_engine):
+        """Yalnızca başlık varsa tablo yazılmaz"""
+        result = app.stream_excel_to_table(_xlsx_upload([['id', 'ad']]), 'bos', sqlite_engine)
+        
+        assert result['rows'] == 0
+        assert not sa.inspect(sqlite_engine).has_table('bos')
+    
+    @pytest.mark.parametrize("calamine", [True, False], ids=["calamine", "calamine_missing"])
+    def test_load_excel_file(self, app, monkeypatch, calamine):
+        """calamine varsa onunla, yoksa openpyxl ile okunur"""
+        monkeypatch.setattr('streamlit_app.CALAMINE_AVAILABLE', calamine)
+        read_excel = Mock(wraps=pd.read_excel)
+        monkeypatch.setattr(pd, 'read_excel', read_excel)
+        
+        df = app.load_excel_file(_xlsx_upload(_EXCEL_ROWS))
+        
+        engines = [call.kwargs['engine'] for call in read_excel.call_args_list]
+        assert engines == (['calamine'] if calamine else ['openpyxl'])
+        assert df['ad'].dropna().tolist() == ['Ali', 'Ayşe', 'Can', 'Deniz', 'Ece']
+    
+    def test_load_excel_calamine_unsupported(self, app, monkeypatch):
+        """pandas calamine motorunu tanımıyorsa dosya baştan openpyxl ile okunur"""
+        monkeypatch.setattr('streamlit_app.CALAMINE_AVAILABLE', True)
+        original_read_excel = pd.read_excel
+        def read_excel(io_, engine=None, **kwargs):
+            if engine == 'calamine':
+                io_.read()
+                raise ValueError("Unknown engine: calamine")
+            return original_read_excel(io_, engine=engine, **kwargs)
+        monkeypatch.setattr(pd, 'read_excel', read_excel)
+        
+        df = app.load_excel_file(_xlsx_upload(_EXCEL_ROWS))
+        
+        assert df['id'].dropna().tolist() == [1, 2, 3, 4, 5]
+
+class TestExecuteSqlFile:
+    """SQL dosyası yükleme testleri"""
+    
+    @pytest.fixture
+    def items_engine(self, sqlite_engine):
+        """Boş items tablosu olan SQLite engine'i"""
+        with sqlite_engine.begin() as conn:
+            conn.execute(sa.text("CREATE TABLE items (name TEXT)"))
+        return sqlite_engine
+    
+    def test_literal_percent(self, app, items_engine):
+        """Metin içindeki % parametre işareti sayılmaz"""
+        sql = b"INSERT INTO items VALUES ('50%'); INSERT INTO items VALUES ('abc'); SELECT name FROM items WHERE name LIKE '%0%'"
+        
+        result = app.execute_sql_file(_upload(sql, 'data.sql'), items_engine)
+        
+        assert result.splitlines() == [
+            "Komut 1: Başarıyla çalıştırıldı",
+            "Komut 2: Başarıyla çalıştırıldı",
+            "Komut 3: 1 satır döndürüldü"
+        ]
+    
+    def test_failure_rolls_back(self, app, items_engine):
+        """Hatalı komut bildirilir, önceki komutlar geri alınır"""
+        sql = b"INSERT INTO items VALUES ('a'); INSERT INTO missing VALUES ('b')"
+        
+        with pytest.raises(Exception, match="Komut 2 hatası"):
+            app.execute_sql_file(_upload(sql, 'data.sql'), items_engine)
+        
+        with items_engine.connect() as conn:
+            assert conn.execute(sa.text("SELECT COUNT(*) FROM items")).scalar() == 0
+    
+    def test_mysql_reset_error_keeps_original(self, app):
+        """MySQL kontrol ayarları geri yüklenemese de asıl SQL hatası yükselir"""
+        def exec_driver_sql(sql):
+            if sql == "SET unique_checks=1":
+                raise RuntimeError("connection lost")
+        conn = Mock(**{'execute.side_effect': RuntimeError("syntax error"),
+                       'exec_driver_sql.side_effect': exec_driver_sql})
+        engine = Mock(**{'dialect.name': 'mysql', 'begin.return_value': _CM(conn)})
+        
+        with pytest.raises(Exception, match="syntax error"):
+            app.execute_sql_file(_upload(b"BAD STATEMENT", 'data.sql'), engine)
+        
+        conn.exec_driver_sql.assert_any_call("SET unique_checks=1")
+        # Kullanıcı komutları text() ile gider; exec_driver_sql pymysql'de '%' içeren komutları bozar
+        assert isinstance(conn.execute.call_args[0][0], sa.TextClause)
+
+class TestUploadForm:
+    """Veri yükleme formu üzerinden uçtan uca yükleme testleri"""
+    
+    @pytest.fixture
+    def submit_upload(self, app, mock_streamlit, sqlite_engine, monkeypatch):
+        """Dosyayı yeni tabloya yükleyen formu SQLite engine'iyle gönder"""
+        monkeypatch.setattr('streamlit_app.get_engine', Mock(return_value=sqlite_engine))
+        monkeypatch.setattr(app, 'get_table_list', Mock(return_value=[]))
+        monkeypatch.setattr(mock_streamlit, 'text_input', Mock(return_value='yuklenen'))
+        choices = {"Veritabanı seçin:": 'main', "Tablo seçin:": "Yeni tablo oluştur"}
+        mock_streamlit.selectbox.side_effect = lambda label, **kwargs: choices[label]
+        mock_streamlit.button.side_effect = _clicked("🚀 Yükle")
+        
+        def submit(uploaded):
+            mock_streamlit.file_uploader.return_value = uploaded
+            app._render_data_upload_section()
+            mock_streamlit.error.assert_not_called()
+        return submit
+    
+    def test_xlsx(self, submit_upload, sqlite_engine):
+        """Excel yüklemesi ayırıcı seçeneği olmadan tabloya yazılır"""
+        submit_upload(_xlsx_upload(_EXCEL_ROWS))
+        
+        df = pd.read_sql('SELECT * FROM yuklenen', sqlite_engine)
+        assert df['ad'].dropna().tolist() == ['Ali', 'Ayşe', 'Can', 'Deniz', 'Ece']
+    
+    def test_sql(self, submit_upload, sqlite_engine):
+        """SQL dosyası seçilen veritabanında çalıştırılır"""
+        submit_upload(_upload(b"CREATE TABLE items (name TEXT); INSERT INTO items VALUES ('a')", 'data.sql'))
+        
+        with sqlite_engine.connect() as conn:
+            assert conn.execute(sa.text("SELECT name FROM items")).scalar() == 'a'
+    
+    def test_clears_text_column_cache(self, submit_upload, streamlit_module, monkeypatch):
+        """Yeniden yüklenen tablonun metin kolonları önbellekten eski haliyle gelmez"""
+        clear = Mock()
+        monkeypatch.setattr(streamlit_module.detect_text_columns, 'clear', clear)
+        
+        submit_upload(_xlsx_upload(_EXCEL_ROWS))
+        
+        clear.assert_called_once()
+
+_TURKISH_CSV = "ad;şehir\nÇağrı;İstanbul\nGüneş;Muğla\n"
+
+class TestEncodingDetection:
+    """Yüklenen dosyalarda BOM ve encoding tespiti"""
+    
+    @pytest.mark.parametrize("data,expected", [
+        (_TURKISH_CSV.encode('utf-8-sig'), 'utf-8-sig'),
+        (_TURKISH_CSV.encode('utf-16-le'), None),
+        (codecs.BOM_UTF16_LE + _TURKISH_CSV.encode('utf-16-le'), 'utf-16'),
+        (codecs.BOM_UTF16_BE + _TURKISH_CSV.encode('utf-16-be'), 'utf-16'),
+        (_TURKISH_CSV.encode('utf-32'), 'utf-32'),
+        (_TURKISH_CSV.encode('utf-8'), None),
+    ])
+    def test_bom_encoding(self, app, data, expected):
+        """BOM varsa karşılık gelen encoding dönmeli, yoksa None"""
+        uploaded = _upload(data, 'data.csv')
+        
+        assert app._bom_encoding(uploaded) == expected
+        assert uploaded.tell() == 0
+    
+    @pytest.mark.parametrize("encoding", ['utf-8-sig', 'utf-16', 'utf-32'])
+    def test_detect_encoding_bom(self, app, encoding):
+        """BOM'lu dosyalar bayt örneğine bakılmadan BOM'a göre çözülmeli"""
+        data = _TURKISH_CSV.encode(encoding)
+        detected = app._detect_encoding(_upload(data, 'data.csv'))
+        
+        assert data.decode(detected) == _TURKISH_CSV
+    
+    def test_detect_encoding_utf8(self, app):
+        """BOM'suz geçerli UTF-8 dosya utf-8 olarak tespit edilmeli"""
+        assert app._detect_encoding(_upload(_TURKISH_CSV.encode('utf-8'), 'data.csv')) == 'utf-8'
+    
+    def test_detect_encoding_split_multibyte_sample(self, app):
+        """Örnek sınırında bölünen çok baytlı karakter UTF-8'i elememeli"""
+        data = "ş".encode('utf-8') * 10
+        uploaded = _upload(data, 'data.csv')
+        
+        assert app._detect_encoding(uploaded, sample_size=5) == 'utf-8'
+        assert uploaded.tell() == 0
+    
+    @pytest.mark.parametrize("encoding", ['cp1252', 'latin-1'])
+    def test_detect_encoding_single_byte_fallback(self, app, encoding):
+        """UTF-8 olmayan tek baytlı dosyalar latin-1 ile hatasız okunmalı"""
+        text = "ad,fiyat\nCafé,Crème brûlée – 5€\n" if encoding == 'cp1252' else "ad,not\nJosé,Müller ½\n"
+        data = text.encode(encoding)
+        
+        detected = app._detect_encoding(_upload(data, 'data.csv'))
+        
+        # latin-1 her bayt dizisini çözer; cp1252/iso-8859-1 denemelerine sıra gelmez
+        assert detected == 'latin-1'
+        assert len(data.decode(detected)) == len(data)
+
+def _limited_sqlite_engine(max_variables: int = 999) -> sa.Engine:
+    """Bind parametre sınırı eski SQLite sürümleri gibi düşürülmüş bellek içi engine"""
+    def connect():
+        conn = sqlite3.connect(':memory:', check_same_thread=False)
+        conn.setlimit(sqlite3.SQLITE_LIMIT_VARIABLE_NUMBER, max_variables)
+        return conn
+    return sa.create_engine('sqlite://', creator=connect, poolclass=sa.pool.StaticPool)
+
+class TestUploadHelpers:
+    """Tablo adı, CSV ayırıcısı ve INSERT parça boyutu yardımcıları"""
+    
+    @pytest.mark.parametrize("table_name,expected", [
+        ('musteri_listesi', 'musteri_listesi'),
+        ('satis raporu-2024.csv', 'satis_raporu_2024_csv'),
+        ('müşteri listesi', 'm__teri_listesi'),
+        ('İŞÇİ', '____'),
+        ('2024_satislar', '2024_satislar'),
+        ('2024 satış', '2024_sat__'),
+        ('', ''),
+        ('!!!', '___'),
+    ])
+    def test_sanitize_table_name(self, streamlit_module, table_name, expected):
+        """Harf/rakam/alt çizgi dışı karakterler '_' olmalı; baştaki rakamlar korunur"""
+        assert streamlit_module.sanitize_table_name(table_name) == expected
+    
+    @pytest.mark.parametrize("table_name", ['a b-c.d', 'tablo;DROP', 'x/y\\z', "it's"])
+    def test_sanitize_table_name_ascii_fast_path(self, streamlit_module, table_name):
+        """ASCII hızlı yolu (str.translate) regex yoluyla aynı sonucu vermeli"""
+        assert (streamlit_module.sanitize_table_name(table_name)
+                == streamlit_module._UNSAFE_NAME_RE.sub('_', table_name))
+    
+    @pytest.mark.parametrize("sample,expected", [
+        ('ad;soyad;yas\nAli;Yilmaz;30\nAyse;Kaya;25\n', ';'),
+        ('ad\tsoyad\tyas\nAli\tYilmaz\t30\nAyse\tKaya\t25\n', '\t'),
+        ('ad,soyad,yas\nAli,Yilmaz,30\nAyse,Kaya,25\n', ','),
+        ('ad|soyad|yas\nAli|Yilmaz|30\nAyse|Kaya|25\n', '|'),
+        # Son satır yarım kalmış örnek
+        ('ad;soyad;yas\nAli;Yilmaz;30\nAyse;Ka', ';'),
+    ])
+    def test_sniff_csv_separator(self, streamlit_module, sample, expected):
+        """Yaygın ayırıcılar örnek metinden tespit edilmeli"""
+        assert streamlit_module.sniff_csv_separator(sample) == expected
+    
+    def test_sniff_csv_separator_single_column(self, streamlit_module):
+        """Ayırıcı içermeyen örnekte varsayılan virgül dönmeli"""
+        assert streamlit_module.sniff_csv_separator('ad\nAli\nAyse\n') == ','
+    
+    @pytest.mark.parametrize("column_count", [1, 3, 7, 50, 333, 999, 1500])
+    def test_to_sql_chunksize_bound(self, streamlit_module, monkeypatch, column_count):
+        """Satır x kolon, SQLite'ın 999 değişken sınırını aşmamalı (en az 1 satır)"""
+        monkeypatch.setattr(streamlit_module, 'SQL_MAX_BIND_PARAMS', 999)
+        chunksize = streamlit_module.to_sql_chunksize(column_count)
+        
+        assert chunksize >= 1
+        assert chunksize <= streamlit_module.TO_SQL_MAX_ROWS
+        if column_count <= 999:
+            assert chunksize * column_count <= 999
+    
+    def test_to_sql_chunksize_row_cap(self, streamlit_module):
+        """Az kolonlu tablolarda satır sınırı uygulanmalı"""
+        assert streamlit_module.to_sql_chunksize(0) == streamlit_module.to_sql_chunksize(1)
+        assert streamlit_module.to_sql_chunksize(1) <= streamlit_module.TO_SQL_MAX_ROWS
+    
+    def test_to_sql_chunksize_on_limited_sqlite(self, streamlit_module, monkeypatch):
+        """Hesaplanan parça boyutu 999 değişkenli SQLite'ta multi-row INSERT'i çalıştırabilmeli"""
+        monkeypatch.setattr(streamlit_module, 'SQL_MAX_BIND_PARAMS', 999)
+        engine = _limited_sqlite_engine()
+        df = pd.DataFrame(np.arange(100 * 40).reshape(100, 40), columns=[f'k{i}' for i in range(40)])
+        
+        # Sınırsız parça sınırı aşar (yeni pandas sürücü hatasını DatabaseError ile sarar)
+        with pytest.raises((sa.exc.OperationalError, pd.errors.DatabaseError), match='too many SQL variables'):
+            df.to_sql('genis', engine, index=False, method='multi', chunksize=100)
+        
+        df.to_sql('genis', engine, index=False, if_exists='replace', method='multi',
+                  chunksize=streamlit_module.to_sql_chunksize(len(df.columns)))
+        assert _table_count(engine, 'genis') == 100
+
+@pytest.mark.skipif(not BENCHMARK_AVAILABLE, reason="pytest-benchmark kurulu değil")
+class TestBenchmarks:
+    """Sık çalışan app yollarının mikro benchmark'ları (pytest --benchmark-only)"""
+    
+    def test_bench_init_session_state(self, benchmark, app, mock_streamlit):
+        """Boş session state'i başlatma süresi"""
+        # Her tur boş session state ile başlar; yalnızca init_session_state ölçülür
+        benchmark.pedantic(app.init_session_state, setup=mock_streamlit.session_state.clear, rounds=200)
+        
+        assert mock_streamlit.session_state['connection_established'] is False
+    
+    def test_bench_render_footer(self, benchmark, app, mock_streamlit):
+        """Footer render süresi"""
+        benchmark(app.render_footer)
+        
+        assert mock_streamlit.markdown.call_count >= 1
 
 if __name__ == "__main__":
     pytest.main([__file__]) 
\ No newline at end of file